@@ -0,0 +1,141 @@
+"""
+Backtest Runner
+
+Runs the backtest scripts on behalf of the API. A backtest is executed in a
+worker process: the strategy module is configured from the request's
+parameters (on top of the defaults in 'config.ini'), the date range is
+processed chunk by chunk, and progress is sent back to the API through a
+queue after every chunk. The results are mapped onto the `strategy_1` columns
+by `results_sink` so the API can store them without an Excel round trip.
+
+Only strategies whose module exposes `load_lotsize_data` and
+`iter_result_chunks` can be run; they are listed in `STRATEGIES`, and the
+underlyings each of them can backtest in `STRATEGY_UNDERLYINGS`.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import configparser
+import importlib
+import json
+import pandas as pd
+from results_sink import map_results
+from shard_router import configure_shards
+
+
+def _json_text(value):
+    """Keep JSON text as it is and encode lists (e.g. from a JSON request) as JSON text."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+# Strategy id -> module running it
+STRATEGIES = {
+    "s0002_v2": "s0002_v2",
+}
+# Strategy id -> stock names it can backtest; s0002_v2 reads the BankNifty
+# option table and lot sizes whatever its STOCK_NAME is
+STRATEGY_UNDERLYINGS = {
+    "s0002_v2": ("BANKNIFTY",),
+}
+# Module global -> (config.ini section, option, converter)
+STRATEGY_PARAMS = {
+    "STOCK_NAME": ("params", "stock_name", str),
+    "ENTRY_TIME": ("params", "entry_time", str),
+    "SQUAREOFF_TIME": ("params", "squareoff_time", str),
+    "WEEK_EXPIRY": ("params", "week_expiry", int),
+    "TR_SEGMENT": ("params", "tr_segment", int),
+    "TARGET_STOPLOSS_VALUES": ("params", "stoploss_target_combo", _json_text),
+    "CLOSEST_VAL": ("params", "closest_val", int),
+    "TRIGGER_VAL": ("params", "trigger_val", float),
+    "MEMORY_BUDGET_MB": ("memory", "memory_budget_mb", int),
+    "MAX_CHUNK_DAYS": ("memory", "max_chunk_days", int),
+}
+CONFIG_PATH = "config.ini"
+
+
+def resolve_params(params, config_path=CONFIG_PATH):
+    """
+    Merge the request's parameters over the defaults from the config file.
+
+    Parameters:
+        params (dict): Parameters of the request, keyed by config option name
+            (e.g. 'entry_time', 'stoploss_target_combo').
+        config_path (str, optional): The config file with the defaults.
+
+    Returns:
+        dict: Module global name -> typed value.
+
+    Raises:
+        ValueError: If a parameter is unknown or has neither a value nor a default.
+    """
+    options = {option for _, option, _ in STRATEGY_PARAMS.values()}
+    unknown = sorted(set(params) - options)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    resolved = {}
+    for name, (section, option, convert) in STRATEGY_PARAMS.items():
+        if option in params:
+            value = params[option]
+        elif config.has_option(section, option):
+            value = config.get(section, option)
+        else:
+            raise ValueError(f"Missing parameter: {option}")
+        resolved[name] = convert(value)
+    return resolved
+
+
+def check_underlying(strategy_id, params):
+    """
+    Check that a strategy can backtest the requested stock name.
+
+    Parameters:
+        strategy_id (str): Key of `STRATEGIES`.
+        params (dict): Module globals from `resolve_params`.
+
+    Raises:
+        ValueError: If the strategy does not support the stock name.
+    """
+    # config.ini quotes the default stock name
+    stock_name = params["STOCK_NAME"].strip().strip('"').upper()
+    supported = STRATEGY_UNDERLYINGS[strategy_id]
+    if stock_name not in supported:
+        raise ValueError(
+            f"{strategy_id} cannot backtest stock_name {params['STOCK_NAME']}; supported: {', '.join(supported)}"
+        )
+
+
+def execute_backtest(strategy_id, strategy_name, start_date, end_date, params, progress_queue):
+    """
+    Run one backtest. Runs in a worker process.
+
+    Parameters:
+        strategy_id (str): Key of `STRATEGIES`.
+        strategy_name (str): Strategy_Name the trades are stored under.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        params (dict): Module globals from `resolve_params`.
+        progress_queue (Queue): Receives (chunks_done, chunk_count) after every chunk.
+
+    Returns:
+        pd.DataFrame: The trades, as produced by `results_sink.map_results`
+        (empty when the date range had no data).
+    """
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH)
+    # Route the option bars to the same yearly shards as the scripts do
+    configure_shards(config)
+    module = importlib.import_module(STRATEGIES[strategy_id])
+    for name, value in params.items():
+        setattr(module, name, value)
+    lotsize_df = module.load_lotsize_data()
+    results = []
+    for chunks_done, chunk_count, frame in module.iter_result_chunks(start_date, end_date, lotsize_df):
+        if frame is not None:
+            results.append(frame)
+        progress_queue.put((chunks_done, chunk_count))
+    if not results:
+        return pd.DataFrame()
+    return map_results(pd.concat(results, ignore_index=True), strategy_name)
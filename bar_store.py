@@ -0,0 +1,400 @@
+"""
+Bar Store
+
+A read-only, memory-mapped store of the spot and option bars of one
+underlying, so every process that needs bars (strategy scripts, worker
+pools, the API, notebooks) maps the same files instead of loading its own
+copy from the database, Excel or CSV:
+
+- every column is a raw fixed-width array (float64 prices and strikes,
+  'S8' times, 'S2' option types), appended chunk by chunk when the store is
+  built, so building never holds more than one chunk in memory,
+- the option bars of a day are laid out by (otype, strike_price, tr_time),
+  the order `strategy_engine.DayBars` indexes them in, and a contract index
+  of (date, otype, strike_price) -> (start, stop) and a day index of
+  date -> (contracts, option rows, spot rows) are stored next to them,
+- `BarStore` opens the columns with `np.memmap`; opening only reads the
+  small manifest, the bars are paged in by the OS on first access and the
+  page cache is shared by every process that maps the same store,
+- `BarStore.fetch_bars` has the signature and result of
+  `market_data.fetch_bars`, so the strategy engine can read from the store
+  instead of the database; `BarStore.day_arrays` hands out the arrays of a
+  day directly, for `strategy_engine.DayBars.from_store`.
+
+Usage:
+    python bar_store.py [--output bar_store/BANKNIFTY]
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import argparse
+import configparser
+import datetime
+import json
+import os
+import numpy as np
+import pandas as pd
+from market_data import fetch_bars
+
+MANIFEST_FILE = "manifest.json"
+# Column file -> dtype; 'fno_*' hold the option bars, 'spot_*' the spot bars
+COLUMNS = {
+    "fno_tr_time": "S8",
+    "fno_tr_open": "<f8",
+    "fno_tr_high": "<f8",
+    "fno_tr_low": "<f8",
+    "fno_tr_close": "<f8",
+    "spot_tr_time": "S8",
+    "spot_tr_close": "<f8",
+    "contract_otype": "S2",
+    "contract_strike_price": "<f8",
+    "contract_start": "<i8",
+    "contract_stop": "<i8",
+    "day_tr_date": "S10",
+    "day_contract_start": "<i8",
+    "day_contract_stop": "<i8",
+    "day_fno_start": "<i8",
+    "day_fno_stop": "<i8",
+    "day_spot_start": "<i8",
+    "day_spot_stop": "<i8",
+}
+FNO_COLUMNS = ["tr_date", "tr_time", "tr_open", "tr_high", "tr_low", "tr_close", "stock_name", "strike_price", "otype"]
+SPOT_COLUMNS = ["tr_date", "tr_time", "tr_close", "stock_name"]
+
+
+class BarStoreWriter:
+    """
+    Builds a bar store one chunk of days at a time.
+
+    Attributes:
+        path (str): Directory of the store.
+        stock_name (str): The underlying.
+        rows (dict): Column file -> values written so far.
+        last_date (str): Last trading date written, or None.
+    """
+
+    def __init__(self, path, stock_name):
+        self.path = path
+        self.stock_name = stock_name
+        os.makedirs(path, exist_ok=True)
+        # The manifest is written last, so a half-built store cannot be opened
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            os.remove(os.path.join(path, MANIFEST_FILE))
+        for name in COLUMNS:
+            open(os.path.join(path, f"{name}.bin"), "wb").close()
+        self.rows = dict.fromkeys(COLUMNS, 0)
+        self.last_date = None
+
+    def add(self, spot_df, fno_df):
+        """
+        Append the bars of a chunk of days.
+
+        Parameters:
+            spot_df (pd.DataFrame): Spot bars, as returned by `fetch_bars`.
+            fno_df (pd.DataFrame): Option bars, as returned by `fetch_bars`.
+
+        Returns:
+            int: Number of option and spot bars written.
+
+        Raises:
+            ValueError: If the chunk starts on or before a date already written.
+        """
+        spot_df = spot_df.assign(tr_date=spot_df["tr_date"].astype(str), tr_time=spot_df["tr_time"].astype(str))
+        fno_df = fno_df.assign(tr_date=fno_df["tr_date"].astype(str), tr_time=fno_df["tr_time"].astype(str))
+        dates = sorted(set(spot_df["tr_date"]) | set(fno_df["tr_date"]))
+        if not dates:
+            return 0
+        if self.last_date is not None and dates[0] <= self.last_date:
+            raise ValueError(f"Chunk starts on {dates[0]}, after {self.last_date} was written")
+
+        spot = spot_df.sort_values(["tr_date", "tr_time"], kind="stable")
+        bars = fno_df.sort_values(["tr_date", "otype", "strike_price", "tr_time"], kind="stable")
+        self._append("spot_tr_time", spot["tr_time"])
+        self._append("spot_tr_close", spot["tr_close"])
+        for column in ("tr_time", "tr_open", "tr_high", "tr_low", "tr_close"):
+            self._append(f"fno_{column}", bars[column])
+
+        # Contract boundaries, wherever the (tr_date, otype, strike_price) key changes
+        keys = bars[["tr_date", "otype", "strike_price"]]
+        changed = (keys != keys.shift()).any(axis=1).to_numpy()
+        starts = np.flatnonzero(changed)
+        stops = np.append(starts[1:], len(bars)) if len(starts) else starts
+        fno_offset = self.rows["fno_tr_time"] - len(bars)
+        self._append("contract_otype", bars["otype"].to_numpy()[starts])
+        self._append("contract_strike_price", bars["strike_price"].to_numpy()[starts])
+        self._append("contract_start", fno_offset + starts)
+        self._append("contract_stop", fno_offset + stops)
+
+        contract_dates = bars["tr_date"].to_numpy()[starts]
+        bar_dates = bars["tr_date"].to_numpy()
+        spot_dates = spot["tr_date"].to_numpy()
+        contract_offset = self.rows["contract_start"] - len(starts)
+        spot_offset = self.rows["spot_tr_time"] - len(spot)
+        date_keys = np.array(dates, dtype=object)
+        self._append("day_tr_date", date_keys)
+        for name, values, offset in (
+            ("contract", contract_dates, contract_offset),
+            ("fno", bar_dates, fno_offset),
+            ("spot", spot_dates, spot_offset),
+        ):
+            self._append(f"day_{name}_start", offset + np.searchsorted(values, date_keys, side="left"))
+            self._append(f"day_{name}_stop", offset + np.searchsorted(values, date_keys, side="right"))
+        self.last_date = dates[-1]
+        return len(bars) + len(spot)
+
+    def close(self):
+        """Write the manifest, which makes the store readable."""
+        with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+            json.dump(
+                {"stock_name": self.stock_name, "columns": COLUMNS, "rows": self.rows},
+                manifest_file,
+                indent=2,
+                sort_keys=True,
+            )
+
+    def _append(self, name, values):
+        """Append values to a column file."""
+        array = np.asarray(values).astype(COLUMNS[name])
+        with open(os.path.join(self.path, f"{name}.bin"), "ab") as column_file:
+            array.tofile(column_file)
+        self.rows[name] += len(array)
+
+
+class BarStore:
+    """
+    A bar store mapped read-only into memory.
+
+    Attributes:
+        path (str): Directory of the store.
+        stock_name (str): The underlying.
+        columns (dict): Column file -> memory-mapped array.
+        dates (np.ndarray): Trading dates of the store ('S10'), in order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        self.stock_name = manifest["stock_name"]
+        self.columns = {}
+        for name, dtype in manifest["columns"].items():
+            rows = manifest["rows"][name]
+            # np.memmap cannot map an empty file
+            self.columns[name] = (
+                np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+                if rows else np.zeros(0, dtype=dtype)
+            )
+        self.dates = self.columns["day_tr_date"]
+
+    def _day(self, tr_date):
+        """Position of a trading date in the day index, or None."""
+        key = str(tr_date).encode()
+        position = int(np.searchsorted(self.dates, key))
+        if position < len(self.dates) and self.dates[position] == key:
+            return position
+        return None
+
+    def series(self, tr_date, otype, strike_price):
+        """
+        Get the bars of one contract without copying them.
+
+        Parameters:
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            otype (str): 'CE' or 'PE'.
+            strike_price (float): Strike of the contract.
+
+        Returns:
+            dict or None: 'tr_time' ('S8'), 'tr_open', 'tr_high', 'tr_low' and
+            'tr_close' views into the store, or None if the contract did not trade.
+        """
+        day = self._day(tr_date)
+        if day is None:
+            return None
+        first = self.columns["day_contract_start"][day]
+        last = self.columns["day_contract_stop"][day]
+        matches = np.flatnonzero(
+            (self.columns["contract_otype"][first:last] == otype.encode())
+            & (self.columns["contract_strike_price"][first:last] == strike_price)
+        )
+        if not len(matches):
+            return None
+        contract = first + matches[0]
+        start, stop = self.columns["contract_start"][contract], self.columns["contract_stop"][contract]
+        return {
+            column: self.columns[f"fno_{column}"][start:stop]
+            for column in ("tr_time", "tr_open", "tr_high", "tr_low", "tr_close")
+        }
+
+    def day_arrays(self, tr_date, start_time="00:00:00", end_time="23:59:59"):
+        """
+        The spot and option bars of one day inside a time window, as arrays.
+
+        The option bars are in (otype, strike_price, tr_time) order. When the
+        window holds every bar of the day they are views into the store,
+        otherwise copies of the bars inside the window.
+
+        Parameters:
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            start_time (str, optional): First bar time ('HH:MM:SS').
+            end_time (str, optional): Last bar time ('HH:MM:SS').
+
+        Returns:
+            dict or None: The option bars' 'tr_time' ('S8'), 'tr_open',
+            'tr_high', 'tr_low', 'tr_close', 'strike_price' and 'otype' ('S2'),
+            and the spot bars' 'spot_tr_time' and 'spot_tr_close'; None if the
+            day is not stored.
+        """
+        day = self._day(tr_date)
+        if day is None:
+            return None
+        start_key, end_key = start_time.encode(), end_time.encode()
+
+        spot_start, spot_stop = self.columns["day_spot_start"][day], self.columns["day_spot_stop"][day]
+        spot_times = self.columns["spot_tr_time"][spot_start:spot_stop]
+        spot_mask = _window_mask(spot_times, start_key, end_key)
+
+        fno_start, fno_stop = self.columns["day_fno_start"][day], self.columns["day_fno_stop"][day]
+        first = self.columns["day_contract_start"][day]
+        last = self.columns["day_contract_stop"][day]
+        lengths = self.columns["contract_stop"][first:last] - self.columns["contract_start"][first:last]
+        times = self.columns["fno_tr_time"][fno_start:fno_stop]
+        mask = _window_mask(times, start_key, end_key)
+        return {
+            "tr_time": times[mask],
+            **{
+                column: self.columns[f"fno_{column}"][fno_start:fno_stop][mask]
+                for column in ("tr_open", "tr_high", "tr_low", "tr_close")
+            },
+            "strike_price": np.repeat(self.columns["contract_strike_price"][first:last], lengths)[mask],
+            "otype": np.repeat(self.columns["contract_otype"][first:last], lengths)[mask],
+            "spot_tr_time": spot_times[spot_mask],
+            "spot_tr_close": self.columns["spot_tr_close"][spot_start:spot_stop][spot_mask],
+        }
+
+    def day_frames(self, tr_date, start_time="00:00:00", end_time="23:59:59"):
+        """
+        The spot and option bars of one day inside a time window.
+
+        Parameters:
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            start_time (str, optional): First bar time ('HH:MM:SS').
+            end_time (str, optional): Last bar time ('HH:MM:SS').
+
+        Returns:
+            tuple: The spot bars and the option bars as DataFrames with the
+            columns of `market_data.fetch_bars`; empty if the day is not stored.
+        """
+        arrays = self.day_arrays(tr_date, start_time, end_time)
+        if arrays is None:
+            return pd.DataFrame(columns=SPOT_COLUMNS), pd.DataFrame(columns=FNO_COLUMNS)
+        spot_df = pd.DataFrame({
+            "tr_date": str(tr_date),
+            "tr_time": arrays["spot_tr_time"].astype(str),
+            "tr_close": arrays["spot_tr_close"],
+            "stock_name": self.stock_name,
+        }, columns=SPOT_COLUMNS)
+        fno_df = pd.DataFrame({
+            "tr_date": str(tr_date),
+            "tr_time": arrays["tr_time"].astype(str),
+            **{column: arrays[column] for column in ("tr_open", "tr_high", "tr_low", "tr_close")},
+            "stock_name": self.stock_name,
+            "strike_price": arrays["strike_price"],
+            "otype": arrays["otype"].astype(str),
+        }, columns=FNO_COLUMNS)
+        return spot_df, fno_df
+
+    def fetch_bars(self, stock_name, start_date, end_date, start_time, end_time, fno_table=None, verbose=False):
+        """
+        Read the bars of a date range and time window, like `market_data.fetch_bars`.
+
+        Parameters:
+            stock_name (str): The underlying; must be the store's.
+            start_date (str): First trading date ('YYYY-MM-DD').
+            end_date (str): Last trading date ('YYYY-MM-DD').
+            start_time (str): First bar time ('HH:MM:SS').
+            end_time (str): Last bar time ('HH:MM:SS').
+            fno_table (str, optional): Ignored; the store holds one underlying.
+            verbose (bool, optional): Print the dates read.
+
+        Returns:
+            tuple: The spot bars and the option bars as DataFrames.
+
+        Raises:
+            ValueError: If the store holds another underlying.
+        """
+        if stock_name != self.stock_name:
+            raise ValueError(f"Bar store {self.path} holds {self.stock_name}, not {stock_name}")
+        first = np.searchsorted(self.dates, str(start_date).encode(), side="left")
+        last = np.searchsorted(self.dates, str(end_date).encode(), side="right")
+        frames = [self.day_frames(tr_date.decode(), start_time, end_time) for tr_date in self.dates[first:last]]
+        if verbose:
+            print(f"Bar store {self.path}: {len(frames)} days from {start_date} to {end_date}")
+        if not frames:
+            return pd.DataFrame(columns=SPOT_COLUMNS), pd.DataFrame(columns=FNO_COLUMNS)
+        return (
+            pd.concat([spot_df for spot_df, _ in frames], ignore_index=True),
+            pd.concat([fno_df for _, fno_df in frames], ignore_index=True),
+        )
+
+
+def _window_mask(times, start_key, end_key):
+    """Selector of the bar times inside a window; a full slice when every time is inside it."""
+    mask = (times >= start_key) & (times <= end_key)
+    return slice(None) if mask.all() else mask
+
+
+def build_bar_store(path, stock_name, start_date, end_date, start_time="09:15:00", end_time="15:30:00",
+                    fno_table="fnoieod_banknifty", chunk_days=20):
+    """
+    Fetch a date range from the database chunk by chunk into a new bar store.
+
+    Parameters:
+        path (str): Directory of the store.
+        stock_name (str): The underlying.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        start_time (str, optional): First bar time stored.
+        end_time (str, optional): Last bar time stored.
+        fno_table (str, optional): Option bar table of the underlying.
+        chunk_days (int, optional): Calendar days fetched per query.
+
+    Returns:
+        int: Number of option and spot bars stored.
+    """
+    writer = BarStoreWriter(path, stock_name)
+    written = 0
+    chunk_start = datetime.date.fromisoformat(start_date)
+    last_date = datetime.date.fromisoformat(end_date)
+    while chunk_start <= last_date:
+        chunk_end = min(chunk_start + datetime.timedelta(days=chunk_days - 1), last_date)
+        written += writer.add(*fetch_bars(stock_name, chunk_start, chunk_end, start_time, end_time, fno_table))
+        chunk_start = chunk_end + datetime.timedelta(days=1)
+    writer.close()
+    return written
+
+
+if __name__ == "__main__":
+    from market_data import parse_underlyings
+    from shard_router import configure_shards
+
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    configure_shards(config)
+    STOCK_NAME = config.get("params", "stock_name").strip('"')
+    parser = argparse.ArgumentParser(description="Build a memory-mapped bar store from the database")
+    parser.add_argument(
+        "--output",
+        default=config.get("bar_store", "directory", fallback="bar_store/{stock}").format(stock=STOCK_NAME),
+        help="Directory of the store",
+    )
+    args = parser.parse_args()
+
+    rows = build_bar_store(
+        args.output,
+        STOCK_NAME,
+        config.get("params", "start_date"),
+        config.get("params", "end_date"),
+        fno_table=parse_underlyings(config)[STOCK_NAME]["fno_table"],
+        chunk_days=config.getint("memory", "max_chunk_days", fallback=20),
+    )
+    print(f"Stored {rows} bars of {STOCK_NAME} in {args.output}")
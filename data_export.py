@@ -0,0 +1,109 @@
+"""
+Data Export Formats
+
+Encoders that turn rows coming off a streaming database cursor into response
+bodies for the `/get_data/` endpoint, one batch at a time:
+
+- NDJSON: one JSON object per line,
+- Arrow IPC stream: one record batch per cursor batch (requires `pyarrow`).
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+import io
+import json
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def iter_ndjson(batches, columns):
+    """
+    Encode batches of rows as newline-delimited JSON.
+
+    Parameters:
+        batches (iterable): Lists of rows as produced by `Result.partitions()`.
+        columns (list): Names of the leading row values to emit.
+
+    Yields:
+        bytes: One encoded batch at a time.
+    """
+    for rows in batches:
+        lines = [
+            json.dumps(dict(zip(columns, row)), default=str) for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def arrow_type(column):
+    """
+    Map a SQLAlchemy column onto the matching Arrow type.
+
+    Parameters:
+        column (Column): The table column.
+
+    Returns:
+        pa.DataType: The Arrow type used to encode the column.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime.datetime:
+        return pa.timestamp("us")
+    if python_type is datetime.date:
+        return pa.date32()
+    if python_type is datetime.time:
+        return pa.time64("us")
+    return pa.string()
+
+
+def iter_arrow(batches, columns, table):
+    """
+    Encode batches of rows as an Arrow IPC stream.
+
+    The schema is taken from the table definition so that every batch has
+    the same types, even when a batch only holds NULLs for a column.
+
+    Parameters:
+        batches (iterable): Lists of rows as produced by `Result.partitions()`.
+        columns (list): Names of the leading row values to emit.
+        table (Table): Table the columns belong to.
+
+    Yields:
+        bytes: The stream header followed by one record batch at a time.
+    """
+    schema = pa.schema([(name, arrow_type(table.c[name])) for name in columns])
+    sink = io.BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return data
+
+    writer = pa.ipc.new_stream(sink, schema)
+    yield drain()
+    for rows in batches:
+        arrays = [
+            pa.array([row[index] for row in rows], type=schema.field(index).type)
+            for index in range(len(columns))
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
@@ -0,0 +1,192 @@
+"""
+Database I/O Telemetry
+
+This module records what every `_query_db` call costs so that a slow day can be
+attributed to the server, the network or the CSV parse:
+
+- first byte time: from sending the COPY until the first byte arrives (time to
+  first byte),
+- transfer time: from the first byte until the COPY completes,
+- bytes transferred and rows returned,
+- parse time of the CSV into a DataFrame.
+
+PostgreSQL streams the rows of a COPY while it is still producing them, so the
+first byte time only covers planning and the first rows, and the transfer time
+includes the server producing the rest as well as the network. The server's
+own execution time is in the slow-query log's plan (or `pg_stat_statements`).
+
+The numbers are aggregated per database (e.g. 'indices_spot_ieod',
+'fnodata2019'). Queries slower than the configured threshold are appended to a
+slow-query log together with their SQL and `EXPLAIN` plan, fetched over a
+connection of its own so it never holds one of the pooled connections.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+import json
+import threading
+import time
+
+
+class MeteredFile:
+    """
+    File wrapper handed to `copy_expert` that counts the bytes written to it
+    and remembers when the first chunk arrived from the server.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_written = 0
+        self.first_write_at = None
+
+    def write(self, data):
+        if self.first_write_at is None:
+            self.first_write_at = time.perf_counter()
+        self.bytes_written += len(data)
+        return self.fileobj.write(data)
+
+
+class QueryTelemetry:
+    """
+    Aggregates query statistics per database and maintains the slow-query log.
+
+    Attributes:
+        slow_query_seconds (float): Total time above which a query is logged.
+        slow_query_log (str): Path of the slow-query log file.
+        databases (dict): Per-database aggregated counters.
+    """
+
+    def __init__(self, slow_query_seconds=5.0, slow_query_log="slow_queries.log"):
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_query_log = slow_query_log
+        self.databases = {}
+        # Queries of concurrent backtests are recorded from several threads;
+        # the counters and the log file have separate locks, so a slow-query
+        # write never holds up the counters of other queries
+        self.lock = threading.Lock()
+        self.log_lock = threading.Lock()
+
+    def record(self, dbname, query, stats, connect=None):
+        """
+        Record the statistics of one query and log it if it was slow.
+
+        Parameters:
+            dbname (str): Database the query ran against.
+            query (str): The SQL query.
+            stats (dict): Keys 'first_byte_seconds', 'transfer_seconds',
+                'parse_seconds', 'bytes' and 'rows'.
+            connect (callable, optional): Opens a new psycopg2 connection to
+                the database, used to fetch the `EXPLAIN` plan of a slow query.
+        """
+        total_seconds = (
+            stats["first_byte_seconds"] + stats["transfer_seconds"] + stats["parse_seconds"]
+        )
+        is_slow = total_seconds >= self.slow_query_seconds
+        plan = explain_plan(connect, query) if is_slow else None
+        with self.lock:
+            counters = self.databases.setdefault(
+                dbname,
+                {
+                    "calls": 0,
+                    "first_byte_seconds": 0.0,
+                    "transfer_seconds": 0.0,
+                    "parse_seconds": 0.0,
+                    "bytes": 0,
+                    "rows": 0,
+                    "slow_queries": 0,
+                },
+            )
+            counters["calls"] += 1
+            for key in ("first_byte_seconds", "transfer_seconds", "parse_seconds", "bytes", "rows"):
+                counters[key] += stats[key]
+            if is_slow:
+                counters["slow_queries"] += 1
+        if is_slow:
+            self.log_slow_query(dbname, query, stats, plan)
+
+    def log_slow_query(self, dbname, query, stats, plan):
+        """
+        Append a slow query, its statistics and its plan to the slow-query log.
+
+        Parameters:
+            dbname (str): Database the query ran against.
+            query (str): The SQL query.
+            stats (dict): The statistics recorded for the query.
+            plan (str): The `EXPLAIN` output, or an explanation of why it is missing.
+        """
+        entry = (
+            f"-- {datetime.datetime.now().isoformat()} {dbname}\n"
+            f"-- {json.dumps(stats, sort_keys=True)}\n"
+            f"{query.strip()};\n"
+            f"{plan}\n\n"
+        )
+        with self.log_lock:
+            with open(self.slow_query_log, "a", encoding="utf-8") as log_file:
+                log_file.write(entry)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Aggregated counters per database.
+        """
+        return self.databases
+
+    def write_summary(self, path):
+        """
+        Write the per-database summary to a JSON file.
+
+        Parameters:
+            path (str): Output path of the JSON summary.
+        """
+        with open(path, "w", encoding="utf-8") as summary_file:
+            json.dump(self.summary(), summary_file, indent=2, sort_keys=True)
+
+
+def explain_plan(connect, query):
+    """
+    Fetch the `EXPLAIN` plan of a query without executing it again.
+
+    The plan is fetched over a new connection that is closed afterwards.
+
+    Parameters:
+        connect (callable): Opens a new psycopg2 connection, or None.
+        query (str): The SQL query.
+
+    Returns:
+        str: The plan text, one line per plan node.
+    """
+    if connect is None:
+        return "-- plan unavailable: no connection"
+    try:
+        conn = connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"EXPLAIN {query}")
+                return "\n".join(f"-- {row[0]}" for row in cur.fetchall())
+        finally:
+            conn.close()
+    except Exception as e:
+        return f"-- plan unavailable: {e}"
+
+
+TELEMETRY = QueryTelemetry()
+
+
+def configure_telemetry(config):
+    """
+    Configure the shared telemetry from the [telemetry] section of a config.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        str: Path where the per-database summary should be written.
+    """
+    TELEMETRY.slow_query_seconds = config.getfloat(
+        "telemetry", "slow_query_seconds", fallback=5.0
+    )
+    TELEMETRY.slow_query_log = config.get(
+        "telemetry", "slow_query_log", fallback="slow_queries.log"
+    )
+    return config.get("telemetry", "summary_output", fallback="db_telemetry.json")
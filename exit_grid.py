@@ -0,0 +1,286 @@
+"""
+Exit Grid
+
+Evaluates many (stoploss, target) multiplier pairs for the same entries
+without running the exit search again for every pair.
+
+For a short option the first bar with `tr_high >= entry * stoploss` is the
+first position where the running maximum of the highs reaches that level,
+and the running maximum never decreases; the same holds for the running
+minimum of the lows and the target. An `ExitGrid` therefore keeps both
+running extrema of every trade once, and answers every pair of a grid with
+one binary search per trade and level, returning a trades x pairs cube of
+exit types, prices, times and PNL.
+
+A bar reaching both levels is settled as in the strategy engine: by the
+strategy's `exit_resolver.AmbiguityResolver` when it has one, otherwise by
+its `stoploss_first` rule, and flagged in the cube's 'exit_resolution'.
+
+The grid covers the first entry of every leg with the fixed stoploss/target
+exits and the square-off bar; re-entries, trailing and time stops depend on
+the exits themselves and are left to the strategy engine.
+
+Usage:
+    python exit_grid.py
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import configparser
+import json
+import numpy as np
+import pandas as pd
+from market_data import parse_underlyings
+from shard_router import configure_shards
+from strategy_engine import chunk_ranges, load_days, open_store, read_lot_sizes, strategies_from_config
+
+# Exit type codes of the result cube
+EXIT_CODES = ("NONE", "TARGET", "STOPLOSS", "SQOFF")
+
+
+class ExitGrid:
+    """
+    The running extrema of the trades of one strategy.
+
+    Attributes:
+        squareoff_time (str): Time of the square-off bar.
+        stoploss_first (bool): Whether a bar reaching both levels is a stoploss
+            when the resolver cannot tell.
+        resolver (AmbiguityResolver): Settles bars reaching both levels, or None.
+        trades (list): One dict per trade with its day, contract, entry and lot size.
+        running_high (list): Running maximum of the highs after every entry.
+        running_low (list): Running minimum of the lows after every entry.
+        times (list): Bar times after every entry.
+        sqoff_close (list): Close of the square-off bar of every trade, or None.
+    """
+
+    def __init__(self, squareoff_time, stoploss_first=False, resolver=None):
+        self.squareoff_time = squareoff_time
+        self.stoploss_first = stoploss_first
+        self.resolver = resolver
+        self.trades = []
+        self.running_high = []
+        self.running_low = []
+        self.times = []
+        self.sqoff_close = []
+
+    def add(self, trade, series, entry_time):
+        """
+        Add a trade and the running extrema of its bars after the entry.
+
+        Parameters:
+            trade (dict): 'tr_date', 'stock_name', 'strike_price', 'otype',
+                'temp_entry_price' and 'lotsize' of the trade.
+            series (BarSeries): Bars of the contract.
+            entry_time (str): Entry time of the trade ('HH:MM:SS').
+        """
+        window = series.window(entry_time, self.squareoff_time)
+        sqoff_index = series.index_at(self.squareoff_time)
+        self.trades.append(trade)
+        self.running_high.append(np.maximum.accumulate(series.high[window]))
+        self.running_low.append(np.minimum.accumulate(series.low[window]))
+        self.times.append(series.times[window])
+        self.sqoff_close.append(series.close[sqoff_index] if sqoff_index is not None else None)
+
+    def evaluate(self, pairs):
+        """
+        Find the exit of every trade for every (stoploss, target) pair.
+
+        Parameters:
+            pairs (list): (stoploss multiple, target multiple) pairs, in the
+                order of `stoploss_target_combo`.
+
+        Returns:
+            dict: 'pairs', and trades x pairs arrays 'exit_code' (index into
+            `EXIT_CODES`), 'exit_price', 'exit_time', 'exit_resolution'
+            ('FINE' by the resolver, 'RULE' by `stoploss_first`, None when
+            the exit bar was not ambiguous) and 'PNL'.
+        """
+        pairs = np.asarray(pairs, dtype=float).reshape(-1, 2)
+        shape = (len(self.trades), len(pairs))
+        exit_code = np.zeros(shape, dtype=np.int8)
+        exit_price = np.full(shape, np.nan)
+        exit_time = np.full(shape, None, dtype=object)
+        exit_resolution = np.full(shape, None, dtype=object)
+        pnl = np.full(shape, np.nan)
+
+        for position, trade in enumerate(self.trades):
+            entry_price = trade["temp_entry_price"]
+            stoploss = entry_price * pairs[:, 0]
+            target = entry_price * pairs[:, 1]
+            bars = len(self.times[position])
+            # First bar reaching each level; `bars` when it is never reached
+            stop_index = np.searchsorted(self.running_high[position], stoploss, side="left")
+            target_index = np.searchsorted(-self.running_low[position], -target, side="left")
+
+            first_index = np.minimum(stop_index, target_index)
+            hit = first_index < bars
+            # Pairs whose first hit bar reaches both levels go to the resolver, then to the rule
+            tie = hit & (stop_index == target_index)
+            stop_first = (stop_index < target_index) | (tie & self.stoploss_first)
+            resolution = np.where(tie, "RULE", None).astype(object)
+            if self.resolver is not None:
+                for pair in np.flatnonzero(tie):
+                    resolved = self.resolver.resolve(
+                        trade["stock_name"],
+                        trade["tr_date"],
+                        trade["strike_price"],
+                        trade["otype"],
+                        self.times[position][first_index[pair]],
+                        target[pair],
+                        stoploss[pair],
+                    )
+                    if resolved is not None:
+                        stop_first[pair] = resolved == "STOPLOSS"
+                        resolution[pair] = "FINE"
+            code = np.where(hit, np.where(stop_first, 2, 1), 0)
+            price = np.where(stop_first, stoploss, target)
+            times = np.full(len(pairs), None, dtype=object)
+            times[hit] = self.times[position][first_index[hit]]
+            if self.sqoff_close[position] is not None:
+                code = np.where(hit, code, 3)
+                price = np.where(hit, price, self.sqoff_close[position])
+                times = np.where(hit, times, self.squareoff_time)
+            price = np.where(code > 0, price, np.nan)
+
+            exit_code[position] = code
+            exit_price[position] = price
+            exit_time[position] = times
+            exit_resolution[position] = resolution
+            if trade["lotsize"] is not None:
+                pnl[position] = (entry_price - price) * trade["lotsize"]
+
+        return {
+            "pairs": pairs,
+            "exit_code": exit_code,
+            "exit_price": exit_price,
+            "exit_time": exit_time,
+            "exit_resolution": exit_resolution,
+            "PNL": pnl,
+        }
+
+    def summary(self, cube):
+        """
+        Aggregate a result cube per pair.
+
+        Parameters:
+            cube (dict): Result of `evaluate`.
+
+        Returns:
+            pd.DataFrame: One row per pair with its trades, winners, total and
+            mean PNL, the number of exits of every type and the number of
+            exits on a bar reaching both levels.
+        """
+        trades = (cube["exit_code"] > 0).sum(axis=0)
+        total_pnl = np.nansum(cube["PNL"], axis=0)
+        frame = pd.DataFrame({
+            "stoploss_value": cube["pairs"][:, 0],
+            "target_value": cube["pairs"][:, 1],
+            "trades": trades,
+            "winners": (cube["PNL"] > 0).sum(axis=0),
+            "total_pnl": total_pnl,
+            "mean_pnl": total_pnl / np.maximum(trades, 1),
+        })
+        for code, name in enumerate(EXIT_CODES[1:], start=1):
+            frame[name.lower()] = (cube["exit_code"] == code).sum(axis=0)
+        frame["ambiguous"] = pd.notna(cube["exit_resolution"]).sum(axis=0)
+        return frame
+
+
+def add_day(grid, strategy, day, lot_size):
+    """
+    Add the first entry of every leg of a strategy on one day to a grid.
+
+    Parameters:
+        grid (ExitGrid): The grid of the strategy.
+        strategy (Strategy): The strategy choosing the strikes and entries.
+        day (DayBars): The day.
+        lot_size (float): Lot size of the day, or None.
+    """
+    for otype in strategy.otypes:
+        selected = strategy.select_strike(day, otype)
+        if selected is None:
+            continue
+        strike_price, reference_price = selected
+        series = day.series(otype, strike_price)
+        entry = strategy.find_entry(day, series, reference_price, None)
+        if entry is None:
+            continue
+        entry_time, entry_price = entry
+        grid.add(
+            {
+                "tr_date": day.tr_date,
+                "stock_name": day.stock_name,
+                "strike_price": strike_price,
+                "otype": otype,
+                "entry_time": entry_time,
+                "temp_entry_price": entry_price,
+                "lotsize": lot_size,
+            },
+            series,
+            entry_time,
+        )
+
+
+def build_grids(strategies, stock_name, start_date, end_date, lot_sizes, chunk_days=20,
+                fno_table="fnoieod_banknifty", bar_store=None):
+    """
+    Fetch a date range once, chunk by chunk as `strategy_engine.run_strategies`
+    does, and collect the entries of every strategy.
+
+    Parameters:
+        strategies (list): `Strategy` instances (batched strategies are skipped).
+        stock_name (str): The underlying.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        lot_sizes (dict): Trading date -> lot size.
+        chunk_days (int, optional): Calendar days fetched per query.
+        fno_table (str, optional): Option bar table of the underlying.
+        bar_store (BarStore, optional): Reads the bars from this store instead
+            of the database.
+
+    Returns:
+        dict: Strategy name -> `ExitGrid`.
+    """
+    strategies = [strategy for strategy in strategies if not getattr(strategy, "batched", False)]
+    grids = {
+        strategy.name: ExitGrid(strategy.squareoff_time, strategy.stoploss_first, strategy.resolver)
+        for strategy in strategies
+    }
+    first_time = min(strategy.entry_time for strategy in strategies)
+    last_time = max(strategy.squareoff_time for strategy in strategies)
+    for chunk_start, chunk_end in chunk_ranges(start_date, end_date, chunk_days):
+        for day in load_days(stock_name, chunk_start, chunk_end, first_time, last_time, fno_table, bar_store):
+            for strategy in strategies:
+                add_day(grids[strategy.name], strategy, day, lot_sizes.get(day.tr_date))
+    return grids
+
+
+if __name__ == "__main__":
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    configure_shards(config)
+    START_DATE = config.get("params", "start_date")
+    END_DATE = config.get("params", "end_date")
+    PAIRS = json.loads(config.get("params", "stoploss_target_combo"))
+    STOCK_NAME = config.get("params", "stock_name").strip('"').upper()
+    UNDERLYING = parse_underlyings(config)[STOCK_NAME]
+    BAR_STORE = None
+    if config.getboolean("bar_store", "enabled", fallback=False):
+        BAR_STORE = open_store(config.get("bar_store", "directory").format(stock=STOCK_NAME))
+
+    grids = build_grids(
+        strategies_from_config(config),
+        STOCK_NAME,
+        START_DATE,
+        END_DATE,
+        read_lot_sizes(UNDERLYING["lot_size_column"]),
+        config.getint("memory", "max_chunk_days", fallback=20),
+        UNDERLYING["fno_table"],
+        BAR_STORE,
+    )
+    for name, grid in grids.items():
+        summary = grid.summary(grid.evaluate(PAIRS))
+        summary.to_csv(f"{name}_exit_grid_{START_DATE}_{END_DATE}.csv", index=False)
+        print(name)
+        print(summary)
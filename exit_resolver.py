@@ -0,0 +1,140 @@
+"""
+Exit Ambiguity Resolver
+
+A minute bar whose low reaches the target and whose high reaches the stoploss
+does not tell which of the two happened first; the scripts settle it by a
+fixed rule (TARGET in s0001_v3/s2_v1_db, STOPLOSS in s0002_v2). The strategy
+engine flags those bars and asks the resolver instead:
+
+- the finer-grained bars of only that contract and that minute are fetched,
+  on first use, from the fine bar table of the underlying,
+- the first fine bar reaching one level alone decides the exit,
+- everything fetched is cached by (stock, date, strike, option type, minute),
+  so a bar shared by several strategies or parameter sets is fetched once,
+- when the fine bars are missing or still touch both levels, the strategy's
+  own rule decides, as before.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import threading
+from market_data import fetch_fine_bars
+
+# Fine bar table of an underlying; '{stock}' is the lower-case underlying
+FINE_TABLE_PATTERN = "fnosec_{stock}"
+
+
+class AmbiguityResolver:
+    """
+    Resolves minute bars touching both the target and the stoploss with
+    lazily fetched, cached finer-grained bars.
+
+    A resolver is copied into every worker process it is sent to; each copy
+    keeps its own cache and counters.
+
+    Attributes:
+        fine_table_pattern (str): Name of the fine bar table, with a '{stock}'
+            placeholder.
+        cache (dict): (stock, date, strike, otype, minute) -> fine bars, or
+            None when there were none.
+        unavailable (set): Fine bar tables that could not be queried.
+        stats (dict): Counters of ambiguous bars, fetches, cache hits and
+            bars resolved or left to the rule.
+    """
+
+    def __init__(self, fine_table_pattern=FINE_TABLE_PATTERN):
+        self.fine_table_pattern = fine_table_pattern
+        self.cache = {}
+        self.unavailable = set()
+        self.stats = {"ambiguous": 0, "fetched": 0, "cache_hits": 0, "resolved": 0, "unresolved": 0}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def fine_bars(self, stock_name, tr_date, strike_price, otype, bar_time):
+        """
+        Get the fine bars of one contract inside the minute of a minute bar.
+
+        A minute bar stamped 'HH:MM:59' covers 'HH:MM:00' to 'HH:MM:59'.
+
+        Returns:
+            pd.DataFrame or None: The fine bars, or None when there are none.
+        """
+        fine_table = self.fine_table_pattern.format(stock=str(stock_name).lower())
+        minute = bar_time[:5]
+        key = (stock_name, tr_date, strike_price, otype, minute)
+        with self.lock:
+            if key in self.cache:
+                self.stats["cache_hits"] += 1
+                return self.cache[key]
+            if fine_table in self.unavailable:
+                return None
+        try:
+            bars = fetch_fine_bars(
+                fine_table, stock_name, tr_date, strike_price, otype, f"{minute}:00", f"{minute}:59"
+            )
+        except Exception as e:
+            print(f"Fine bars unavailable in {fine_table}: {e}")
+            with self.lock:
+                self.unavailable.add(fine_table)
+            return None
+        bars = None if bars.empty else bars
+        with self.lock:
+            self.stats["fetched"] += 1
+            self.cache[key] = bars
+        return bars
+
+    def resolve(self, stock_name, tr_date, strike_price, otype, bar_time, target, stoploss):
+        """
+        Decide whether the target or the stoploss of a short position was
+        reached first inside an ambiguous minute bar.
+
+        Parameters:
+            stock_name (str): The underlying.
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            strike_price (float): Strike of the contract.
+            otype (str): 'CE' or 'PE'.
+            bar_time (str): Time of the ambiguous minute bar ('HH:MM:SS').
+            target (float): Target price (reached when the low is at or below it).
+            stoploss (float): Stoploss price (reached when the high is at or above it).
+
+        Returns:
+            str or None: 'TARGET' or 'STOPLOSS', or None when the fine bars
+            cannot tell.
+        """
+        bars = self.fine_bars(stock_name, tr_date, strike_price, otype, bar_time)
+        exit_type = None
+        if bars is not None:
+            hit_target = (bars["tr_low"] <= target).to_numpy()
+            hit_stoploss = (bars["tr_high"] >= stoploss).to_numpy()
+            for target_hit, stoploss_hit in zip(hit_target, hit_stoploss):
+                if target_hit or stoploss_hit:
+                    if target_hit != stoploss_hit:
+                        exit_type = "TARGET" if target_hit else "STOPLOSS"
+                    break
+        with self.lock:
+            self.stats["ambiguous"] += 1
+            self.stats["resolved" if exit_type else "unresolved"] += 1
+        return exit_type
+
+
+def configure_resolver(config):
+    """
+    Create a resolver from the [ambiguity] section of a config.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        AmbiguityResolver or None: None when the resolver is disabled.
+    """
+    if not config.getboolean("ambiguity", "enabled", fallback=False):
+        return None
+    return AmbiguityResolver(config.get("ambiguity", "fine_table", fallback=FINE_TABLE_PATTERN))
@@ -0,0 +1,111 @@
+"""
+Exit Rules
+
+Exit families of the strategy engine beyond the fixed target/stoploss
+multiples and the square-off bar, all evaluated on whole bar arrays with
+running minimum/maximum and cumulative operations instead of per-bar loops:
+
+- trailing stop: the stop of a short option follows its running low, at
+  `trail_value` times the lowest low seen before the bar, but never above
+  the fixed stoploss ('TRAILING'),
+- time stop: a trade still open `time_stop_minutes` after its entry is
+  closed at the close of that bar ('TIMESTOP'),
+- MTM stop: all legs of a strategy are closed at the close of the first
+  minute their combined MTM for the day falls to `-mtm_stop` or rises to
+  `mtm_target`, and no leg is entered after it ('MTMSTOP').
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+import numpy as np
+from mtm import close_matrix, day_mtm
+
+
+def trailing_stop_levels(low, entry_price, stoploss, trail_value):
+    """
+    Stop level of a short option at every bar of its exit window.
+
+    The level of a bar only depends on the bars before it, so a bar cannot
+    move its own stop.
+
+    Parameters:
+        low (np.ndarray): Lows of the bars after the entry.
+        entry_price (float): Entry price of the trade.
+        stoploss (float): The fixed stoploss price.
+        trail_value (float): Stop as a multiple of the running low.
+
+    Returns:
+        np.ndarray: The stop level of every bar.
+    """
+    running_low = np.minimum.accumulate(np.concatenate(([entry_price], low[:-1])))
+    return np.minimum(stoploss, running_low * trail_value)
+
+
+def time_stop_position(times, entry_time, minutes):
+    """
+    Position of the first bar at least `minutes` after the entry.
+
+    Parameters:
+        times (np.ndarray): 'HH:MM:SS' times of the bars after the entry.
+        entry_time (str): Entry time of the trade ('HH:MM:SS').
+        minutes (int): Minutes the trade may stay open.
+
+    Returns:
+        int or None: The position, or None when no such bar exists.
+    """
+    entry = datetime.datetime.strptime(entry_time, "%H:%M:%S")
+    stop_time = (entry + datetime.timedelta(minutes=minutes)).strftime("%H:%M:%S")
+    position = int(np.searchsorted(times, stop_time, side="left"))
+    return position if position < len(times) else None
+
+
+def apply_mtm_stop(day, trades, mtm_stop=None, mtm_target=None):
+    """
+    Close every leg of a strategy at the first minute its combined MTM for
+    the day reaches the stop or the target.
+
+    Parameters:
+        day (DayBars): The day.
+        trades (list): The strategy's trades of the day, as produced by
+            `strategy_engine.run_day`.
+        mtm_stop (float, optional): Loss of the day that closes all legs.
+        mtm_target (float, optional): Profit of the day that closes all legs.
+
+    Returns:
+        list: The trades, with the legs open at that minute closed as
+        'MTMSTOP' and the legs entered after it removed.
+    """
+    curves = day_mtm(day, {"strategy": trades})
+    if curves is None:
+        return trades
+    portfolio = curves["portfolio"][0]
+    breached = np.zeros(len(portfolio), dtype=bool)
+    if mtm_stop is not None:
+        breached |= portfolio <= -mtm_stop
+    if mtm_target is not None:
+        breached |= portfolio >= mtm_target
+    if not breached.any():
+        return trades
+
+    grid = curves["times"]
+    minute = int(np.argmax(breached))
+    stop_time = grid[minute]
+    closes, row_of = close_matrix(day, grid)
+    kept = []
+    for trade in trades:
+        if trade["entry_time"] > stop_time:
+            continue
+        if trade["exit_time"] is None or trade["exit_time"] > stop_time:
+            exit_price = float(closes[row_of[(trade["otype"], trade["strike_price"])], minute])
+            lot_size = trade["lotsize"]
+            trade = dict(
+                trade,
+                exit_type="MTMSTOP",
+                exit_price=exit_price,
+                exit_time=stop_time,
+                exit_resolution=None,
+                PNL=(trade["temp_entry_price"] - exit_price) * lot_size if lot_size is not None else None,
+            )
+        kept.append(trade)
+    return kept
@@ -1,9 +1,39 @@
-from datetime import datetime
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import *
-from io import BytesIO
-from sqlalchemy import create_engine, MetaData, Table, select
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, create_engine, MetaData, or_, Table, select
 from sqlalchemy.orm import sessionmaker
-import pandas as pd
+from backtest_runner import STRATEGIES, check_underlying, execute_backtest, resolve_params
+from data_export import iter_arrow, iter_ndjson, MEDIA_TYPES, pa
+from jobs import JobRegistry
+from response_cache import ResponseCache, etag_matches
+from rollups import (
+    PNL_UNITS,
+    apply_rollup_deltas,
+    combine_rollup_deltas,
+    compute_replaced_deltas,
+    compute_rollup_deltas,
+    define_rollup_table,
+    ensure_rollup_table,
+    query_exit_type_mix,
+    query_pnl,
+    query_strategy_totals,
+    query_win_rate,
+)
+from results_ingest import dedupe_records, prepare_summary_rows, read_summary_sheet, upsert_summary
+from results_sink import replace_results
 
 
 # Replace these values with your actual database connection details
@@ -13,6 +43,20 @@ HOST = 'localhost'
 PORT = '3306'
 DATABASE = 'backtest'
 TABLE_NAME = 'strategy_1'
+# Number of uploads parsed and inserted at the same time
+INGEST_WORKERS = 2
+# Number of backtests run at the same time, each in its own worker process,
+# and how often /backtests/{job_id}/events checks a job for progress
+BACKTEST_WORKERS = 2
+JOB_EVENT_INTERVAL_SECONDS = 1
+# How long a finished job stays available at /jobs/{job_id}
+JOB_RETENTION_SECONDS = 3600
+# Rows per JSON page and per streamed batch of /get_data/
+PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 5000
+# Size and lifetime of the in-process /get_data/ response cache
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 300
 
 # SQLAlchemy Setup
 engine = create_engine(f'mysql+pymysql://{USERNAME}:{PASSWORD}@{HOST}/{DATABASE}', echo=True)
@@ -26,93 +70,603 @@ table = Table(
     autoload_with=engine
 )
 
+# Daily rollup behind the /analytics/ endpoints, backfilled from the raw
+# trades the first time it is created or when it predates the PNL_Unit key
+rollup_table = define_rollup_table(metadata)
+ensure_rollup_table(engine, table, rollup_table)
+
 app = FastAPI()
+# Uploads and backtests wait on separate pools, so queued backtests cannot hold up uploads
+JOBS = JobRegistry(
+    pools={"upload": INGEST_WORKERS, "backtest": BACKTEST_WORKERS},
+    retention_seconds=JOB_RETENTION_SECONDS,
+)
+# Backtest workers are spawned, not forked, so they do not inherit the
+# engine's pooled MySQL connections opened above
+BACKTEST_CONTEXT = multiprocessing.get_context("spawn")
+BACKTEST_POOL = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS, mp_context=BACKTEST_CONTEXT)
+# One manager process serves the progress queues of every backtest for the
+# app's lifetime; it is started by the first backtest
+PROGRESS_MANAGER = None
+PROGRESS_MANAGER_LOCK = threading.Lock()
+CACHE = ResponseCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
 #ur just accepting the file so post method and 
 # next is the url part of it http://127.0.0.1:8000/uploadfile/
 # @app.post("/uploadfile/")
 # async def create_upload_file(file: UploadFile):
 #     return {"filename": file.filename}
+def ingest_upload_job(report, upload_path):
+    """
+    Background job that parses an uploaded workbook and upserts its rows.
+
+    Trades are upserted on the natural key (Strategy_Name, Cycle_Id,
+    Entry_Date, CE_PE), so uploading the same or an overlapping workbook again
+    updates the stored trades instead of failing or duplicating them.
+
+    Args:
+        report (callable): Updates the job's status fields.
+        upload_path (str): Path of the temporary copy of the uploaded workbook.
+
+    Returns:
+        dict: The number of rows upserted.
+    """
+    try:
+        print("Reading data from Excel file")
+        records = dedupe_records(prepare_summary_rows(read_summary_sheet(upload_path)))
+        report(rows_total=len(records))
+
+        def insert_progress(rows_done):
+            report(rows_done=rows_done, progress=rows_done / max(len(records), 1))
+
+        print("Upserting data into the database")
+        # Upsert the trades in chunked multi-row statements and update the
+        # analytics rollup, all inside a single transaction; the rollup loses
+        # the trades being replaced and gains the uploaded ones
+        with engine.begin() as connection:
+            rollup_deltas = combine_rollup_deltas(
+                compute_replaced_deltas(connection, table, records),
+                compute_rollup_deltas(records),
+            )
+            inserted_rows = upsert_summary(
+                connection, table, records, progress=insert_progress
+            )
+            apply_rollup_deltas(connection, rollup_table, rollup_deltas)
+        # Drop the cached /get_data/ responses covering the inserted Entry_Dates
+        CACHE.invalidate_dates(
+            record["Entry_Date"] for record in records if record["Entry_Date"] is not None
+        )
+        print(f"{inserted_rows} rows successfully upserted into the database")
+    finally:
+        os.remove(upload_path)
+    return {"rows_inserted": inserted_rows}
+
+
+def save_upload(file):
+    """
+    Copy the spooled upload to a temporary file the background job can read
+    after the request has finished.
+
+    Args:
+        file (UploadFile): The uploaded file.
+
+    Returns:
+        str: Path of the temporary copy.
+    """
+    suffix = os.path.splitext(file.filename or "")[1] or ".xlsx"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as upload_copy:
+        shutil.copyfileobj(file.file, upload_copy)
+    return upload_copy.name
+
+
 @app.post("/uploadfile/")
 async def create_upload_file(file: UploadFile = File(...)):
     """
-    Endpoint to upload an Excel file, read its content, and insert data into the database.
+    Endpoint to upload an Excel file and queue it for insertion into the database.
+
+    The workbook is parsed and inserted by a background job; poll
+    /jobs/{job_id} for its progress.
 
     Args:
         file (UploadFile): The Excel file to be uploaded.
 
     Returns:
-        dict: A dictionary containing the uploaded filename.
+        dict: A dictionary containing the uploaded filename and the job id.
     """
     try:
-        print("Reading data from Excel file")
-        # Read data from Excel file
-        content = await file.read()
-        excel_data = BytesIO(content)
-
-        df = pd.read_excel(excel_data, sheet_name='Summary')
-        print(df)
-
-        print("Inserting data into the database")
-        # Insert data into the database
-        with engine.connect() as connection:
-            for _, row in df.iloc[1:].iterrows():
-                # Convert date strings to 'YYYY-MM-DD' format
-                expiry_date_str=datetime.strptime(row['Expiry_Date'], '%d-%m-%Y').strftime('%Y-%m-%d')
-                entry_date_str = datetime.strptime(row['Entry_Date'], '%d-%m-%Y').strftime('%Y-%m-%d')
-                exit_date_str = datetime.strptime(row['Exit_Date'], '%d-%m-%Y').strftime('%Y-%m-%d')
-                insert_statement = table.insert().values(
-                    Strategy_Name=row['Strategy_Name'],
-                    Expiry_Date=expiry_date_str,
-                    Stock=row['Stock'],
-                    Stock_Name=row['Stock_Name'],
-                    Strike_Price=row['Strike_Price'],
-                    CE_PE=row['CE_PE'],
-                    Trade_Type=row['Trade_Type'],
-                    Entry_Date=entry_date_str,
-                    Entry_Time=row['Entry_Time'],
-                    Entry_Price=row['Entry_Price'],
-                    Exit_Date=exit_date_str,
-                    Exit_Time=row['Exit_Time'],
-                    Exit_Price=row['Exit_Price'],
-                    Cycle_Id=row['Cycle_Id']
-                )
-                connection.execute(insert_statement)
-            connection.commit()
-        print("Data successfully inserted into the database")
+        upload_path = await run_in_threadpool(save_upload, file)
     except Exception as e:
         print(f"Error processing file: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {e}")
 
-    return {"filename": file.filename}
+    job_id = JOBS.submit("upload", ingest_upload_job, upload_path)
+    return {"filename": file.filename, "job_id": job_id}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Endpoint to report the status, progress and row counts of a background job.
+
+    Args:
+        job_id (str): The id returned when the job was queued.
+
+    Returns:
+        dict: The job's status.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found with id: {job_id}")
+    return job
+
+
+def get_progress_manager():
+    """
+    Get the shared manager that serves the backtests' progress queues, starting it on first use.
+
+    Returns:
+        SyncManager: The running manager.
+    """
+    global PROGRESS_MANAGER
+    with PROGRESS_MANAGER_LOCK:
+        if PROGRESS_MANAGER is None:
+            PROGRESS_MANAGER = BACKTEST_CONTEXT.Manager()
+    return PROGRESS_MANAGER
+
+
+def run_backtest_job(report, strategy_id, strategy_name, start_date, end_date, params):
+    """
+    Background job that runs a backtest in a worker process and stores its trades.
+
+    The trades replace those previously stored under the same Strategy_Name in
+    the date range, together with their analytics rollup rows, in a single
+    transaction, so running the same backtest again does not duplicate them.
+
+    Args:
+        report (callable): Updates the job's status fields.
+        strategy_id (str): Key of `backtest_runner.STRATEGIES`.
+        strategy_name (str): Strategy_Name the trades are stored under.
+        start_date (date): First trading date.
+        end_date (date): Last trading date.
+        params (dict): Strategy parameters from `resolve_params`.
+
+    Returns:
+        dict: The number of trades stored.
+    """
+    progress_queue = get_progress_manager().Queue()
+    future = BACKTEST_POOL.submit(
+        execute_backtest,
+        strategy_id,
+        strategy_name,
+        start_date.isoformat(),
+        end_date.isoformat(),
+        params,
+        progress_queue,
+    )
+    while not future.done() or not progress_queue.empty():
+        try:
+            chunks_done, chunk_count = progress_queue.get(timeout=JOB_EVENT_INTERVAL_SECONDS)
+        except queue.Empty:
+            continue
+        report(progress=chunks_done / chunk_count)
+    rows = future.result()
+
+    report(rows_total=len(rows))
+    with engine.begin() as connection:
+        inserted_rows = replace_results(
+            connection,
+            table,
+            rows,
+            strategy_name,
+            start_date,
+            end_date,
+            rollup_table,
+            progress=lambda rows_done: report(rows_done=rows_done),
+        )
+    CACHE.invalidate_dates(
+        start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+    )
+    print(f"{inserted_rows} backtest trades stored as {strategy_name}")
+    return {"strategy_name": strategy_name, "rows_inserted": inserted_rows}
+
+
+@app.post("/backtests/")
+async def create_backtest(
+    strategy_id: str = Body(..., description="Backtest to run, e.g. s0002_v2"),
+    start_date: str = Body(..., description="First trading date, in format DD-MM-YYYY"),
+    end_date: str = Body(..., description="Last trading date, in format DD-MM-YYYY"),
+    strategy_name: Optional[str] = Body(None, description="Strategy_Name to store the trades under"),
+    params: dict = Body({}, description="Overrides of the [params] and [memory] options in config.ini"),
+):
+    """
+    Endpoint to queue a backtest whose trades are written straight into the results table.
+
+    Backtests run in a pool of worker processes, so several can run at the
+    same time. Poll /jobs/{job_id} or stream /backtests/{job_id}/events for
+    the progress.
+
+    Args:
+        strategy_id (str): The backtest to run.
+        start_date (str): First trading date, in the format DD-MM-YYYY.
+        end_date (str): Last trading date, in the format DD-MM-YYYY.
+        strategy_name (str, optional): Strategy_Name of the stored trades;
+            defaults to the strategy id.
+        params (dict, optional): Strategy parameters overriding config.ini.
+
+    Returns:
+        dict: The job id and the Strategy_Name the trades are stored under.
+    """
+    if strategy_id not in STRATEGIES:
+        raise HTTPException(status_code=404, detail=f"Unknown strategy: {strategy_id}")
+    formatted_start_date = parse_date(start_date, "start_date")
+    formatted_end_date = parse_date(end_date, "end_date")
+    if formatted_end_date < formatted_start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date.")
+    try:
+        resolved_params = resolve_params(params)
+        check_underlying(strategy_id, resolved_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    strategy_name = strategy_name or strategy_id
+    job_id = JOBS.submit(
+        "backtest",
+        run_backtest_job,
+        strategy_id,
+        strategy_name,
+        formatted_start_date,
+        formatted_end_date,
+        resolved_params,
+    )
+    return {"job_id": job_id, "strategy_name": strategy_name}
+
+
+async def iter_job_events(job_id):
+    """
+    Yield a server-sent event every time a job's status changes, until it finishes.
+
+    Args:
+        job_id (str): The job to follow.
+
+    Yields:
+        str: One 'data:' event with the job's status as JSON.
+    """
+    last_job = None
+    while True:
+        job = JOBS.get(job_id)
+        if job is None:
+            return
+        if job != last_job:
+            yield f"data: {json.dumps(job, default=str)}\n\n"
+            last_job = job
+        if job["status"] in ("completed", "failed"):
+            return
+        await asyncio.sleep(JOB_EVENT_INTERVAL_SECONDS)
+
+
+@app.get("/backtests/{job_id}/events")
+async def stream_backtest_events(job_id: str):
+    """
+    Endpoint to stream the progress of a background job as server-sent events.
+
+    Args:
+        job_id (str): The id returned when the job was queued.
+
+    Returns:
+        StreamingResponse: A text/event-stream of status updates.
+    """
+    if JOBS.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"No job found with id: {job_id}")
+    return StreamingResponse(iter_job_events(job_id), media_type="text/event-stream")
+
+
+def parse_date(value, name):
+    """
+    Parse a DD-MM-YYYY query parameter.
+
+    Args:
+        value (str): The parameter value.
+        name (str): The parameter name, used in the error message.
+
+    Returns:
+        date: The parsed date.
+    """
+    try:
+        return datetime.strptime(value, '%d-%m-%Y').date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Please use DD-MM-YYYY.")
+
+
+def build_data_query(start_date, end_date, columns, after_date=None, after_id=None, limit=None):
+    """
+    Build the keyset-paginated query behind /get_data/.
+
+    Only the requested columns are selected, followed by Entry_Date and id when
+    they were not requested, because the (Entry_Date, id) keyset needs them.
+
+    Args:
+        start_date (date): First Entry_Date to return.
+        end_date (date): Last Entry_Date to return.
+        columns (list): Names of the columns to return.
+        after_date (date, optional): Entry_Date of the last row already returned.
+        after_id (int, optional): id of the last row already returned.
+        limit (int, optional): Maximum number of rows.
+
+    Returns:
+        Select: The query.
+    """
+    key_columns = [column for column in (table.c.Entry_Date, table.c.id) if column.name not in columns]
+    query = (
+        select(*[table.c[name] for name in columns], *key_columns)
+        .where(table.c.Entry_Date >= start_date, table.c.Entry_Date <= end_date)
+        .order_by(table.c.Entry_Date, table.c.id)
+    )
+    if after_date is not None and after_id is not None:
+        query = query.where(
+            or_(
+                table.c.Entry_Date > after_date,
+                and_(table.c.Entry_Date == after_date, table.c.id > after_id),
+            )
+        )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def stream_data(query, columns, output_format):
+    """
+    Run the query on a server-side cursor and encode rows as they arrive.
+
+    Args:
+        query (Select): The query built by `build_data_query`.
+        columns (list): Names of the columns to emit.
+        output_format (str): 'ndjson' or 'arrow'.
+
+    Yields:
+        bytes: Encoded chunks of the response body.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=STREAM_BATCH_SIZE
+        ).execute(query)
+        batches = result.partitions(STREAM_BATCH_SIZE)
+        if output_format == "arrow":
+            yield from iter_arrow(batches, columns, table)
+        else:
+            yield from iter_ndjson(batches, columns)
 
 
 @app.get("/get_data/")
-async def get_data_by_date(date: str = Query(..., description="Enter date in format DD-MM-YYYY")):
+def get_data_by_date(
+    response: Response,
+    date: str = Query(..., description="Enter date in format DD-MM-YYYY"),
+    end_date: Optional[str] = Query(None, description="Last Entry_Date of a range, in format DD-MM-YYYY"),
+    columns: Optional[str] = Query(None, description="Comma separated column names to return"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of rows to return"),
+    after_date: Optional[str] = Query(None, description="Entry_Date of the last row of the previous page"),
+    after_id: Optional[int] = Query(None, description="id of the last row of the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson|arrow)$", description="json, ndjson or arrow"),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Endpoint to retrieve data from the database based on the given date.
 
+    Rows are ordered by (Entry_Date, id). JSON responses are paginated: pass the
+    returned `next_page` values as after_date/after_id to fetch the next page;
+    one without the other is rejected with 422.
+    The ndjson and arrow formats stream every matching row as the database
+    cursor produces it.
+
+    JSON pages are served from an in-process cache until they expire or an
+    upload inserts rows for one of their Entry_Dates. Each page carries an
+    ETag; a request whose If-None-Match lists it (weak or strong) gets 304 Not
+    Modified.
+
     Args:
         date (str): The date in the format DD-MM-YYYY.
+        end_date (str, optional): Last date of a date range, in the format DD-MM-YYYY.
+        columns (str, optional): Comma separated column names to return.
+        limit (int, optional): Maximum number of rows (page size for JSON).
+        after_date (str, optional): Keyset cursor, Entry_Date of the previous page's last row.
+        after_id (int, optional): Keyset cursor, id of the previous page's last row.
+        format (str, optional): Output format, json (default), ndjson or arrow.
+        if_none_match (str, optional): ETag of the client's cached copy.
 
     Returns:
-        list: A list containing the data retrieved from the database.
+        dict: The requested columns, the page of rows and the cursor of the next page.
     """
-    try:
-        formatted_date = datetime.strptime(date, '%d-%m-%Y').date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Please use DD-MM-YYYY.")
+    formatted_date = parse_date(date, "date")
+    formatted_end_date = parse_date(end_date, "end_date") if end_date else formatted_date
+    formatted_after_date = parse_date(after_date, "after_date") if after_date else None
+    if (after_date is None) != (after_id is None):
+        raise HTTPException(status_code=422, detail="after_date and after_id must be given together.")
+
+    selected_columns = [name.strip() for name in columns.split(",")] if columns else list(table.c.keys())
+    unknown_columns = [name for name in selected_columns if name not in table.c]
+    if unknown_columns:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown_columns)}")
+
+    if format != "json":
+        if format == "arrow" and pa is None:
+            raise HTTPException(status_code=501, detail="Arrow output requires pyarrow to be installed.")
+        query = build_data_query(
+            formatted_date, formatted_end_date, selected_columns, formatted_after_date, after_id, limit
+        )
+        return StreamingResponse(
+            stream_data(query, selected_columns, format), media_type=MEDIA_TYPES[format]
+        )
 
+    page_size = limit or PAGE_SIZE
+    cache_key = CACHE.make_key(
+        date=formatted_date,
+        end_date=formatted_end_date,
+        columns=selected_columns,
+        limit=page_size,
+        after_date=formatted_after_date,
+        after_id=after_id,
+    )
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        etag, payload = cached
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return payload
+
+    # An upload invalidating the cache during the query must keep this page out of it
+    generation = CACHE.generation
     with Session() as db:
         try:
-            query = select(table).where(table.c.Entry_Date == formatted_date)
-            print(f"Query: {query}")
+            query = build_data_query(
+                formatted_date, formatted_end_date, selected_columns, formatted_after_date, after_id, page_size
+            )
             result = db.execute(query).fetchall()
-            print(f"Result: {result}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error executing database query: {e}")
 
     if not result:
         raise HTTPException(status_code=404, detail=f"No data found for date: {formatted_date}")
 
-    return {"data": [list(row) for row in result]}
+    next_page = None
+    if len(result) == page_size:
+        last_row = result[-1]._mapping
+        next_page = {
+            "after_date": last_row["Entry_Date"].strftime('%d-%m-%Y'),
+            "after_id": last_row["id"],
+        }
+
+    payload = jsonable_encoder({
+        "columns": selected_columns,
+        "data": [list(row)[:len(selected_columns)] for row in result],
+        "next_page": next_page,
+    })
+    etag = CACHE.put(cache_key, payload, formatted_date, formatted_end_date, generation)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
 
+
+def parse_optional_date(value, name):
+    """
+    Parse an optional DD-MM-YYYY query parameter.
+
+    Args:
+        value (str or None): The parameter value.
+        name (str): The parameter name, used in the error message.
+
+    Returns:
+        date or None: The parsed date, or None when the parameter is missing.
+    """
+    return parse_date(value, name) if value else None
+
+
+@app.get("/analytics/pnl")
+def get_pnl(
+    period: str = Query("daily", pattern="^(daily|monthly)$", description="daily or monthly"),
+    strategy: Optional[str] = Query(None, description="Restrict to one Strategy_Name"),
+    start_date: Optional[str] = Query(None, description="First Entry_Date, in format DD-MM-YYYY"),
+    end_date: Optional[str] = Query(None, description="Last Entry_Date, in format DD-MM-YYYY"),
+):
+    """
+    Endpoint to report PNL, trade counts and win rate per day or per month.
+
+    Args:
+        period (str, optional): daily (default) or monthly.
+        strategy (str, optional): Restrict to one Strategy_Name.
+        start_date (str, optional): First Entry_Date, in the format DD-MM-YYYY.
+        end_date (str, optional): Last Entry_Date, in the format DD-MM-YYYY.
+
+    Returns:
+        dict: One row per period and PNL unit, and the description of the units.
+    """
+    with engine.connect() as connection:
+        data = query_pnl(
+            connection,
+            rollup_table,
+            period,
+            strategy,
+            parse_optional_date(start_date, "start_date"),
+            parse_optional_date(end_date, "end_date"),
+        )
+    return {"period": period, "pnl_units": PNL_UNITS, "data": data}
+
+
+@app.get("/analytics/win_rate")
+def get_win_rate(
+    strategy: Optional[str] = Query(None, description="Restrict to one Strategy_Name"),
+    start_date: Optional[str] = Query(None, description="First Entry_Date, in format DD-MM-YYYY"),
+    end_date: Optional[str] = Query(None, description="Last Entry_Date, in format DD-MM-YYYY"),
+):
+    """
+    Endpoint to report trade, win and loss counts and the win rate.
+
+    Args:
+        strategy (str, optional): Restrict to one Strategy_Name.
+        start_date (str, optional): First Entry_Date, in the format DD-MM-YYYY.
+        end_date (str, optional): Last Entry_Date, in the format DD-MM-YYYY.
+
+    Returns:
+        dict: Totals over the selected trades, their PNL per unit, and the description of the units.
+    """
+    with engine.connect() as connection:
+        totals = query_win_rate(
+            connection,
+            rollup_table,
+            strategy,
+            parse_optional_date(start_date, "start_date"),
+            parse_optional_date(end_date, "end_date"),
+        )
+    return {**totals, "pnl_units": PNL_UNITS}
+
+
+@app.get("/analytics/strategies")
+def get_strategy_totals(
+    start_date: Optional[str] = Query(None, description="First Entry_Date, in format DD-MM-YYYY"),
+    end_date: Optional[str] = Query(None, description="Last Entry_Date, in format DD-MM-YYYY"),
+):
+    """
+    Endpoint to report totals, win rate and profit factor per Strategy_Name.
+
+    Args:
+        start_date (str, optional): First Entry_Date, in the format DD-MM-YYYY.
+        end_date (str, optional): Last Entry_Date, in the format DD-MM-YYYY.
+
+    Returns:
+        dict: One row per strategy and PNL unit, and the description of the units.
+    """
+    with engine.connect() as connection:
+        data = query_strategy_totals(
+            connection,
+            rollup_table,
+            parse_optional_date(start_date, "start_date"),
+            parse_optional_date(end_date, "end_date"),
+        )
+    return {"pnl_units": PNL_UNITS, "data": data}
+
+
+@app.get("/analytics/exit_types")
+def get_exit_type_mix(
+    strategy: Optional[str] = Query(None, description="Restrict to one Strategy_Name"),
+    start_date: Optional[str] = Query(None, description="First Entry_Date, in format DD-MM-YYYY"),
+    end_date: Optional[str] = Query(None, description="Last Entry_Date, in format DD-MM-YYYY"),
+):
+    """
+    Endpoint to report the mix of exit types per option type.
+
+    Args:
+        strategy (str, optional): Restrict to one Strategy_Name.
+        start_date (str, optional): First Entry_Date, in the format DD-MM-YYYY.
+        end_date (str, optional): Last Entry_Date, in the format DD-MM-YYYY.
+
+    Returns:
+        dict: One row per (Exit_Type, CE_PE, PNL unit), and the description of the units.
+    """
+    with engine.connect() as connection:
+        data = query_exit_type_mix(
+            connection,
+            rollup_table,
+            strategy,
+            parse_optional_date(start_date, "start_date"),
+            parse_optional_date(end_date, "end_date"),
+        )
+    return {"pnl_units": PNL_UNITS, "data": data}
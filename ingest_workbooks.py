@@ -0,0 +1,203 @@
+"""
+Workbook Ingestion
+
+Command line loader for the 'Summary' sheets of many strategy workbooks at
+once, e.g. every workbook produced by a parameter sweep.
+
+- Inputs are files, directories (every .xlsx inside) or glob patterns.
+- Each workbook is hashed first. Workbooks whose SHA-256 is already recorded in
+  the `ingested_files` table (or that repeat another input) are skipped.
+- The remaining workbooks are parsed in parallel worker processes.
+- Parsed trades are upserted into `strategy_1` on the natural key
+  (Strategy_Name, Cycle_Id, Entry_Date, CE_PE). Re-running the loader, or
+  loading a corrected workbook, updates trades instead of duplicating them.
+- Each workbook is stored in its own transaction together with its
+  `ingested_files` row and its analytics rollup deltas (the trades it replaces
+  are subtracted, its own trades added), so an interrupted run can simply be
+  started again.
+
+Usage:
+    python ingest_workbooks.py results/ "sweeps/s0005_*.xlsx" [--workers 4]
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from sqlalchemy import MetaData, create_engine, select
+from results_ingest import dedupe_records, file_sha256, prepare_summary_rows, read_summary_sheet, upsert_summary
+from rollups import (
+    apply_rollup_deltas,
+    combine_rollup_deltas,
+    compute_replaced_deltas,
+    compute_rollup_deltas,
+    define_rollup_table,
+    ensure_rollup_table,
+)
+from schema import NATURAL_KEY, TABLE_NAME, define_ingested_files_table, define_strategy_table, has_natural_key
+
+# Replace these values with your actual database connection details
+username = 'root'
+password = 'shashank23'
+host = 'localhost'
+port = '3306'
+database = 'backtest'
+
+WORKBOOK_PATTERN = "*.xlsx"
+
+
+def expand_inputs(inputs):
+    """
+    Resolve files, directories and glob patterns into workbook paths.
+
+    Parameters:
+        inputs (list): Paths, directories or glob patterns.
+
+    Returns:
+        list: Sorted, de-duplicated workbook paths. Excel lock files ('~$...')
+        are ignored.
+    """
+    paths = set()
+    for value in inputs:
+        if os.path.isdir(value):
+            matches = glob.glob(os.path.join(value, WORKBOOK_PATTERN))
+        elif os.path.isfile(value):
+            matches = [value]
+        else:
+            matches = glob.glob(value, recursive=True)
+        paths.update(
+            os.path.abspath(path)
+            for path in matches
+            if os.path.isfile(path) and not os.path.basename(path).startswith("~$")
+        )
+    return sorted(paths)
+
+
+def parse_workbook(path):
+    """
+    Read and prepare the trades of one workbook. Runs in a worker process.
+
+    Parameters:
+        path (str): Path of the workbook.
+
+    Returns:
+        tuple: The path and its records, as produced by `prepare_summary_rows`,
+        without earlier duplicates of a natural key.
+    """
+    return path, dedupe_records(prepare_summary_rows(read_summary_sheet(path)))
+
+
+def pending_workbooks(engine, ingested_files, paths):
+    """
+    Hash the workbooks and keep those whose content has not been ingested yet.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+        ingested_files (Table): The ingested files table.
+        paths (list): Workbook paths.
+
+    Returns:
+        dict: Content hash -> path of every workbook still to ingest.
+    """
+    hashes = {}
+    for path in paths:
+        hashes.setdefault(file_sha256(path), path)
+    if not hashes:
+        return {}
+    with engine.connect() as connection:
+        seen = set(connection.execute(
+            select(ingested_files.c.file_hash)
+            .where(ingested_files.c.file_hash.in_(list(hashes)))
+        ).scalars())
+    return {file_hash: path for file_hash, path in hashes.items() if file_hash not in seen}
+
+
+def ingest(engine, table, ingested_files, rollup_table, pending, workers):
+    """
+    Parse the pending workbooks in parallel and upsert each one as it is ready.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+        table (Table): The `strategy_1` table.
+        ingested_files (Table): The ingested files table.
+        rollup_table (Table): The analytics rollup table.
+        pending (dict): Content hash -> path, from `pending_workbooks`.
+        workers (int): Number of parser processes.
+
+    Returns:
+        tuple: Number of workbooks ingested, rows upserted and workbooks failed.
+    """
+    ingested_count = 0
+    upserted_rows = 0
+    failed_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(parse_workbook, path): file_hash
+            for file_hash, path in pending.items()
+        }
+        for future in as_completed(futures):
+            file_hash = futures[future]
+            path = pending[file_hash]
+            try:
+                _, records = future.result()
+                with engine.begin() as connection:
+                    rollup_deltas = combine_rollup_deltas(
+                        compute_replaced_deltas(connection, table, records),
+                        compute_rollup_deltas(records),
+                    )
+                    rows = upsert_summary(connection, table, records)
+                    apply_rollup_deltas(connection, rollup_table, rollup_deltas)
+                    connection.execute(ingested_files.insert().values(
+                        file_hash=file_hash,
+                        file_name=os.path.basename(path),
+                        rows_upserted=rows,
+                        ingested_at=datetime.now(),
+                    ))
+            except Exception as e:
+                failed_count += 1
+                print(f"Error in {path}: {e}")
+                continue
+            ingested_count += 1
+            upserted_rows += rows
+            print(f"{os.path.basename(path)}: {rows} rows upserted")
+    return ingested_count, upserted_rows, failed_count
+
+
+def main():
+    """
+    Ingest the workbooks given on the command line.
+    """
+    parser = argparse.ArgumentParser(description="Upsert strategy Summary workbooks into strategy_1")
+    parser.add_argument("inputs", nargs="+", help="Workbook files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parser processes")
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    engine = create_engine(f'mysql+pymysql://{username}:{password}@{host}/{database}')
+    metadata = MetaData()
+    table = define_strategy_table(metadata, TABLE_NAME)
+    ingested_files = define_ingested_files_table(metadata)
+    rollup_table = define_rollup_table(metadata)
+    metadata.create_all(engine, tables=[table, ingested_files])
+    # An existing legacy table is left untouched and has no natural key to upsert on
+    if not has_natural_key(engine, TABLE_NAME):
+        raise SystemExit(
+            f"{TABLE_NAME} has no unique ({', '.join(NATURAL_KEY)}) key; migrate it with "
+            "migrate_strategy_1.py (or --add-natural-key) before loading workbooks"
+        )
+    ensure_rollup_table(engine, table, rollup_table)
+
+    pending = pending_workbooks(engine, ingested_files, paths)
+    print(f"{len(paths)} workbooks found, {len(paths) - len(pending)} already ingested or duplicated")
+    ingested_count, upserted_rows, failed_count = ingest(
+        engine, table, ingested_files, rollup_table, pending, max(args.workers, 1)
+    )
+    print(f"{ingested_count} workbooks ingested, {upserted_rows} rows upserted, {failed_count} failed")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
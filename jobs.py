@@ -0,0 +1,143 @@
+"""
+Background Jobs
+
+A small in-process job registry used by the FastAPI app to run blocking work
+(Excel parsing, bulk inserts) on bounded worker pools instead of the event
+loop. Every submitted job gets an id whose status, progress and row counts can
+be polled while it runs.
+
+Every kind of job can get a pool of its own, so a burst of one kind (e.g.
+long backtests) cannot hold up another (uploads). Finished jobs are kept for
+a retention period and then pruned, so the registry does not grow without
+bound.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobRegistry:
+    """
+    Runs jobs on bounded thread pools and keeps track of their status.
+
+    Attributes:
+        executor (ThreadPoolExecutor): Pool that runs the jobs of the kinds
+            without a pool of their own.
+        executors (dict): Job kind -> ThreadPoolExecutor of that kind.
+        retention_seconds (float): How long a finished job stays queryable.
+        jobs (dict): Job id to job status dictionary.
+    """
+
+    def __init__(self, max_workers=2, pools=None, retention_seconds=3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.executors = {
+            kind: ThreadPoolExecutor(max_workers=workers) for kind, workers in (pools or {}).items()
+        }
+        self.retention_seconds = retention_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queue a job on the worker pool of its kind.
+
+        The job function is called as ``func(report, *args, **kwargs)`` where
+        ``report(**fields)`` updates the job's status fields (e.g. progress,
+        rows_total, rows_done). Its return value is stored as the job result.
+
+        Parameters:
+            kind (str): Type of job, e.g. 'upload'.
+            func (callable): The job function.
+
+        Returns:
+            str: The id of the queued job.
+        """
+        job_id = uuid.uuid4().hex
+        self.prune()
+        with self.lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "progress": 0.0,
+                "rows_total": None,
+                "rows_done": 0,
+                "result": None,
+                "error": None,
+                "created_at": datetime.datetime.now().isoformat(),
+                "finished_at": None,
+            }
+        self.executors.get(kind, self.executor).submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def prune(self):
+        """
+        Forget the jobs that finished more than `retention_seconds` ago.
+
+        Returns:
+            int: Number of jobs pruned.
+        """
+        cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=self.retention_seconds)).isoformat()
+        with self.lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job["finished_at"] is not None and job["finished_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+        return len(expired)
+
+    def update(self, job_id, **fields):
+        """
+        Update the status fields of a job.
+
+        Parameters:
+            job_id (str): The job to update.
+            **fields: Status fields to set.
+        """
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job's status.
+
+        Parameters:
+            job_id (str): The job to look up.
+
+        Returns:
+            dict or None: A copy of the job's status, or None if it is unknown.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _run(self, job_id, func, args, kwargs):
+        self.update(job_id, status="running")
+
+        def report(**fields):
+            self.update(job_id, **fields)
+
+        try:
+            result = func(report, *args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.update(
+                job_id,
+                status="failed",
+                error=str(e),
+                finished_at=datetime.datetime.now().isoformat(),
+            )
+            return
+        self.update(
+            job_id,
+            status="completed",
+            progress=1.0,
+            result=result,
+            finished_at=datetime.datetime.now().isoformat(),
+        )
@@ -0,0 +1,348 @@
+"""
+Market Data
+
+Access to the PostgreSQL market data shared by the backtest scripts and the
+strategy engine:
+
+- `query_db` runs a query through COPY ... TO STDOUT and parses the CSV into a
+  DataFrame, recording time to first byte, transfer and parse time in
+  `db_telemetry.TELEMETRY`. Connections come from a thread-safe pool per
+  database, shared by every thread of the process; a thread waits for a free
+  connection when all of them are in use, and a forked child process starts
+  with pools of its own,
+- `query_shards` runs a query over the yearly option bar databases a date
+  range spans (see `shard_router`), in parallel, and merges the results in
+  time order,
+- `fetch_bars` loads the spot and option bars of a date range in one query
+  each (one per yearly shard for the options), so every strategy run over
+  that range shares the same data,
+- `UNDERLYINGS` maps every underlying onto its option bar table and its
+  lot size column in 'LotSize_Data.csv'.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+import pandas as pd
+from rich.console import Console
+from db_telemetry import TELEMETRY, MeteredFile
+from shard_router import SHARD_ROUTER
+
+console = Console()
+
+DB_HOST = "localhost"
+SPOT_DATABASE = "indices_spot_ieod"
+# Connections kept open per database
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 8
+DB_CREDENTIALS = {"user": "backtestuser", "password": "BaCkTeSt@2019", "port": 5432}
+# Underlying -> option bar table and lot size column
+UNDERLYINGS = {
+    "BANKNIFTY": {"fno_table": "fnoieod_banknifty", "lot_size_column": "BankNifty"},
+}
+
+_pools = {}
+# One slot per connection a pool may open; `getconn` fails instead of waiting
+# once POOL_MAX_CONNECTIONS are out
+_pool_slots = {}
+_pools_lock = threading.Lock()
+# Pools inherited through fork; never used nor closed by the child, as closing
+# them would end the sessions of the parent
+_inherited_pools = []
+
+
+def _reset_pools_after_fork():
+    """Give a forked child process its own pools and lock."""
+    global _pools_lock
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+    _pool_slots.clear()
+    # The parent may have held the lock while forking
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def parse_underlyings(config):
+    """
+    Read the underlyings of the [underlyings] config section on top of the defaults.
+
+    Every option of the section has the form
+    `NAME = option bar table, lot size column`.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        dict: Underlying -> {'fno_table': ..., 'lot_size_column': ...}.
+    """
+    underlyings = dict(UNDERLYINGS)
+    if config.has_section("underlyings"):
+        for name, value in config.items("underlyings"):
+            fno_table, lot_size_column = [part.strip() for part in value.split(",")]
+            underlyings[name.upper()] = {"fno_table": fno_table, "lot_size_column": lot_size_column}
+    return underlyings
+
+
+def get_pool(host, dbname):
+    """
+    Get the connection pool of a database, creating it on first use.
+
+    Parameters:
+        host (str): Host of the PostgreSQL server.
+        dbname (str): The database.
+
+    Returns:
+        ThreadedConnectionPool: The shared pool.
+    """
+    with _pools_lock:
+        if (host, dbname) not in _pools:
+            _pools[(host, dbname)] = ThreadedConnectionPool(
+                POOL_MIN_CONNECTIONS,
+                POOL_MAX_CONNECTIONS,
+                host=host,
+                database=dbname,
+                **DB_CREDENTIALS,
+            )
+            _pool_slots[(host, dbname)] = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+        return _pools[(host, dbname)]
+
+
+def connect(host, dbname):
+    """
+    Open a connection to a database outside of its pool.
+
+    Parameters:
+        host (str): Host of the PostgreSQL server.
+        dbname (str): The database.
+
+    Returns:
+        connection: A new psycopg2 connection; the caller closes it.
+    """
+    return psycopg2.connect(host=host, database=dbname, **DB_CREDENTIALS)
+
+
+@contextmanager
+def pooled_connection(host, dbname):
+    """
+    Borrow a connection of the pool of a database, waiting while all of them are in use.
+
+    Parameters:
+        host (str): Host of the PostgreSQL server.
+        dbname (str): The database.
+
+    Yields:
+        connection: The borrowed psycopg2 connection; it goes back to the
+            pool, or is discarded if it was closed, on exit.
+    """
+    pool = get_pool(host, dbname)
+    slots = _pool_slots[(host, dbname)]
+    slots.acquire()
+    try:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+
+def query_db(dbname, query, verbose=True, host=DB_HOST):
+    """
+    Query a PostgreSQL database and return the results as a Pandas DataFrame.
+
+    Time to first byte, transfer time, bytes, rows and parse time of every
+    call are recorded in `db_telemetry.TELEMETRY`, after the connection went
+    back to the pool.
+
+    Parameters:
+        dbname (str): The name of the PostgreSQL database to connect to.
+        query (str): The SQL query to execute.
+        verbose (bool, optional): If True, print verbose connection and query information. Defaults to True.
+        host (str, optional): Host of the PostgreSQL server.
+
+    Returns:
+        pd.DataFrame: A Pandas DataFrame containing the results of the SQL query.
+    """
+    if verbose:
+        console.log(f"Connecting to [red on black]{dbname}[/]", style="bold green")
+        console.log(f"Query: [magenta]{query}[/]")
+
+    with pooled_connection(host, dbname) as conn:
+        with tempfile.TemporaryFile() as tmpfile:
+            head = True  # Indicate whether to include CSV header
+            # Construct the SQL command for copying data to a CSV file
+            copy_sql = (
+                f"COPY ({query}) TO STDOUT WITH CSV HEADER".format(query=query)
+                if head
+                else f"COPY ({query}) TO STDOUT WITH CSV".format(query=query)
+            )
+            cur = conn.cursor()
+            # Meter the COPY so time to first byte, transfer and parse time can be told apart
+            metered_file = MeteredFile(tmpfile)
+            copy_start = time.perf_counter()
+            cur.copy_expert(copy_sql, metered_file)
+            copy_end = time.perf_counter()
+            tmpfile.seek(0)
+            # Read the CSV data from the temporary file into a Pandas DataFrame
+            db_results = pd.read_csv(tmpfile)
+            first_byte_at = metered_file.first_write_at or copy_end
+            stats = {
+                "first_byte_seconds": first_byte_at - copy_start,
+                "transfer_seconds": copy_end - first_byte_at,
+                "parse_seconds": time.perf_counter() - copy_end,
+                "bytes": metered_file.bytes_written,
+                "rows": len(db_results),
+            }
+        # End the read-only transaction before the connection goes back to the pool
+        conn.rollback()
+    # A slow query's plan is fetched over a connection of its own
+    TELEMETRY.record(dbname, query, stats, connect=lambda: connect(host, dbname))
+
+    # If the database name doesn't start with "fnodata" and verbose is True, print the results
+    if not dbname.startswith("fnodata") and verbose:
+        console.log(db_results)
+
+    return db_results
+
+
+def query_shards(build_query, start_date, end_date, verbose=True, host=DB_HOST):
+    """
+    Run a query over every yearly option bar database a date range spans.
+
+    The shards are queried at the same time, each over its own part of the
+    range, and their results are concatenated in date order, so a query
+    ordered by date and time stays ordered and a multi-year range takes about
+    as long as its slowest shard.
+
+    Parameters:
+        build_query (callable): Called with the first and last date
+            ('YYYY-MM-DD') of a shard; returns the query for that shard.
+        start_date (str or date): First trading date ('YYYY-MM-DD').
+        end_date (str or date): Last trading date ('YYYY-MM-DD').
+        verbose (bool, optional): Passed on to `query_db`.
+        host (str, optional): Host of the PostgreSQL server.
+
+    Returns:
+        pd.DataFrame: The merged results; empty when the range is.
+    """
+    shards = SHARD_ROUTER.split(start_date, end_date)
+    if not shards:
+        return pd.DataFrame()
+    if len(shards) == 1:
+        dbname, shard_start, shard_end = shards[0]
+        return query_db(dbname, build_query(shard_start, shard_end), verbose=verbose, host=host)
+
+    with ThreadPoolExecutor(max_workers=min(len(shards), max(SHARD_ROUTER.max_workers, 1))) as executor:
+        futures = [
+            executor.submit(query_db, dbname, build_query(shard_start, shard_end), verbose, host)
+            for dbname, shard_start, shard_end in shards
+        ]
+        return pd.concat([future.result() for future in futures], ignore_index=True)
+
+
+def fetch_bars(
+    stock_name, start_date, end_date, start_time, end_time, fno_table="fnoieod_banknifty", verbose=False
+):
+    """
+    Fetch the spot and weekly-expiry option bars of a date range and time window.
+
+    Parameters:
+        stock_name (str): The underlying, e.g. 'BANKNIFTY'.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        start_time (str): First bar time ('HH:MM:SS').
+        end_time (str): Last bar time ('HH:MM:SS').
+        fno_table (str, optional): Option bar table of the underlying.
+        verbose (bool, optional): Passed on to `query_db`.
+
+    Returns:
+        tuple: The spot bars and the option bars as DataFrames.
+    """
+    spot_df = query_db(
+        SPOT_DATABASE,
+        f"""SELECT tr_date, tr_time, tr_close, stock_name
+            FROM spot_indices_ieod_gdfl
+            WHERE stock_name='{stock_name}' AND
+            tr_date BETWEEN '{start_date}' AND '{end_date}'
+            AND tr_time BETWEEN '{start_time}' AND '{end_time}'
+            ORDER BY tr_date,tr_time ASC""",
+        verbose=verbose,
+    )
+    fno_df = query_shards(
+        lambda shard_start, shard_end: f"""SELECT tr_date, tr_time, tr_open, tr_high, tr_low,
+        tr_close, stock_name, strike_price, otype FROM {fno_table}
+        WHERE stock_name='{stock_name}' AND
+        tr_date BETWEEN '{shard_start}' AND '{shard_end}'
+        AND tr_time BETWEEN '{start_time}' AND '{end_time}'
+        AND tr_segment=2 AND week_expiry=1
+        ORDER BY tr_date,tr_time ASC""",
+        start_date,
+        end_date,
+        verbose=verbose,
+    )
+    return spot_df, fno_df
+
+
+def fetch_fine_bars(fine_table, stock_name, tr_date, strike_price, otype, start_time, end_time, verbose=False):
+    """
+    Fetch the finer-grained (second or tick) bars of one contract inside one
+    time window of one day, from the yearly shard of that day.
+
+    Parameters:
+        fine_table (str): Table of the fine bars, with the columns of the
+            minute bar tables.
+        stock_name (str): The underlying, e.g. 'BANKNIFTY'.
+        tr_date (str): The trading date ('YYYY-MM-DD').
+        strike_price (float): Strike of the contract.
+        otype (str): 'CE' or 'PE'.
+        start_time (str): First bar time ('HH:MM:SS').
+        end_time (str): Last bar time ('HH:MM:SS').
+        verbose (bool, optional): Passed on to `query_db`.
+
+    Returns:
+        pd.DataFrame: 'tr_time', 'tr_high' and 'tr_low' in time order.
+    """
+    return query_db(
+        SHARD_ROUTER.database_for(tr_date),
+        f"""SELECT tr_time, tr_high, tr_low FROM {fine_table}
+        WHERE stock_name='{stock_name}' AND tr_date='{tr_date}'
+        AND strike_price={strike_price} AND otype='{otype}'
+        AND tr_time BETWEEN '{start_time}' AND '{end_time}'
+        AND tr_segment=2 AND week_expiry=1
+        ORDER BY tr_time ASC""",
+        verbose=verbose,
+    )
+
+
+def trading_days(stock_name, start_date, end_date, verbose=False):
+    """
+    List the trading days of an underlying in a date range.
+
+    Parameters:
+        stock_name (str): The underlying, e.g. 'BANKNIFTY'.
+        start_date (str): First date ('YYYY-MM-DD').
+        end_date (str): Last date ('YYYY-MM-DD').
+        verbose (bool, optional): Passed on to `query_db`.
+
+    Returns:
+        list: The trading dates ('YYYY-MM-DD') with spot bars, in date order.
+    """
+    days = query_db(
+        SPOT_DATABASE,
+        f"""SELECT DISTINCT tr_date FROM spot_indices_ieod_gdfl
+            WHERE stock_name='{stock_name}' AND
+            tr_date BETWEEN '{start_date}' AND '{end_date}'
+            ORDER BY tr_date ASC""",
+        verbose=verbose,
+    )
+    return [str(tr_date) for tr_date in days["tr_date"]] if not days.empty else []
@@ -0,0 +1,130 @@
+"""
+Memory Budget
+
+This module helps the backtest scripts stay inside a configured memory budget.
+It estimates how large a fetched DataFrame will be from its row count and
+schema, splits a date range into chunks that fit the budget, and reports the
+current and the peak resident set size (RSS) of the process.
+
+When a single trading day is over budget on its own, the chunk is marked to be
+fetched one option type at a time, and as soon as the range needs more than one
+chunk the results are streamed to the output file instead of being accumulated.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import os
+import resource
+import sys
+
+# Approximate in-memory size of one value per pandas dtype. Object columns hold
+# a pointer plus a Python object (short str, Decimal), hence the larger figures.
+BYTES_PER_DTYPE = {
+    "int64": 8,
+    "float64": 8,
+    "float32": 4,
+    "bool": 1,
+    "category": 4,
+    "object": 64,
+    "decimal": 112,
+}
+
+# Schema of the columns fetched from fnoieod_banknifty by the s0002 scripts.
+FNO_SCHEMA = {
+    "tr_date": "object",
+    "tr_time": "object",
+    "tr_open": "float64",
+    "tr_high": "float64",
+    "tr_low": "float64",
+    "tr_close": "float64",
+    "stock_name": "object",
+    "strike_price": "float64",
+    "otype": "object",
+}
+
+# Filters, groupby/apply and the per-row lookups keep several copies of the
+# day's frame alive at the same time.
+WORKING_SET_FACTOR = 3
+
+
+def estimate_frame_bytes(row_count, schema):
+    """
+    Estimate the memory footprint of a DataFrame.
+
+    Parameters:
+        row_count (int): Number of rows in the frame.
+        schema (dict): Mapping of column name to dtype name (see `BYTES_PER_DTYPE`).
+
+    Returns:
+        int: Estimated size in bytes, including the row index.
+    """
+    bytes_per_row = 8 + sum(BYTES_PER_DTYPE.get(dtype, 64) for dtype in schema.values())
+    return int(row_count) * bytes_per_row
+
+
+def plan_date_chunks(rows_per_day, schema, budget_bytes, max_chunk_days):
+    """
+    Split the trading days into consecutive chunks that fit the memory budget.
+
+    Parameters:
+        rows_per_day (dict): Ordered mapping of trading date to row count.
+        schema (dict): Schema of the fetched frame.
+        budget_bytes (int): Memory budget for one chunk's working set.
+        max_chunk_days (int): Upper bound on the number of days per chunk.
+
+    Returns:
+        list: Tuples of (start_date, end_date, split_by_otype). `split_by_otype`
+        is True for a single day that is over budget on its own and has to be
+        fetched one option type at a time.
+    """
+    chunks = []
+    chunk_days = []
+    chunk_bytes = 0
+    for tr_date, row_count in rows_per_day.items():
+        day_bytes = estimate_frame_bytes(row_count, schema) * WORKING_SET_FACTOR
+        if chunk_days and (
+            chunk_bytes + day_bytes > budget_bytes or len(chunk_days) >= max_chunk_days
+        ):
+            chunks.append((chunk_days[0], chunk_days[-1], False))
+            chunk_days = []
+            chunk_bytes = 0
+        if day_bytes > budget_bytes:
+            chunks.append((tr_date, tr_date, True))
+            continue
+        chunk_days.append(tr_date)
+        chunk_bytes += day_bytes
+    if chunk_days:
+        chunks.append((chunk_days[0], chunk_days[-1], False))
+    return chunks
+
+
+def peak_rss_mb():
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        float: Peak RSS in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb():
+    """
+    Get the current resident set size of the current process.
+
+    Read from /proc/self/statm; where that is not available, the peak RSS
+    is the closest figure.
+
+    Returns:
+        float: Current RSS in megabytes.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
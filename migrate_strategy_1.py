@@ -0,0 +1,279 @@
+"""
+strategy_1 Migration
+
+This script converts the legacy `strategy_1` table (String(255) times and
+enums, DATETIME dates, no secondary indexes) into the typed, indexed and
+partitioned layout defined in 'schema.py'.
+
+Rows are copied in primary-key batches into a staging table, one transaction
+per batch, so the copy can be stopped and resumed at any time. Once every row
+is copied both tables are write-locked, the rows written to the legacy table
+in the meantime are copied, and the staging table is swapped in with a single
+atomic RENAME before the locks are released; the legacy table is kept as
+`strategy_1_legacy`.
+
+The legacy table can hold the same trade more than once (re-running a
+loader inserted it again), so rows are upserted on the natural key of
+'schema.py': the trade keeps the id of its first copy and the values of its
+last one.
+
+Legacy rows without a Cycle_Id were never deduplicated, since MySQL does not
+compare NULLs in a unique key, so each one is kept under a Cycle_Id derived
+from its legacy id ('legacy-<id>').
+
+Tables that are already typed only need their Exit_Type ENUM extended when
+new exit types are added to 'schema.py', which `--extend-exit-types` does in
+place. Tables typed before the natural key existed get it with
+`--add-natural-key`, which first deletes every duplicate but the one with the
+highest id. Tables typed while Cycle_Id was still nullable are made NOT NULL
+with `--require-cycle-id` (which `--add-natural-key` also does).
+
+Usage:
+    python migrate_strategy_1.py [--batch-size 20000] [--no-swap]
+    python migrate_strategy_1.py --extend-exit-types
+    python migrate_strategy_1.py --add-natural-key
+    python migrate_strategy_1.py --require-cycle-id
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import argparse
+import pandas as pd
+from sqlalchemy import MetaData, Table, create_engine, func, select, text
+from results_ingest import dedupe_records, upsert_summary
+from schema import EXIT_TYPES, NATURAL_KEY, TABLE_NAME, coerce_to_schema, define_strategy_table
+
+# Replace these values with your actual database connection details
+username = 'root'
+password = 'shashank23'
+host = 'localhost'
+port = '3306'
+database = 'backtest'
+
+STAGING_TABLE_NAME = f"{TABLE_NAME}_typed"
+LEGACY_TABLE_NAME = f"{TABLE_NAME}_legacy"
+
+
+def copy_batch(connection, legacy_table, typed_table, last_id, batch_size):
+    """
+    Copy the next legacy rows after an id into the typed table.
+
+    Rows without an Entry_Date cannot be stored (it is part of the primary key
+    and the partitioning key) and are skipped. Rows without a Cycle_Id get
+    'legacy-<id>'. Rows are upserted on the natural key, so a duplicate trade
+    replaces the copy of it stored earlier, and a repeated batch is harmless.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection; the caller commits.
+        legacy_table (Table): The reflected legacy table.
+        typed_table (Table): The typed staging table.
+        last_id (int): Highest legacy id already copied.
+        batch_size (int): Rows read at most.
+
+    Returns:
+        tuple: Last id read, rows copied and rows skipped; None when there are
+        no rows after `last_id`.
+    """
+    rows = connection.execute(
+        select(legacy_table)
+        .where(legacy_table.c.id > last_id)
+        .order_by(legacy_table.c.id)
+        .limit(batch_size)
+    ).mappings().all()
+    if not rows:
+        return None
+    typed_columns = [column.name for column in typed_table.columns]
+    batch = pd.DataFrame(rows)
+    cycle_ids = batch["Cycle_Id"] if "Cycle_Id" in batch.columns else pd.Series(None, index=batch.index)
+    batch["Cycle_Id"] = cycle_ids.astype(object).where(cycle_ids.notna(), "legacy-" + batch["id"].astype(str))
+    batch = coerce_to_schema(batch)
+    batch = batch.reindex(columns=[name for name in typed_columns if name in batch.columns])
+    valid = batch["Entry_Date"].notna()
+    if valid.any():
+        upsert_summary(connection, typed_table, dedupe_records(batch[valid].to_dict("records")))
+    return rows[-1]["id"], int(valid.sum()), int((~valid).sum())
+
+
+def copy_batches(engine, legacy_table, typed_table, batch_size):
+    """
+    Copy the legacy rows into the typed table in id order, one transaction per batch.
+
+    The copy resumes after the highest id already present in the typed table.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+        legacy_table (Table): The reflected legacy table.
+        typed_table (Table): The typed staging table.
+        batch_size (int): Rows copied per transaction.
+
+    Returns:
+        tuple: Number of rows copied, number of rows skipped and the last id read.
+    """
+    with engine.connect() as connection:
+        last_id = connection.execute(select(func.max(typed_table.c.id))).scalar() or 0
+
+    copied_rows = 0
+    skipped_rows = 0
+    while True:
+        with engine.begin() as connection:
+            copied = copy_batch(connection, legacy_table, typed_table, last_id, batch_size)
+        if copied is None:
+            break
+        last_id, batch_copied, batch_skipped = copied
+        copied_rows += batch_copied
+        skipped_rows += batch_skipped
+        print(f"Copied up to id {last_id}: {copied_rows} rows copied, {skipped_rows} skipped")
+    return copied_rows, skipped_rows, last_id
+
+
+def swap_tables(engine, legacy_table, typed_table, last_id, batch_size):
+    """
+    Copy the legacy rows written since the bulk copy and swap the typed table in.
+
+    Both tables stay write-locked from the catch-up copy until the RENAME, so
+    no row written by a loader in between is left behind in the legacy table.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+        legacy_table (Table): The reflected legacy table.
+        typed_table (Table): The typed staging table.
+        last_id (int): Highest legacy id the bulk copy read.
+        batch_size (int): Rows copied per statement.
+
+    Returns:
+        tuple: Number of rows copied and number of rows skipped by the catch-up.
+    """
+    copied_rows = 0
+    skipped_rows = 0
+    with engine.connect() as connection:
+        connection.execute(text(f"LOCK TABLES {TABLE_NAME} WRITE, {STAGING_TABLE_NAME} WRITE"))
+        try:
+            while True:
+                copied = copy_batch(connection, legacy_table, typed_table, last_id, batch_size)
+                # COMMIT keeps the table locks
+                connection.commit()
+                if copied is None:
+                    break
+                last_id, batch_copied, batch_skipped = copied
+                copied_rows += batch_copied
+                skipped_rows += batch_skipped
+            connection.execute(text(
+                f"RENAME TABLE {TABLE_NAME} TO {LEGACY_TABLE_NAME}, "
+                f"{STAGING_TABLE_NAME} TO {TABLE_NAME}"
+            ))
+        finally:
+            connection.execute(text("UNLOCK TABLES"))
+    return copied_rows, skipped_rows
+
+
+def extend_exit_types(engine):
+    """
+    Allow every exit type of `schema.EXIT_TYPES` in the typed table.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+    """
+    allowed = ", ".join(f"'{exit_type}'" for exit_type in EXIT_TYPES)
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} MODIFY Exit_Type ENUM({allowed}) NULL"))
+
+
+def require_cycle_id(engine):
+    """
+    Make Cycle_Id NOT NULL in a typed table created while it was nullable.
+
+    Rows without a Cycle_Id get 'legacy-<id>', as in `copy_batch`.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+
+    Returns:
+        int: Number of rows given a Cycle_Id.
+    """
+    with engine.begin() as connection:
+        filled = connection.execute(text(
+            f"UPDATE {TABLE_NAME} SET Cycle_Id = CONCAT('legacy-', id) WHERE Cycle_Id IS NULL"
+        )).rowcount
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} MODIFY Cycle_Id VARCHAR(64) NOT NULL"))
+    return filled
+
+
+def add_natural_key(engine):
+    """
+    Add the unique natural key to a typed table that was created without it.
+
+    Cycle_Id is made NOT NULL first with `require_cycle_id`. Every duplicate
+    of a trade except the one with the highest id is then deleted, in the same
+    transaction as the new key, as the upserting copy would have done.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+
+    Returns:
+        int: Number of duplicate rows deleted.
+    """
+    require_cycle_id(engine)
+    matches = " AND ".join(f"older.{name} = newer.{name}" for name in NATURAL_KEY)
+    with engine.begin() as connection:
+        deleted = connection.execute(text(
+            f"DELETE older FROM {TABLE_NAME} older JOIN {TABLE_NAME} newer "
+            f"ON {matches} AND older.id < newer.id"
+        )).rowcount
+        connection.execute(text(
+            f"ALTER TABLE {TABLE_NAME} ADD CONSTRAINT uq_{TABLE_NAME}_natural_key "
+            f"UNIQUE ({', '.join(NATURAL_KEY)})"
+        ))
+    return deleted
+
+
+def main():
+    """
+    Migrate `strategy_1` to the typed schema and swap it in.
+    """
+    parser = argparse.ArgumentParser(description="Migrate strategy_1 to the typed, partitioned schema")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Rows copied per transaction")
+    parser.add_argument("--no-swap", action="store_true", help="Copy the rows but keep the legacy table in place")
+    parser.add_argument(
+        "--extend-exit-types", action="store_true", help="Only extend Exit_Type of the typed table to schema.EXIT_TYPES"
+    )
+    parser.add_argument(
+        "--add-natural-key", action="store_true", help="Only dedupe the typed table and add its unique natural key"
+    )
+    parser.add_argument(
+        "--require-cycle-id", action="store_true", help="Only fill the missing Cycle_Ids and make it NOT NULL"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(f'mysql+pymysql://{username}:{password}@{host}/{database}')
+    if args.extend_exit_types:
+        extend_exit_types(engine)
+        print(f"{TABLE_NAME}.Exit_Type now allows {', '.join(EXIT_TYPES)}")
+        engine.dispose()
+        return
+    if args.require_cycle_id:
+        filled = require_cycle_id(engine)
+        print(f"{filled} rows given a Cycle_Id; {TABLE_NAME}.Cycle_Id is now NOT NULL")
+        engine.dispose()
+        return
+    if args.add_natural_key:
+        deleted = add_natural_key(engine)
+        print(f"{deleted} duplicate rows deleted; {TABLE_NAME} now has a unique ({', '.join(NATURAL_KEY)})")
+        engine.dispose()
+        return
+    legacy_table = Table(TABLE_NAME, MetaData(), autoload_with=engine)
+    metadata = MetaData()
+    typed_table = define_strategy_table(metadata, STAGING_TABLE_NAME)
+    metadata.create_all(engine)
+
+    copied_rows, skipped_rows, last_id = copy_batches(engine, legacy_table, typed_table, args.batch_size)
+    print(f"Copy finished: {copied_rows} rows copied, {skipped_rows} rows without Entry_Date skipped")
+
+    if not args.no_swap:
+        copied_rows, skipped_rows = swap_tables(engine, legacy_table, typed_table, last_id, args.batch_size)
+        print(f"Catch-up under lock: {copied_rows} rows copied, {skipped_rows} rows without Entry_Date skipped")
+        print(f"{STAGING_TABLE_NAME} is now {TABLE_NAME}; the old table is kept as {LEGACY_TABLE_NAME}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
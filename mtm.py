@@ -0,0 +1,249 @@
+"""
+Mark-to-Market Curves
+
+Per-minute mark-to-market of every leg of a backtest, computed from the
+trades of a day and the day's bar index (`strategy_engine.DayBars`):
+
+- the closes of every contract of the day are laid out once as a
+  (contract x minute) float32 matrix on the day's minute grid, with minutes
+  without a trade carried forward from the last close,
+- the legs pick their rows out of that matrix and their MTM is computed for
+  all legs and all minutes at once by broadcasting the entry prices, lot
+  sizes and open/closed masks, with no loop over minutes or rows,
+- a leg is marked from its entry bar to its exit bar, where the realized PNL
+  replaces the close; the per-day portfolio MTM of a strategy is the sum of
+  its open legs' MTM and its closed legs' realized PNL,
+- the maximum adverse and favourable excursion of every leg and the intraday
+  drawdown of every portfolio curve are derived from the same arrays.
+
+`MTMWriter` appends the curves day by day to raw float32 files with a CSV
+index, so a long range is never held in memory; `read_curves` maps them
+back without loading them.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import os
+import numpy as np
+import pandas as pd
+
+MTM_DTYPE = np.float32
+LEG_CURVES_FILE = "legs.f32"
+LEG_INDEX_FILE = "legs_index.csv"
+PORTFOLIO_CURVES_FILE = "portfolio.f32"
+PORTFOLIO_INDEX_FILE = "portfolio_index.csv"
+
+
+def close_matrix(day, grid):
+    """
+    Lay the closes of every contract of a day out on a minute grid.
+
+    Parameters:
+        day (DayBars): The day.
+        grid (np.ndarray): Sorted bar times of the day.
+
+    Returns:
+        tuple: The (contract x minute) float32 matrix, with minutes without a
+        bar carried forward (NaN before the first bar), and the row of every
+        (otype, strike_price) key.
+    """
+    keys = list(day.offsets)
+    matrix = np.full((len(keys), len(grid)), np.nan, dtype=MTM_DTYPE)
+    if not keys:
+        return matrix, {}
+    # The series are contiguous and in key order, so every bar's row follows from the lengths
+    lengths = np.array([day.offsets[key][1] - day.offsets[key][0] for key in keys])
+    rows = np.repeat(np.arange(len(keys)), lengths)
+    matrix[rows, np.searchsorted(grid, day.times)] = day.close
+
+    # Carry the last close forward over minutes the contract did not trade
+    filled_from = np.where(~np.isnan(matrix), np.arange(len(grid)), 0)
+    np.maximum.accumulate(filled_from, axis=1, out=filled_from)
+    matrix = matrix[np.arange(len(keys))[:, None], filled_from]
+    return matrix, {key: row for row, key in enumerate(keys)}
+
+
+def day_mtm(day, trades):
+    """
+    Compute the per-minute MTM of every leg and every strategy of one day.
+
+    Sold legs are marked at (entry price - close) x lot size, bought legs
+    (side 'BUY') at the opposite.
+
+    Parameters:
+        day (DayBars): The day.
+        trades (dict): Strategy name -> list of the day's trades, as produced
+            by `strategy_engine.run_day`.
+
+    Returns:
+        dict or None: 'tr_date', 'times' (the minute grid), 'legs' (one dict
+        per leg with its strategy, contract, entry/exit, first and last minute,
+        'mae' and 'mfe'), 'leg_curves' (leg x minute, NaN while the leg is not
+        open), 'strategies' and 'portfolio' (strategy x minute) with the
+        'max_drawdown' of every strategy. None when the day had no legs.
+    """
+    legs = [
+        (name, trade)
+        for name, day_trades in trades.items()
+        for trade in day_trades
+        if (trade["otype"], trade["strike_price"]) in day.offsets
+    ]
+    if not legs:
+        return None
+    grid = np.unique(day.times)
+    closes, row_of = close_matrix(day, grid)
+
+    rows = np.array([row_of[(trade["otype"], trade["strike_price"])] for _, trade in legs])
+    entry_price = np.array([trade["temp_entry_price"] for _, trade in legs], dtype=float)
+    lot_size = np.array(
+        [np.nan if trade["lotsize"] is None else trade["lotsize"] for _, trade in legs], dtype=float
+    )
+    entry_index = np.searchsorted(grid, [trade["entry_time"] for _, trade in legs])
+    exit_index = np.array([
+        len(grid) - 1 if trade["exit_time"] is None else np.searchsorted(grid, trade["exit_time"])
+        for _, trade in legs
+    ])
+    exit_price = np.array(
+        [np.nan if trade["exit_price"] is None else trade["exit_price"] for _, trade in legs], dtype=float
+    )
+
+    minutes = np.arange(len(grid))[None, :]
+    is_open = (minutes >= entry_index[:, None]) & (minutes <= exit_index[:, None])
+    is_closed = minutes > exit_index[:, None]
+    side_sign = np.array([-1.0 if trade.get("side") == "BUY" else 1.0 for _, trade in legs])
+    lot_size = lot_size * side_sign
+    mtm = (entry_price[:, None] - closes[rows]) * lot_size[:, None]
+    # The exit bar is marked at the realized exit price
+    legs_range = np.arange(len(legs))
+    realized = np.where(
+        np.isnan(exit_price), mtm[legs_range, exit_index], (entry_price - exit_price) * lot_size
+    )
+    mtm[legs_range, exit_index] = realized
+    leg_curves = np.where(is_open, mtm, np.nan).astype(MTM_DTYPE)
+
+    strategies = list(trades)
+    membership = np.zeros((len(strategies), len(legs)), dtype=MTM_DTYPE)
+    membership[[strategies.index(name) for name, _ in legs], legs_range] = 1
+    contribution = np.where(is_open, np.nan_to_num(mtm), np.where(is_closed, np.nan_to_num(realized)[:, None], 0))
+    portfolio = (membership @ contribution.astype(MTM_DTYPE)).astype(MTM_DTYPE)
+
+    with np.errstate(invalid="ignore"):
+        mae = np.nanmin(np.where(is_open, mtm, np.inf), axis=1)
+        mfe = np.nanmax(np.where(is_open, mtm, -np.inf), axis=1)
+    max_drawdown = (np.maximum.accumulate(portfolio, axis=1) - portfolio).max(axis=1)
+
+    return {
+        "tr_date": day.tr_date,
+        "times": grid,
+        "legs": [
+            {
+                "tr_date": day.tr_date,
+                "strategy": name,
+                "strike_price": trade["strike_price"],
+                "otype": trade["otype"],
+                "entry_time": trade["entry_time"],
+                "exit_time": trade["exit_time"],
+                "first_index": int(entry_index[position]),
+                "last_index": int(exit_index[position]),
+                "mae": float(mae[position]),
+                "mfe": float(mfe[position]),
+            }
+            for position, (name, trade) in enumerate(legs)
+        ],
+        "leg_curves": leg_curves,
+        "strategies": strategies,
+        "portfolio": portfolio,
+        "max_drawdown": max_drawdown,
+    }
+
+
+class MTMWriter:
+    """
+    Streams the MTM of every day to disk.
+
+    Leg curves are stored from their entry to their exit minute only, and the
+    portfolio curves over the whole minute grid; both are appended to raw
+    float32 files, and every curve gets a row in the matching CSV index with
+    its offset and length in the file.
+
+    Attributes:
+        output_dir (str): Directory of the curve and index files.
+        leg_offset (int): Values written to the leg curve file so far.
+        portfolio_offset (int): Values written to the portfolio curve file so far.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        for name in (LEG_CURVES_FILE, LEG_INDEX_FILE, PORTFOLIO_CURVES_FILE, PORTFOLIO_INDEX_FILE):
+            open(os.path.join(output_dir, name), "wb").close()
+        self.leg_offset = 0
+        self.portfolio_offset = 0
+
+    def write(self, mtm):
+        """
+        Append the curves of one day.
+
+        Parameters:
+            mtm (dict): A day as produced by `day_mtm`.
+
+        Returns:
+            int: Number of values written.
+        """
+        times = mtm["times"]
+        leg_index = pd.DataFrame(mtm["legs"])
+        lengths = leg_index["last_index"] - leg_index["first_index"] + 1
+        leg_index["first_time"] = times[leg_index["first_index"]]
+        leg_index["offset"] = self.leg_offset + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        leg_index["length"] = lengths
+        minutes = np.arange(len(times))[None, :]
+        open_values = mtm["leg_curves"][
+            (minutes >= leg_index["first_index"].to_numpy()[:, None])
+            & (minutes <= leg_index["last_index"].to_numpy()[:, None])
+        ]
+        self._append(LEG_CURVES_FILE, LEG_INDEX_FILE, open_values, leg_index.drop(columns=["first_index", "last_index"]))
+        self.leg_offset += len(open_values)
+
+        portfolio_index = pd.DataFrame({
+            "tr_date": mtm["tr_date"],
+            "strategy": mtm["strategies"],
+            "first_time": times[0],
+            "offset": self.portfolio_offset + np.arange(len(mtm["strategies"])) * len(times),
+            "length": len(times),
+            "max_drawdown": mtm["max_drawdown"],
+            "close_mtm": mtm["portfolio"][:, -1],
+        })
+        self._append(PORTFOLIO_CURVES_FILE, PORTFOLIO_INDEX_FILE, mtm["portfolio"], portfolio_index)
+        self.portfolio_offset += mtm["portfolio"].size
+        return len(open_values) + mtm["portfolio"].size
+
+    def _append(self, curves_file, index_file, values, index):
+        """Append curve values and their index rows."""
+        with open(os.path.join(self.output_dir, curves_file), "ab") as file:
+            np.ascontiguousarray(values, dtype=MTM_DTYPE).tofile(file)
+        index_path = os.path.join(self.output_dir, index_file)
+        index.to_csv(index_path, mode="a", header=os.path.getsize(index_path) == 0, index=False)
+
+
+def read_curves(output_dir, portfolio=False):
+    """
+    Map curves written by `MTMWriter` without loading them.
+
+    Parameters:
+        output_dir (str): Directory of the curve and index files.
+        portfolio (bool, optional): Read the portfolio curves instead of the
+            leg curves.
+
+    Returns:
+        tuple: The index (pd.DataFrame) and the float32 values (np.memmap);
+        the curve of index row `i` is `values[offset:offset + length]`,
+        one value per minute from 'first_time'.
+    """
+    curves_file, index_file = (
+        (PORTFOLIO_CURVES_FILE, PORTFOLIO_INDEX_FILE) if portfolio else (LEG_CURVES_FILE, LEG_INDEX_FILE)
+    )
+    index = pd.read_csv(os.path.join(output_dir, index_file))
+    curves_path = os.path.join(output_dir, curves_file)
+    if os.path.getsize(curves_path) == 0:
+        return index, np.zeros(0, dtype=MTM_DTYPE)
+    return index, np.memmap(curves_path, dtype=MTM_DTYPE, mode="r")
@@ -0,0 +1,291 @@
+"""
+Multi-Leg Strategies
+
+Positions made of several option legs entered together (straddles,
+strangles, condors), with exits decided for the position as a whole:
+
+- a `Leg` is an option type, a side and a strike rule: a number of strikes
+  above or below the at-the-money strike, or the strike whose premium is
+  closest to a value,
+- a `MultiLegStrategy` enters all legs at the close of the entry bar and
+  exits them on the combined premium (stoploss/target multiples of the net
+  premium, as for single legs), on a leg's own stoploss (closing only that
+  leg, or every leg with `exit_all_on_leg_stop`) or at the square-off bar,
+- the exits of all legs of all days of a chunk are evaluated together on
+  aligned (day x leg x minute) arrays, so finding them needs no loop over
+  days or bars.
+
+The legs of a position are written as one trade each, with the
+`strategy_engine.RESULT_COLUMNS` and their 'side'.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import re
+import numpy as np
+
+LEG_PATTERN = re.compile(r"^(CE|PE):(SELL|BUY):(ATM([+-]\d+)?|P(\d+(\.\d+)?))$")
+
+
+class Leg:
+    """
+    One option leg of a multi-leg position.
+
+    Attributes:
+        otype (str): 'CE' or 'PE'.
+        side (str): 'SELL' or 'BUY'.
+        strike_offset (int): Strikes above (+) or below (-) the at-the-money
+            strike, when the strike is chosen relative to the spot.
+        closest_premium (float): Premium the strike is chosen by instead, or None.
+    """
+
+    def __init__(self, otype, side="SELL", strike_offset=0, closest_premium=None):
+        self.otype = otype
+        self.side = side
+        self.strike_offset = strike_offset
+        self.closest_premium = closest_premium
+
+    def select_strike(self, day, entry_time):
+        """
+        Choose the strike of the leg at the entry bar.
+
+        Returns:
+            tuple or None: The strike price and its close at the entry bar.
+        """
+        strikes, closes = day.chain_at(self.otype, entry_time)
+        if not len(strikes):
+            return None
+        if self.closest_premium is not None:
+            position = int(np.argmin(np.abs(closes - self.closest_premium)))
+            return strikes[position], closes[position]
+        spot = day.spot_close.get(entry_time)
+        if spot is None:
+            return None
+        atm = int(np.argmin(np.abs(strikes - spot)))
+        position = atm + self.strike_offset
+        if not 0 <= position < len(strikes):
+            return None
+        return strikes[position], closes[position]
+
+
+def parse_legs(spec):
+    """
+    Parse a leg specification such as 'CE:SELL:ATM+2, PE:BUY:P50'.
+
+    Every leg is OTYPE:SIDE:STRIKE, where STRIKE is ATM, ATM+n or ATM-n
+    (strikes away from the money) or Pn (the strike whose premium is closest
+    to n).
+
+    Parameters:
+        spec (str): Comma-separated legs.
+
+    Returns:
+        list: The `Leg` objects.
+
+    Raises:
+        ValueError: If a leg does not follow the format.
+    """
+    legs = []
+    for text in spec.split(","):
+        match = LEG_PATTERN.match(text.strip().upper())
+        if match is None:
+            raise ValueError(f"Invalid leg: {text.strip()}")
+        otype, side, _, offset, premium, _ = match.groups()
+        legs.append(Leg(
+            otype,
+            side,
+            int(offset) if offset else 0,
+            float(premium) if premium else None,
+        ))
+    return legs
+
+
+class MultiLegStrategy:
+    """
+    A position of several legs with exits decided for the position.
+
+    Attributes:
+        name (str): Strategy_Name of the position's trades.
+        entry_time (str): Time of the entry bar ('HH:MM:SS').
+        squareoff_time (str): Time of the square-off bar.
+        legs (list): The `Leg` objects.
+        target_value (float): Target as a multiple of the net entry premium.
+        stoploss_value (float): Stoploss as a multiple of the net entry premium.
+        leg_stoploss_value (float): Stoploss of every sold leg as a multiple of
+            its entry price, or None.
+        exit_all_on_leg_stop (bool): Whether a leg's stoploss closes every leg.
+        batched (bool): Marks strategies evaluated a chunk of days at a time.
+    """
+
+    batched = True
+
+    def __init__(self, name, entry_time, squareoff_time, legs, target_value, stoploss_value,
+                 leg_stoploss_value=None, exit_all_on_leg_stop=False):
+        self.name = name
+        self.entry_time = entry_time
+        self.squareoff_time = squareoff_time
+        self.legs = legs
+        self.target_value = target_value
+        self.stoploss_value = stoploss_value
+        self.leg_stoploss_value = leg_stoploss_value
+        self.exit_all_on_leg_stop = exit_all_on_leg_stop
+
+    def aligned_bars(self, days):
+        """
+        Select the strikes of every day and align their bars on one minute grid.
+
+        Returns:
+            tuple: The days entered, their strikes (day x leg), the minute grid
+            from the entry to the square-off bar and the high and close arrays
+            (day x leg x minute), closes carried forward over minutes without
+            a bar.
+        """
+        grid = np.unique(np.concatenate([day.times for day in days]))
+        grid = grid[(grid >= self.entry_time) & (grid <= self.squareoff_time)]
+        entered = []
+        strikes = []
+        for day in days:
+            selected = [leg.select_strike(day, self.entry_time) for leg in self.legs]
+            if all(choice is not None for choice in selected):
+                entered.append(day)
+                strikes.append([strike for strike, _ in selected])
+        shape = (len(entered), len(self.legs), len(grid))
+        high = np.full(shape, np.nan)
+        close = np.full(shape, np.nan)
+        for day_index, day in enumerate(entered):
+            for leg_index, leg in enumerate(self.legs):
+                series = day.series(leg.otype, strikes[day_index][leg_index])
+                window = series.window("", self.squareoff_time)
+                positions = np.searchsorted(grid, series.times[window])
+                inside = (positions < len(grid)) & (series.times[window] >= self.entry_time)
+                high[day_index, leg_index, positions[inside]] = series.high[window][inside]
+                close[day_index, leg_index, positions[inside]] = series.close[window][inside]
+
+        filled_from = np.where(~np.isnan(close), np.arange(len(grid)), 0)
+        np.maximum.accumulate(filled_from, axis=2, out=filled_from)
+        close = np.take_along_axis(close, filled_from, axis=2)
+        return entered, np.array(strikes).reshape(len(entered), len(self.legs)), grid, high, close
+
+    def run_days(self, days, lot_sizes):
+        """
+        Enter the position on every day and find the exits of all legs at once.
+
+        Parameters:
+            days (list): `DayBars` of the chunk.
+            lot_sizes (dict): Trading date -> lot size.
+
+        Returns:
+            list: One trade per leg and day.
+        """
+        if not days:
+            return []
+        entered, strikes, grid, high, close = self.aligned_bars(days)
+        if not entered or len(grid) < 2:
+            return []
+        day_count, leg_count, minute_count = close.shape
+        side_sign = np.array([1.0 if leg.side == "SELL" else -1.0 for leg in self.legs])
+        minutes = np.arange(minute_count)
+        entry_price = close[:, :, 0]
+        last = minute_count - 1
+
+        # Own stoploss of every sold leg, first minute it is reached
+        leg_stop_price = np.full((day_count, leg_count), np.nan)
+        leg_stop_index = np.full((day_count, leg_count), minute_count)
+        if self.leg_stoploss_value is not None:
+            leg_stop_price = np.where(side_sign > 0, entry_price * self.leg_stoploss_value, np.nan)
+            hit = (high >= leg_stop_price[:, :, None]) & (minutes > 0)
+            leg_stop_index = np.where(hit.any(axis=2), hit.argmax(axis=2), minute_count)
+
+        # Net premium of the position, with stopped legs frozen at their stop price
+        frozen = minutes[None, None, :] >= leg_stop_index[:, :, None]
+        value = np.where(frozen, leg_stop_price[:, :, None], close)
+        premium = (side_sign[None, :, None] * value).sum(axis=1)
+        entry_premium = premium[:, 0]
+        pnl = entry_premium[:, None] - premium
+        scale = np.abs(entry_premium)[:, None]
+        combined_stop = (pnl <= -(self.stoploss_value - 1) * scale) & (minutes > 0)
+        combined_target = (pnl >= (1 - self.target_value) * scale) & (minutes > 0)
+        combined = combined_stop | combined_target
+        exit_index = np.where(combined.any(axis=1), combined.argmax(axis=1), last)
+        exit_type = np.where(
+            combined.any(axis=1),
+            np.where(combined_stop[np.arange(day_count), exit_index], "STOPLOSS", "TARGET"),
+            "SQOFF",
+        )
+        if self.exit_all_on_leg_stop:
+            first_leg_stop = leg_stop_index.min(axis=1)
+            stopped_first = first_leg_stop <= exit_index
+            exit_index = np.where(stopped_first, first_leg_stop, exit_index)
+            exit_type = np.where(stopped_first, "STOPLOSS", exit_type)
+
+        # A leg leaves at its own stop if that comes first, otherwise with the position
+        leg_stopped = leg_stop_index <= exit_index[:, None]
+        leg_exit_index = np.where(leg_stopped, leg_stop_index, exit_index[:, None])
+        leg_exit_price = np.where(
+            leg_stopped,
+            leg_stop_price,
+            np.take_along_axis(close, leg_exit_index[:, :, None], axis=2)[:, :, 0],
+        )
+        leg_exit_type = np.where(leg_stopped, "STOPLOSS", exit_type[:, None])
+
+        trades = []
+        for day_index, day in enumerate(entered):
+            lot_size = lot_sizes.get(day.tr_date)
+            for leg_index, leg in enumerate(self.legs):
+                price = entry_price[day_index, leg_index]
+                exit_price = leg_exit_price[day_index, leg_index]
+                trades.append({
+                    "tr_date": day.tr_date,
+                    "tr_time": self.entry_time,
+                    "stock_name": day.stock_name,
+                    "strike_price": strikes[day_index, leg_index],
+                    "otype": leg.otype,
+                    "side": leg.side,
+                    "spot_price": day.spot_close.get(self.entry_time),
+                    "temp_entry_price": price,
+                    "entry_time": self.entry_time,
+                    "stoploss": leg_stop_price[day_index, leg_index] if leg.side == "SELL" else None,
+                    "target": None,
+                    "exit_type": leg_exit_type[day_index, leg_index],
+                    "exit_price": exit_price,
+                    "exit_time": grid[leg_exit_index[day_index, leg_index]],
+                    "exit_resolution": None,
+                    "lotsize": lot_size,
+                    "PNL": (
+                        side_sign[leg_index] * (price - exit_price) * lot_size if lot_size is not None else None
+                    ),
+                })
+        return trades
+
+
+def multi_leg_strategies_from_config(config, target_value, stoploss_value):
+    """
+    Build the multi-leg strategies of the [multi_leg_strategies] config section.
+
+    Every option of the section is `NAME = legs`, in the format of
+    `parse_legs`; the [multi_leg] section holds the settings they share.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+        target_value (float): Target as a multiple of the net entry premium.
+        stoploss_value (float): Stoploss as a multiple of the net entry premium.
+
+    Returns:
+        list: One `MultiLegStrategy` per option.
+    """
+    if not config.has_section("multi_leg_strategies"):
+        return []
+    leg_stoploss = config.get("multi_leg", "leg_stoploss_value", fallback="").strip()
+    return [
+        MultiLegStrategy(
+            name,
+            config.get("params", "entry_time"),
+            config.get("params", "squareoff_time"),
+            parse_legs(spec),
+            target_value,
+            stoploss_value,
+            float(leg_stoploss) if leg_stoploss else None,
+            config.getboolean("multi_leg", "exit_all_on_leg_stop", fallback=False),
+        )
+        for name, spec in config.items("multi_leg_strategies")
+    ]
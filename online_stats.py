@@ -0,0 +1,167 @@
+"""
+Online Performance Statistics
+
+Accumulates the performance statistics of a backtest while it runs, from the
+result frame of every chunk, so the final report needs no second pass over
+the output file:
+
+- trade statistics (trades, win rate, average win and loss, best and worst
+  trade) are running counts and sums,
+- the daily PNL feeds Welford's running mean and variance, for the Sharpe
+  ratio, and a running equity, peak and maximum drawdown,
+- a day is closed once a later date arrives (the report counts the open day
+  without closing it), so a day split over several frames, e.g. one per
+  option type, still counts once.
+
+The memory used does not depend on the number of trades or days.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import copy
+import json
+import math
+import pandas as pd
+
+
+class OnlineStats:
+    """
+    Running performance statistics of a backtest.
+
+    Attributes:
+        annualization (int): Trading days per year of the Sharpe ratio.
+        trades (int): Trades with a PNL seen so far.
+        wins (int): Trades with a positive PNL.
+        losses (int): Trades with a negative PNL.
+        gross_profit (float): Sum of the positive PNL.
+        gross_loss (float): Sum of the negative PNL.
+        best_trade (float): Highest trade PNL, or None.
+        worst_trade (float): Lowest trade PNL, or None.
+        days (int): Closed trading days.
+        mean_daily_pnl (float): Running mean of the daily PNL.
+        daily_m2 (float): Running sum of squared deviations of the daily PNL.
+        equity (float): Cumulative PNL of the closed days.
+        peak (float): Highest equity so far (starting at 0).
+        max_drawdown (float): Largest fall of the equity from its peak.
+        current_date (str): Trading date of the open day, or None.
+        current_pnl (float): PNL of the open day so far.
+    """
+
+    def __init__(self, annualization=252):
+        self.annualization = annualization
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.best_trade = None
+        self.worst_trade = None
+        self.days = 0
+        self.mean_daily_pnl = 0.0
+        self.daily_m2 = 0.0
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.current_date = None
+        self.current_pnl = 0.0
+
+    def update(self, results):
+        """
+        Add the trades of a result frame.
+
+        Parameters:
+            results (pd.DataFrame): Trades with 'tr_date' and 'PNL', in date
+                order across calls; trades without a PNL are skipped.
+        """
+        if results is None or results.empty:
+            return
+        pnl = pd.to_numeric(results["PNL"], errors="coerce")
+        trades = pd.DataFrame({"tr_date": results["tr_date"].astype(str), "PNL": pnl}).dropna(subset=["PNL"])
+        if trades.empty:
+            return
+        self.trades += len(trades)
+        self.wins += int((trades["PNL"] > 0).sum())
+        self.losses += int((trades["PNL"] < 0).sum())
+        self.gross_profit += float(trades["PNL"].clip(lower=0).sum())
+        self.gross_loss += float(trades["PNL"].clip(upper=0).sum())
+        best, worst = float(trades["PNL"].max()), float(trades["PNL"].min())
+        self.best_trade = best if self.best_trade is None else max(self.best_trade, best)
+        self.worst_trade = worst if self.worst_trade is None else min(self.worst_trade, worst)
+
+        for tr_date, day_pnl in trades.groupby("tr_date", sort=True)["PNL"].sum().items():
+            if tr_date != self.current_date:
+                self._close_day()
+                self.current_date = tr_date
+            self.current_pnl += day_pnl
+
+    def _close_day(self):
+        """Fold the open day into the daily statistics."""
+        if self.current_date is None:
+            return
+        self.days += 1
+        delta = self.current_pnl - self.mean_daily_pnl
+        self.mean_daily_pnl += delta / self.days
+        self.daily_m2 += delta * (self.current_pnl - self.mean_daily_pnl)
+        self.equity += self.current_pnl
+        self.peak = max(self.peak, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+        self.current_date = None
+        self.current_pnl = 0.0
+
+    def report(self):
+        """
+        Summarize the statistics, counting the open day as closed.
+
+        Returns:
+            dict: Trade counts, win rate, average win and loss, profit factor,
+            best and worst trade, days, total PNL, mean and standard deviation
+            of the daily PNL, annualized Sharpe ratio and maximum drawdown.
+        """
+        # Close the open day on a copy, so a later frame of the same day still adds to it
+        stats = copy.copy(self)
+        stats._close_day()
+        daily_std = math.sqrt(stats.daily_m2 / (stats.days - 1)) if stats.days > 1 else 0.0
+        return {
+            "trades": stats.trades,
+            "wins": stats.wins,
+            "losses": stats.losses,
+            "win_rate": stats.wins / stats.trades if stats.trades else None,
+            "average_win": stats.gross_profit / stats.wins if stats.wins else None,
+            "average_loss": stats.gross_loss / stats.losses if stats.losses else None,
+            "profit_factor": stats.gross_profit / -stats.gross_loss if stats.gross_loss else None,
+            "best_trade": stats.best_trade,
+            "worst_trade": stats.worst_trade,
+            "days": stats.days,
+            "total_pnl": stats.equity,
+            "mean_daily_pnl": stats.mean_daily_pnl,
+            "daily_pnl_std": daily_std,
+            "sharpe": (
+                stats.mean_daily_pnl / daily_std * math.sqrt(stats.annualization) if daily_std else None
+            ),
+            "max_drawdown": stats.max_drawdown,
+        }
+
+    def progress_line(self):
+        """
+        One-line summary of the statistics so far, for live progress output.
+
+        Returns:
+            str: Days, trades, win rate, total PNL, maximum drawdown and Sharpe.
+        """
+        stats = self.report()
+        win_rate = f"{stats['win_rate']:.1%}" if stats["win_rate"] is not None else "-"
+        sharpe = f"{stats['sharpe']:.2f}" if stats["sharpe"] is not None else "-"
+        return (
+            f"days={stats['days']} trades={stats['trades']} win_rate={win_rate} "
+            f"pnl={stats['total_pnl']:.2f} max_dd={stats['max_drawdown']:.2f} sharpe={sharpe}"
+        )
+
+    def write_report(self, path):
+        """
+        Write the final report to a JSON file.
+
+        Parameters:
+            path (str): Output path of the JSON report.
+        """
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(), report_file, indent=2, sort_keys=True)
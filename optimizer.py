@@ -0,0 +1,275 @@
+"""
+Parameter Optimizer
+
+Successive-halving search over the s0002_v2 parameters (entry_time,
+squareoff_time, closest_val, trigger_val and the stoploss/target multiples),
+run with the strategy engine's port of the s0002_v2 rules:
+
+- a random sample of the parameter grid is drawn, so the grid is never
+  enumerated,
+- every round evaluates the surviving parameter sets on a random sample of
+  trading days, keeps the best `1 / eta` of them and multiplies the number of
+  days by `eta`, until the survivors are run on the full date range,
+- the days of a round contain the days of the previous round, and the result
+  of every (parameter set, day) pair is cached, so a survivor is never
+  evaluated on the same day twice,
+- one day is fetched and indexed at a time and every pending parameter set
+  is run on it in one pass, so memory does not grow with the range,
+- every round reports its throughput in parameter sets and set-days per
+  second.
+
+The search space and the schedule come from the [optimizer] section of
+'config.ini'.
+
+Usage:
+    python optimizer.py [--output optimizer_results.csv]
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import argparse
+import configparser
+import math
+import random
+import time
+import pandas as pd
+from market_data import fetch_bars, parse_underlyings, trading_days
+from profiler import PROFILER, configure_profiler
+from shard_router import configure_shards
+from strategy_engine import DayBars, PremiumReentryStrategy, read_lot_sizes, run_day
+
+# Parameter -> converter of its comma-separated values in [optimizer]
+SEARCH_SPACE = {
+    "entry_time": str,
+    "squareoff_time": str,
+    "closest_val": float,
+    "trigger_val": float,
+    "stoploss_value": float,
+    "target_value": float,
+}
+
+
+def parse_search_space(config):
+    """
+    Read the values of every searched parameter from the [optimizer] section.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        dict: Parameter -> list of values.
+    """
+    return {
+        name: [convert(value.strip()) for value in config.get("optimizer", name).split(",")]
+        for name, convert in SEARCH_SPACE.items()
+    }
+
+
+def sample_configs(space, count, rng):
+    """
+    Draw distinct parameter sets from the grid without enumerating it.
+
+    Every grid position is decoded from a random integer, digit by digit in
+    the mixed radix of the value counts.
+
+    Parameters:
+        space (dict): Parameter -> list of values.
+        count (int): Number of parameter sets.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        list: Parameter sets (dicts); the whole grid when it is not larger
+        than `count`.
+    """
+    sizes = [len(values) for values in space.values()]
+    grid_size = math.prod(sizes)
+    positions = range(grid_size) if grid_size <= count else rng.sample(range(grid_size), count)
+    configs = []
+    for position in positions:
+        params = {}
+        for (name, values), size in zip(space.items(), sizes):
+            position, digit = divmod(position, size)
+            params[name] = values[digit]
+        configs.append(params)
+    return configs
+
+
+def build_strategy(config_id, params):
+    """Create the s0002_v2 strategy of one parameter set."""
+    return PremiumReentryStrategy(
+        f"config_{config_id}",
+        params["entry_time"],
+        params["squareoff_time"],
+        params["target_value"],
+        params["stoploss_value"],
+        params["closest_val"],
+        params["trigger_val"],
+    )
+
+
+class SuccessiveHalving:
+    """
+    Successive-halving search with a cache of per-day results.
+
+    Attributes:
+        configs (list): The sampled parameter sets.
+        strategies (list): One strategy per parameter set.
+        stock_name (str): The underlying.
+        lot_sizes (dict): Trading date -> lot size.
+        fno_table (str): Option bar table of the underlying.
+        day_results (dict): (config index, trading date) -> (PNL, trades).
+        rounds (list): Statistics of every completed round.
+    """
+
+    def __init__(self, configs, stock_name, lot_sizes, fno_table="fnoieod_banknifty"):
+        self.configs = configs
+        self.strategies = [build_strategy(config_id, params) for config_id, params in enumerate(configs)]
+        self.stock_name = stock_name
+        self.lot_sizes = lot_sizes
+        self.fno_table = fno_table
+        self.day_results = {}
+        self.rounds = []
+        self.first_time = min(strategy.entry_time for strategy in self.strategies)
+        self.last_time = max(strategy.squareoff_time for strategy in self.strategies)
+
+    def evaluate(self, config_ids, days):
+        """
+        Run the given parameter sets on the given days, skipping cached pairs.
+
+        Parameters:
+            config_ids (list): Indexes into `configs`.
+            days (list): Trading dates ('YYYY-MM-DD').
+
+        Returns:
+            int: Number of (parameter set, day) pairs evaluated.
+        """
+        evaluated = 0
+        for tr_date in days:
+            pending = [config_id for config_id in config_ids if (config_id, tr_date) not in self.day_results]
+            if not pending:
+                continue
+            with PROFILER.stage("fetch") as stage:
+                spot_df, fno_df = fetch_bars(
+                    self.stock_name,
+                    tr_date,
+                    tr_date,
+                    self.first_time,
+                    self.last_time,
+                    self.fno_table,
+                    verbose=PROFILER.debug,
+                )
+                stage["rows_out"] = len(spot_df) + len(fno_df)
+            day = DayBars(tr_date, spot_df, fno_df)
+            with PROFILER.stage("strategies", rows_in=len(fno_df)) as stage:
+                trades = run_day(day, [self.strategies[config_id] for config_id in pending], self.lot_sizes.get(tr_date))
+                stage["rows_out"] = sum(len(day_trades) for day_trades in trades.values())
+            for config_id in pending:
+                day_trades = trades[self.strategies[config_id].name]
+                pnl = sum(trade["PNL"] for trade in day_trades if trade["PNL"] is not None)
+                self.day_results[(config_id, tr_date)] = (pnl, len(day_trades))
+            evaluated += len(pending)
+        return evaluated
+
+    def score(self, config_ids, days):
+        """
+        Total PNL and trades of every parameter set over the given days.
+
+        Returns:
+            pd.DataFrame: One row per parameter set, best first.
+        """
+        rows = []
+        for config_id in config_ids:
+            results = [self.day_results[(config_id, tr_date)] for tr_date in days]
+            rows.append({
+                "config_id": config_id,
+                **self.configs[config_id],
+                "days": len(days),
+                "trades": sum(trades for _, trades in results),
+                "total_pnl": sum(pnl for pnl, _ in results),
+            })
+        return pd.DataFrame(rows).sort_values("total_pnl", ascending=False, kind="stable").reset_index(drop=True)
+
+    def run(self, all_days, initial_days, eta, rng):
+        """
+        Run the rounds until the survivors have been evaluated on every day.
+
+        Parameters:
+            all_days (list): Trading dates of the full range.
+            initial_days (int): Days sampled in the first round.
+            eta (int): Reduction factor: 1 / eta of the sets survive a round
+                and the next round uses eta times as many days.
+            rng (random.Random): Source of randomness for the day samples.
+
+        Returns:
+            pd.DataFrame: Ranking of the final survivors on the full range.
+        """
+        # A random order of the days; every round uses a longer prefix of it
+        shuffled = rng.sample(all_days, len(all_days))
+        survivors = list(range(len(self.configs)))
+        day_count = min(max(initial_days, 1), len(all_days))
+        while True:
+            days = sorted(shuffled[:day_count])
+            started = time.perf_counter()
+            evaluated = self.evaluate(survivors, days)
+            elapsed = time.perf_counter() - started
+            ranking = self.score(survivors, days)
+            self.rounds.append({
+                "round": len(self.rounds) + 1,
+                "configs": len(survivors),
+                "days": len(days),
+                "evaluated_config_days": evaluated,
+                "seconds": elapsed,
+                "configs_per_second": len(survivors) / elapsed if elapsed else float("inf"),
+                "config_days_per_second": evaluated / elapsed if elapsed else float("inf"),
+                "best_pnl": ranking["total_pnl"].iloc[0] if len(ranking) else None,
+            })
+            if day_count >= len(all_days) or len(survivors) <= 1:
+                return ranking
+            survivors = list(ranking["config_id"].iloc[:max(1, len(survivors) // eta)])
+            day_count = min(day_count * eta, len(all_days))
+
+
+def main():
+    """
+    Run the successive-halving search configured in 'config.ini'.
+    """
+    parser = argparse.ArgumentParser(description="Successive-halving search over the s0002_v2 parameters")
+    parser.add_argument("--output", default="optimizer_results.csv", help="Ranking of the final parameter sets")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    configure_shards(config)
+    profile_output = configure_profiler(config)
+    rng = random.Random(config.getint("optimizer", "seed", fallback=0))
+    stock_name = config.get("params", "stock_name").strip('"').upper()
+    underlying = parse_underlyings(config)[stock_name]
+    start_date = config.get("params", "start_date")
+    end_date = config.get("params", "end_date")
+
+    configs = sample_configs(parse_search_space(config), config.getint("optimizer", "n_configs", fallback=64), rng)
+    search = SuccessiveHalving(
+        configs, stock_name, read_lot_sizes(underlying["lot_size_column"]), underlying["fno_table"]
+    )
+    started = time.perf_counter()
+    ranking = search.run(
+        trading_days(stock_name, start_date, end_date),
+        config.getint("optimizer", "initial_days", fallback=10),
+        config.getint("optimizer", "eta", fallback=3),
+        rng,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(pd.DataFrame(search.rounds).to_string(index=False))
+    evaluated = sum(round_stats["evaluated_config_days"] for round_stats in search.rounds)
+    print(
+        f"{len(configs)} configs searched in {elapsed:.1f}s: "
+        f"{len(configs) / elapsed:.2f} configs/s, {evaluated / elapsed:.1f} config-days/s"
+    )
+    ranking.to_csv(args.output, index=False)
+    print(ranking.head(10).to_string(index=False))
+    PROFILER.write_summary(profile_output)
+
+
+if __name__ == "__main__":
+    main()
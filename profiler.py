@@ -0,0 +1,282 @@
+"""
+Stage Profiler
+
+This module provides a lightweight instrumentation layer for the backtest
+scripts. Every named pipeline stage (fetch, strike-select, entry, exit,
+re-entry, lotsize, write) records its wall time, rows in, rows out, call
+count, how much the resident set size (RSS) of the process grew while it ran
+and the peak RSS during the call, for each trading day; the collected numbers
+are written to a machine-readable JSON profile summary at the end of the run.
+
+The peak is sampled by a background thread every `rss_sample_ms`
+milliseconds while any stage is running, so memory allocated and freed again
+inside a stage still counts.
+
+Intermediate DataFrames are only dumped to the terminal when debug mode is
+enabled in the [profiling] section of 'config.ini'.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from memory_budget import current_rss_mb
+
+STAGES = (
+    "fetch",
+    "strike-select",
+    "entry",
+    "exit",
+    "re-entry",
+    "lotsize",
+    "strategies",
+    "mtm",
+    "write",
+)
+
+
+def new_counters():
+    """
+    Create the empty counters of one stage.
+
+    'rss_delta_mb' adds up how much the RSS grew over the calls (negative
+    when memory was released); 'max_rss_mb' is the highest RSS sampled during
+    a call.
+
+    Returns:
+        dict: Zeroed counters.
+    """
+    return {"calls": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0, "rss_delta_mb": 0.0, "max_rss_mb": 0.0}
+
+
+def add_counters(total, counters):
+    """
+    Add the counters of a stage to a running total, in place.
+
+    Parameters:
+        total (dict): Counters from `new_counters`, updated.
+        counters (dict): Counters to add.
+    """
+    for key, value in counters.items():
+        if key == "max_rss_mb":
+            total[key] = max(total[key], value)
+        else:
+            total[key] += value
+
+
+class RSSSampler:
+    """
+    Background thread that samples the RSS while stages are running and keeps
+    the peak of every running stage.
+
+    Attributes:
+        interval (float): Seconds between two samples.
+        watches (dict): id -> watch of every running stage.
+        lock (Lock): Guards the watches and the thread.
+        thread (Thread): The sampling thread, or None while no stage runs.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.watches = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start_watch(self):
+        """
+        Start tracking the peak RSS of a stage.
+
+        Returns:
+            dict: The watch, to be handed to `stop_watch`.
+        """
+        watch = {"peak_mb": current_rss_mb()}
+        with self.lock:
+            self.watches[id(watch)] = watch
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self.thread.start()
+        return watch
+
+    def stop_watch(self, watch):
+        """
+        Stop tracking a stage.
+
+        Parameters:
+            watch (dict): The watch from `start_watch`.
+
+        Returns:
+            float: The peak RSS sampled since the watch started, in megabytes.
+        """
+        rss_mb = current_rss_mb()
+        with self.lock:
+            self.watches.pop(id(watch), None)
+            watch["peak_mb"] = max(watch["peak_mb"], rss_mb)
+        return watch["peak_mb"]
+
+    def _run(self):
+        """Sample the RSS into every watch until no stage is running."""
+        while True:
+            with self.lock:
+                if not self.watches:
+                    self.thread = None
+                    return
+            rss_mb = current_rss_mb()
+            with self.lock:
+                for watch in self.watches.values():
+                    watch["peak_mb"] = max(watch["peak_mb"], rss_mb)
+            time.sleep(self.interval)
+
+
+# One sampling thread for every profiler of the process
+RSS_SAMPLER = RSSSampler()
+
+
+class StageProfiler:
+    """
+    Collects per-day, per-stage timings and row counters.
+
+    Attributes:
+        debug (bool): If True, `debug_dump` prints the DataFrames handed to it.
+        records (dict): Nested mapping of day -> stage -> counters.
+        lock (Lock): Guards the counters against concurrent stages.
+        local (threading.local): Per-thread state; holds the day of the
+            thread's stages, so threads working on different days do not
+            attribute their stages to each other's days.
+    """
+
+    def __init__(self, debug=False):
+        self.debug = debug
+        self.records = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def day(self):
+        """str: The trading day the calling thread's following stages are attributed to."""
+        return getattr(self.local, "day", "all")
+
+    def set_day(self, day):
+        """
+        Attribute the calling thread's following stages to the given trading day.
+
+        Parameters:
+            day (date or str): The trading day (or chunk label) being processed.
+        """
+        self.local.day = day.strftime("%Y-%m-%d") if hasattr(day, "strftime") else str(day)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Time a block of code as one call of the named stage.
+
+        The yielded dictionary can be updated with ``rows_out`` from inside the
+        block; it is recorded together with the elapsed wall time.
+
+        Parameters:
+            name (str): Stage name, normally one of `STAGES`.
+            rows_in (int, optional): Number of rows entering the stage.
+
+        Yields:
+            dict: A mutable record where the caller stores ``rows_out``.
+        """
+        record = {"rows_out": None}
+        rss_before = current_rss_mb()
+        watch = RSS_SAMPLER.start_watch()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            peak_mb = RSS_SAMPLER.stop_watch(watch)
+            self.add(name, seconds, rows_in, record["rows_out"], current_rss_mb() - rss_before, peak_mb)
+
+    def add(self, name, seconds, rows_in=None, rows_out=None, rss_delta_mb=0.0, rss_mb=0.0):
+        """
+        Add one call of a stage to the counters of the current day.
+
+        Parameters:
+            name (str): Stage name.
+            seconds (float): Wall time spent in the stage.
+            rows_in (int, optional): Number of rows entering the stage.
+            rows_out (int, optional): Number of rows leaving the stage.
+            rss_delta_mb (float, optional): Growth of the RSS during the call.
+            rss_mb (float, optional): Peak RSS during the call.
+        """
+        day = self.day
+        with self.lock:
+            day_records = self.records.setdefault(day, {})
+            counters = day_records.setdefault(name, new_counters())
+            counters["calls"] += 1
+            counters["seconds"] += seconds
+            counters["rows_in"] += int(rows_in or 0)
+            counters["rows_out"] += int(rows_out or 0)
+            counters["rss_delta_mb"] += rss_delta_mb
+            counters["max_rss_mb"] = max(counters["max_rss_mb"], rss_mb)
+
+    def merge(self, records):
+        """
+        Add the records of another profiler, e.g. the one of a worker process.
+
+        Parameters:
+            records (dict): Nested mapping of day -> stage -> counters.
+        """
+        with self.lock:
+            for day, day_records in records.items():
+                for name, counters in day_records.items():
+                    add_counters(self.records.setdefault(day, {}).setdefault(name, new_counters()), counters)
+
+    def summary(self):
+        """
+        Build the profile summary for everything recorded so far.
+
+        Returns:
+            dict: ``{"days": {...}, "totals": {...}}`` with per-day and
+            run-wide counters for every stage.
+        """
+        totals = {}
+        for day_records in self.records.values():
+            for name, counters in day_records.items():
+                add_counters(totals.setdefault(name, new_counters()), counters)
+        return {"days": self.records, "totals": totals}
+
+    def write_summary(self, path):
+        """
+        Write the profile summary to a JSON file.
+
+        Parameters:
+            path (str): Output path of the JSON summary.
+        """
+        with open(path, "w", encoding="utf-8") as summary_file:
+            json.dump(self.summary(), summary_file, indent=2, sort_keys=True)
+
+    def debug_dump(self, label, value):
+        """
+        Print a label and a value (usually a DataFrame) in debug mode only.
+
+        Parameters:
+            label (str): Heading printed before the value.
+            value (object): The object to print.
+        """
+        if self.debug:
+            print(label)
+            print(value)
+
+
+PROFILER = StageProfiler()
+
+
+def configure_profiler(config):
+    """
+    Configure the shared profiler from the [profiling] section of a config.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        str: Path where the profile summary should be written.
+    """
+    PROFILER.debug = config.getboolean("profiling", "debug", fallback=False)
+    RSS_SAMPLER.interval = config.getfloat("profiling", "rss_sample_ms", fallback=10.0) / 1000
+    return config.get("profiling", "profile_output", fallback="profile_summary.json")
@@ -0,0 +1,165 @@
+"""
+Response Cache
+
+An in-process read-through cache for `/get_data/` responses. Entries are keyed
+by the normalized query parameters, evicted least-recently-used once the cache
+is full, expire after a time-to-live, and carry an ETag so that clients sending
+If-None-Match can be answered with 304 Not Modified.
+
+Every entry remembers the Entry_Date range it covers, so an upload only
+invalidates the entries whose range contains one of the inserted Entry_Dates.
+Every invalidation also bumps a generation counter; a response read from the
+database before an invalidation and put after it is not cached, since it may
+be missing the rows that caused the invalidation.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import bisect
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU/TTL cache of JSON response payloads.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+        ttl_seconds (float): Lifetime of a cached response.
+        generation (int): Number of invalidations so far; read it before
+            querying the database and hand it to `put`.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**params):
+        """
+        Build a cache key from query parameters.
+
+        Parameters:
+            **params: The normalized query parameters (dates as date objects,
+                columns as a list in output order).
+
+        Returns:
+            tuple: A hashable key independent of the parameters' order.
+        """
+        return tuple(
+            sorted(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in params.items()
+            )
+        )
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Parameters:
+            key (tuple): Key built by `make_key`.
+
+        Returns:
+            tuple or None: ``(etag, payload)`` of a live entry, otherwise None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry["etag"], entry["payload"]
+
+    def put(self, key, payload, start_date, end_date, generation=None):
+        """
+        Cache a response payload.
+
+        Parameters:
+            key (tuple): Key built by `make_key`.
+            payload (dict): The JSON-serializable response.
+            start_date (date): First Entry_Date covered by the response.
+            end_date (date): Last Entry_Date covered by the response.
+            generation (int, optional): `generation` read before the payload
+                was queried; if the cache was invalidated since, the payload
+                is not cached.
+
+        Returns:
+            str: The ETag of the payload.
+        """
+        etag = '"' + hashlib.sha1(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest() + '"'
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return etag
+            self.entries[key] = {
+                "etag": etag,
+                "payload": payload,
+                "start_date": start_date,
+                "end_date": end_date,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return etag
+
+    def invalidate_dates(self, dates):
+        """
+        Drop every cached response whose Entry_Date range contains one of the dates.
+
+        Parameters:
+            dates (iterable): Entry_Dates that received new rows.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        dates = sorted(set(dates))
+
+        def covers_any(entry):
+            index = bisect.bisect_left(dates, entry["start_date"])
+            return index < len(dates) and dates[index] <= entry["end_date"]
+
+        with self.lock:
+            self.generation += 1
+            stale_keys = [key for key, entry in self.entries.items() if covers_any(entry)]
+            for key in stale_keys:
+                del self.entries[key]
+        return len(stale_keys)
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check an If-None-Match header against an ETag.
+
+    The header may list several ETags separated by commas, weak ETags
+    ('W/"..."') match their strong form, and '*' matches any ETag.
+
+    Parameters:
+        if_none_match (str): The If-None-Match header, or None.
+        etag (str): The ETag of the current response.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
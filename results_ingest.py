@@ -0,0 +1,205 @@
+"""
+Results Ingestion
+
+Helpers shared by the FastAPI upload endpoint and the loader scripts to move a
+strategy 'Summary' sheet into the `strategy_1` table in bulk:
+
+- the workbook is read straight from a (spooled) file object,
+- the date columns are parsed for the whole column at once,
+- rows are inserted with chunked multi-row `executemany` statements inside the
+  caller's transaction instead of one INSERT per row,
+- or upserted on the table's natural key, so loading the same trades twice
+  updates them instead of duplicating them.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import hashlib
+import pandas as pd
+from schema import NATURAL_KEY, coerce_to_schema, fill_cycle_ids
+
+SUMMARY_COLUMNS = [
+    "Strategy_Name",
+    "Expiry_Date",
+    "Stock",
+    "Stock_Name",
+    "Strike_Price",
+    "CE_PE",
+    "Trade_Type",
+    "Entry_Date",
+    "Entry_Time",
+    "Entry_Price",
+    "Exit_Date",
+    "Exit_Time",
+    "Exit_Price",
+    "Cycle_Id",
+]
+# Columns only some workbooks have; they are stored when present
+OPTIONAL_COLUMNS = ["Exit_Type"]
+DATE_COLUMNS = ["Expiry_Date", "Entry_Date", "Exit_Date"]
+INSERT_CHUNK_SIZE = 5000
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """
+    Hash the content of a file.
+
+    Parameters:
+        path (str): Path of the file.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_summary_sheet(excel_file):
+    """
+    Read the 'Summary' sheet of a strategy workbook.
+
+    Parameters:
+        excel_file (str or file-like): Path or seekable file object of the workbook.
+
+    Returns:
+        pd.DataFrame: The trade rows of the sheet (the first data row is skipped,
+        as in the original loaders).
+    """
+    df = pd.read_excel(excel_file, sheet_name="Summary")
+    return df.iloc[1:]
+
+
+def prepare_summary_rows(df):
+    """
+    Convert the Summary sheet rows into records ready for insertion.
+
+    The DD-MM-YYYY date columns are parsed into dates in one vectorized pass
+    per column, the remaining columns are coerced to the typed `strategy_1`
+    schema (TIME and ENUM columns) and missing values are turned into NULLs.
+    Trades without a Cycle_Id get one from `schema.fill_cycle_ids`.
+
+    Parameters:
+        df (pd.DataFrame): Rows read by `read_summary_sheet`.
+
+    Returns:
+        list: One dictionary per row, keyed by the `strategy_1` column names.
+    """
+    columns = SUMMARY_COLUMNS + [name for name in OPTIONAL_COLUMNS if name in df.columns]
+    prepared = df[columns].copy()
+    for column in DATE_COLUMNS:
+        prepared[column] = pd.to_datetime(prepared[column], format="%d-%m-%Y").dt.date
+    return coerce_to_schema(fill_cycle_ids(prepared)).to_dict("records")
+
+
+def bulk_insert_summary(
+    connection, table, records, chunk_size=INSERT_CHUNK_SIZE, progress=None
+):
+    """
+    Insert the records in chunks of multi-row `executemany` statements.
+
+    The caller owns the transaction, so either every chunk is committed or
+    none is.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        table (Table): The `strategy_1` table.
+        records (list): Rows produced by `prepare_summary_rows`.
+        chunk_size (int, optional): Rows per `executemany` call.
+        progress (callable, optional): Called with the number of rows inserted
+            so far after every chunk.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    insert_statement = table.insert()
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        connection.execute(insert_statement, chunk)
+        if progress is not None:
+            progress(start + len(chunk))
+    return len(records)
+
+
+def dedupe_records(records):
+    """
+    Keep only the last record of every natural key.
+
+    Upserting a key twice in one load would leave only the last record stored,
+    so the earlier ones are dropped before they are counted or written.
+    Records with a missing key column (e.g. an Entry_Date that did not parse)
+    are never duplicates of each other and are all kept.
+
+    Parameters:
+        records (list): Rows produced by `prepare_summary_rows`.
+
+    Returns:
+        list: The records, in their original order, without earlier duplicates.
+    """
+    last_index = {}
+    for index, record in enumerate(records):
+        key = tuple(record.get(name) for name in NATURAL_KEY)
+        if None not in key:
+            last_index[key] = index
+    return [
+        record
+        for index, record in enumerate(records)
+        if last_index.get(tuple(record.get(name) for name in NATURAL_KEY), index) == index
+    ]
+
+
+def _upsert_statement(connection, table, update_columns):
+    """Build an insert that updates the non-key columns of rows already stored."""
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(table)
+        return statement.on_duplicate_key_update(
+            {name: statement.inserted[name] for name in update_columns}
+        )
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=list(NATURAL_KEY),
+        set_={name: statement.excluded[name] for name in update_columns},
+    )
+
+
+def upsert_summary(
+    connection, table, records, chunk_size=INSERT_CHUNK_SIZE, progress=None
+):
+    """
+    Insert the records in chunks, updating trades whose natural key
+    (Strategy_Name, Cycle_Id, Entry_Date, CE_PE) is already stored.
+
+    The caller owns the transaction, as in `bulk_insert_summary`.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        table (Table): The `strategy_1` table.
+        records (list): Rows produced by `prepare_summary_rows`.
+        chunk_size (int, optional): Rows per `executemany` call.
+        progress (callable, optional): Called with the number of rows upserted
+            so far after every chunk.
+
+    Returns:
+        int: Number of rows upserted.
+    """
+    if not records:
+        return 0
+    # The id of a stored trade is kept; only its other columns are updated
+    update_columns = [name for name in records[0] if name not in NATURAL_KEY and name != "id"]
+    upsert_statement = _upsert_statement(connection, table, update_columns)
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        connection.execute(upsert_statement, chunk)
+        if progress is not None:
+            progress(start + len(chunk))
+    return len(records)
@@ -0,0 +1,238 @@
+"""
+Results Sink
+
+Stores the result frame of a backtest pipeline (one row per trade with
+tr_date, otype, strike_price, temp_entry_price, entry_time, exit_type,
+exit_price, exit_time, lotsize and PNL) directly in the `strategy_1` table,
+without going through the Excel 'Summary' layout:
+
+- the pipeline columns are renamed and converted to the typed schema column by
+  column, never row by row,
+- the trades replace those already stored under the same Strategy_Name in the
+  backtested date range, together with their analytics rollup rows, in a
+  single transaction, so running a backtest again does not duplicate it,
+- `stream_results` stores a backtest chunk by chunk in that one transaction,
+  so only one chunk of results is held in memory.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+from contextlib import contextmanager
+from sqlalchemy import MetaData, Table, create_engine, delete, inspect
+from results_ingest import bulk_insert_summary
+from rollups import ROLLUP_TABLE_NAME, apply_rollup_deltas, compute_rollup_deltas
+from schema import TABLE_NAME, coerce_to_schema
+
+# Replace these values with your actual database connection details
+username = 'root'
+password = 'shashank23'
+host = 'localhost'
+port = '3306'
+database = 'backtest'
+
+# Pipeline column -> strategy_1 column
+RESULT_COLUMN_MAP = {
+    "stock_name": "Stock_Name",
+    "strike_price": "Strike_Price",
+    "otype": "CE_PE",
+    "tr_date": "Entry_Date",
+    "temp_entry_price": "Entry_Price",
+    "exit_time": "Exit_Time",
+    "exit_price": "Exit_Price",
+    "exit_type": "Exit_Type",
+    "lotsize": "Lot_Size",
+    "PNL": "PNL",
+}
+
+
+def results_engine():
+    """
+    Create an engine for the results database.
+
+    Returns:
+        Engine: SQLAlchemy engine.
+    """
+    return create_engine(f'mysql+pymysql://{username}:{password}@{host}/{database}')
+
+
+def map_results(frame, strategy_name, trade_type="SELL"):
+    """
+    Map a backtest result frame onto `strategy_1` rows.
+
+    Only completed trades (with an entry and an exit) are kept. Re-entries
+    carry their own entry time in 'tr_time'; the first entry of a day keeps the
+    entry-bar time there and its fill time in 'entry_time'. Trades are numbered
+    per day and option type to form the Cycle_Id.
+
+    Parameters:
+        frame (pd.DataFrame): Results of the backtest pipeline.
+        strategy_name (str): Strategy_Name the trades are stored under.
+        trade_type (str, optional): 'SELL' or 'BUY', for frames without a
+            'side' column per trade.
+
+    Returns:
+        pd.DataFrame: The rows, typed for the `strategy_1` table.
+    """
+    trades = frame[frame["entry_time"].notna() & frame["exit_type"].notna()]
+    trades = trades.sort_values(["tr_date", "otype", "tr_time"], kind="stable")
+    rows = trades[[name for name in RESULT_COLUMN_MAP if name in trades.columns]].rename(
+        columns=RESULT_COLUMN_MAP
+    )
+    is_reentry = trades["tr_time"].astype(str) > trades["entry_time"].astype(str)
+    rows["Entry_Time"] = trades["tr_time"].where(is_reentry, trades["entry_time"])
+    rows["Exit_Date"] = rows["Entry_Date"]
+    rows["Stock"] = rows["Stock_Name"]
+    rows["Strategy_Name"] = strategy_name
+    rows["Trade_Type"] = trades["side"] if "side" in trades.columns else trade_type
+    rows["Cycle_Id"] = (trades.groupby(["tr_date", "otype"]).cumcount() + 1).astype(str)
+    return coerce_to_schema(rows.reset_index(drop=True))
+
+
+def replace_results(
+    connection, table, rows, strategy_name, start_date, end_date, rollup_table=None, progress=None
+):
+    """
+    Replace the stored trades of a strategy in a date range with new ones.
+
+    The caller owns the transaction, so the delete, the insert and the rollup
+    update are committed together.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        table (Table): The `strategy_1` table.
+        rows (pd.DataFrame): Rows produced by `map_results`.
+        strategy_name (str): Strategy_Name of the trades.
+        start_date (date): First backtested date.
+        end_date (date): Last backtested date.
+        rollup_table (Table, optional): The analytics rollup to keep in step.
+        progress (callable, optional): Passed on to `bulk_insert_summary`.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    delete_results(connection, table, strategy_name, start_date, end_date, rollup_table)
+    return insert_results(connection, table, rows, rollup_table, progress)
+
+
+def delete_results(connection, table, strategy_name, start_date, end_date, rollup_table=None):
+    """
+    Delete the stored trades of a strategy in a date range, and their rollup rows.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        table (Table): The `strategy_1` table.
+        strategy_name (str): Strategy_Name of the trades.
+        start_date (date): First backtested date.
+        end_date (date): Last backtested date.
+        rollup_table (Table, optional): The analytics rollup to keep in step.
+    """
+    for target in (table, rollup_table):
+        if target is None:
+            continue
+        connection.execute(
+            delete(target).where(
+                target.c.Strategy_Name == strategy_name,
+                target.c.Entry_Date >= start_date,
+                target.c.Entry_Date <= end_date,
+            )
+        )
+
+
+def insert_results(connection, table, rows, rollup_table=None, progress=None):
+    """
+    Insert mapped trades and add them to the rollup.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        table (Table): The `strategy_1` table.
+        rows (pd.DataFrame): Rows produced by `map_results`.
+        rollup_table (Table, optional): The analytics rollup to keep in step.
+        progress (callable, optional): Passed on to `bulk_insert_summary`.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    records = rows[[name for name in rows.columns if name in table.c]].to_dict("records")
+    inserted_rows = bulk_insert_summary(connection, table, records, progress=progress)
+    if rollup_table is not None and records:
+        apply_rollup_deltas(
+            connection, rollup_table, compute_rollup_deltas(records, rows["Exit_Type"])
+        )
+    return inserted_rows
+
+
+def _results_tables(engine):
+    """Reflect `strategy_1` and, when it exists with the PNL_Unit key, the rollup table."""
+    metadata = MetaData()
+    table = Table(TABLE_NAME, metadata, autoload_with=engine)
+    rollup_table = None
+    if inspect(engine).has_table(ROLLUP_TABLE_NAME):
+        rollup_table = Table(ROLLUP_TABLE_NAME, metadata, autoload_with=engine)
+        # A rollup without the PNL_Unit key is rebuilt by `rollups.ensure_rollup_table`
+        if "PNL_Unit" not in rollup_table.c:
+            rollup_table = None
+    return table, rollup_table
+
+
+@contextmanager
+def stream_results(strategy_name, start_date, end_date, engine=None):
+    """
+    Store the result frames of a backtest chunk by chunk in one transaction.
+
+    The trades already stored in the date range are deleted on entry, every
+    frame is mapped and inserted as soon as it is handed over, and everything
+    is committed together on exit, or rolled back if the backtest fails.
+
+    Parameters:
+        strategy_name (str): Strategy_Name the trades are stored under.
+        start_date (str or date): First backtested date.
+        end_date (str or date): Last backtested date.
+        engine (Engine, optional): Engine of the results database; one is
+            created from the connection details above when omitted.
+
+    Yields:
+        callable: Stores one result frame and returns the number of rows inserted.
+    """
+    owns_engine = engine is None
+    engine = engine or results_engine()
+    try:
+        table, rollup_table = _results_tables(engine)
+        with engine.begin() as connection:
+            delete_results(
+                connection, table, strategy_name, _as_date(start_date), _as_date(end_date), rollup_table
+            )
+
+            def write(frame):
+                return insert_results(connection, table, map_results(frame, strategy_name), rollup_table)
+
+            yield write
+    finally:
+        if owns_engine:
+            engine.dispose()
+
+
+def write_results(frame, strategy_name, start_date, end_date, engine=None):
+    """
+    Store a backtest result frame in the results database in one transaction.
+
+    Parameters:
+        frame (pd.DataFrame): Results of the backtest pipeline.
+        strategy_name (str): Strategy_Name the trades are stored under.
+        start_date (str or date): First backtested date.
+        end_date (str or date): Last backtested date.
+        engine (Engine, optional): Engine of the results database; one is
+            created from the connection details above when omitted.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    with stream_results(strategy_name, start_date, end_date, engine) as write:
+        return write(frame)
+
+
+def _as_date(value):
+    """Parse 'YYYY-MM-DD' strings; dates are returned unchanged."""
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
@@ -0,0 +1,437 @@
+"""
+Analytics Rollups
+
+This module maintains a daily rollup of the trades stored in `strategy_1` so
+that the analytics endpoints can answer PNL, win-rate, per-strategy and
+exit-type questions from a few hundred pre-aggregated rows instead of every raw
+trade.
+
+The rollup has one row per (Entry_Date, Strategy_Name, CE_PE, Exit_Type,
+PNL_Unit) with trade, win and loss counts, total PNL, gross profit and gross
+loss. Each upload
+aggregates its own rows and adds them to the rollup in the same transaction
+that inserts the trades, so the rollup never drifts from the raw table.
+
+The PNL of a trade is its stored 'PNL' column, which the backtests write per
+position (option points times the lot size), under the unit 'lot'. Trades
+stored without one, such as legacy rows and uploaded workbooks, fall back to
+option points per unit under the unit 'points': Entry_Price - Exit_Price for
+SELL trades and Exit_Price - Entry_Price for BUY trades. The two units are
+never summed together; the analytics responses report every unit in rows of
+its own and describe the units with `PNL_UNITS`.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, Date, Float, Integer, String, Table, case, delete, func, inspect, literal, select
+from schema import NATURAL_KEY
+
+ROLLUP_TABLE_NAME = "strategy_1_daily_rollup"
+ROLLUP_KEYS = ["Entry_Date", "Strategy_Name", "CE_PE", "Exit_Type", "PNL_Unit"]
+ROLLUP_MEASURES = ["trades", "wins", "losses", "pnl", "gross_profit", "gross_loss"]
+UNKNOWN_EXIT_TYPE = "UNKNOWN"
+PNL_UNITS = {
+    "lot": "stored PNL of the position (option points x lot size)",
+    "points": "option points per unit, for trades stored without a PNL",
+}
+
+
+def define_rollup_table(metadata):
+    """
+    Define the daily rollup table on the given metadata.
+
+    Parameters:
+        metadata (MetaData): Metadata the table is attached to.
+
+    Returns:
+        Table: The rollup table.
+    """
+    return Table(
+        ROLLUP_TABLE_NAME,
+        metadata,
+        Column("Entry_Date", Date, primary_key=True),
+        Column("Strategy_Name", String(length=255), primary_key=True),
+        Column("CE_PE", String(length=8), primary_key=True),
+        Column("Exit_Type", String(length=16), primary_key=True),
+        Column("PNL_Unit", String(length=8), primary_key=True),
+        Column("trades", Integer, nullable=False, default=0),
+        Column("wins", Integer, nullable=False, default=0),
+        Column("losses", Integer, nullable=False, default=0),
+        Column("pnl", Float, nullable=False, default=0.0),
+        Column("gross_profit", Float, nullable=False, default=0.0),
+        Column("gross_loss", Float, nullable=False, default=0.0),
+    )
+
+
+def compute_rollup_deltas(records, exit_types=None):
+    """
+    Aggregate freshly uploaded trades into rollup rows.
+
+    Parameters:
+        records (list): Rows produced by `results_ingest.prepare_summary_rows`.
+        exit_types (iterable, optional): Exit type of every record; defaults to
+            the records' own 'Exit_Type', when the uploaded sheet has one.
+
+    Returns:
+        pd.DataFrame: One row per rollup key with the measures to add.
+    """
+    trades = pd.DataFrame.from_records(
+        records,
+        columns=[
+            "Entry_Date", "Strategy_Name", "CE_PE", "Trade_Type", "Entry_Price", "Exit_Price", "Exit_Type", "PNL",
+        ],
+    )
+    if exit_types is not None:
+        trades["Exit_Type"] = pd.Series(list(exit_types), dtype=object).reindex(trades.index)
+    trades = trades.dropna(subset=["Entry_Date"])
+    trades["Exit_Type"] = trades["Exit_Type"].astype(object).fillna(UNKNOWN_EXIT_TYPE)
+    trades[["Strategy_Name", "CE_PE"]] = trades[["Strategy_Name", "CE_PE"]].fillna("")
+
+    entry_price = pd.to_numeric(trades["Entry_Price"], errors="coerce")
+    exit_price = pd.to_numeric(trades["Exit_Price"], errors="coerce")
+    is_buy = trades["Trade_Type"].astype(str).str.upper() == "BUY"
+    points = (exit_price - entry_price).where(is_buy, entry_price - exit_price)
+    # The stored PNL when there is one, the points per unit otherwise
+    stored_pnl = pd.to_numeric(trades["PNL"], errors="coerce")
+    trades["PNL_Unit"] = np.where(stored_pnl.notna(), "lot", "points")
+    pnl = stored_pnl.fillna(points)
+    trades, pnl = trades[pnl.notna()], pnl[pnl.notna()]
+    trades = trades.assign(
+        trades=1,
+        wins=(pnl > 0).astype(int),
+        losses=(pnl < 0).astype(int),
+        pnl=pnl,
+        gross_profit=pnl.clip(lower=0),
+        gross_loss=pnl.clip(upper=0),
+    )
+    return trades.groupby(ROLLUP_KEYS, as_index=False)[ROLLUP_MEASURES].sum()
+
+
+def compute_replaced_deltas(connection, strategy_table, records):
+    """
+    Negative rollup deltas of the stored trades that upserting records replaces.
+
+    Adding these to the deltas of the records keeps the rollup exact when an
+    upload updates trades already stored under the same natural key
+    (Strategy_Name, Cycle_Id, Entry_Date, CE_PE).
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside the upload's
+            transaction, before the records are upserted.
+        strategy_table (Table): The `strategy_1` table.
+        records (list): Rows produced by `results_ingest.prepare_summary_rows`.
+
+    Returns:
+        pd.DataFrame: One row per rollup key with the measures to subtract,
+        already negated.
+    """
+    keys = pd.DataFrame.from_records(records, columns=list(NATURAL_KEY)).dropna().drop_duplicates()
+    if keys.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_MEASURES)
+    keys["Entry_Date"] = pd.to_datetime(keys["Entry_Date"]).dt.date
+    keys["Cycle_Id"] = keys["Cycle_Id"].astype(str)
+    columns = [
+        name
+        for name in ("Entry_Date", "Strategy_Name", "CE_PE", "Trade_Type", "Entry_Price", "Exit_Price", "Exit_Type",
+                     "PNL", "Cycle_Id")
+        if name in strategy_table.c
+    ]
+    stored = pd.DataFrame(
+        connection.execute(
+            select(*[strategy_table.c[name] for name in columns]).where(
+                strategy_table.c.Strategy_Name.in_(sorted(keys["Strategy_Name"].unique())),
+                strategy_table.c.Entry_Date >= keys["Entry_Date"].min(),
+                strategy_table.c.Entry_Date <= keys["Entry_Date"].max(),
+            )
+        ).mappings().all(),
+        columns=columns,
+    )
+    if stored.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_MEASURES)
+    stored["Entry_Date"] = pd.to_datetime(stored["Entry_Date"]).dt.date
+    stored["Cycle_Id"] = stored["Cycle_Id"].astype(str)
+    replaced = stored.merge(keys, on=list(NATURAL_KEY))
+    deltas = compute_rollup_deltas(replaced.astype(object).where(replaced.notna(), None).to_dict("records"))
+    deltas[ROLLUP_MEASURES] = -deltas[ROLLUP_MEASURES]
+    return deltas
+
+
+def combine_rollup_deltas(*deltas):
+    """
+    Sum several delta frames into one row per rollup key.
+
+    Returns:
+        pd.DataFrame: The combined deltas.
+    """
+    frames = [frame for frame in deltas if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_MEASURES)
+    return pd.concat(frames, ignore_index=True).groupby(ROLLUP_KEYS, as_index=False)[ROLLUP_MEASURES].sum()
+
+
+def _upsert_statement(connection, rollup_table, rows):
+    """Build an insert that adds to the measures of existing rollup rows."""
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(rollup_table).values(rows)
+        return statement.on_duplicate_key_update(
+            {name: rollup_table.c[name] + statement.inserted[name] for name in ROLLUP_MEASURES}
+        )
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(rollup_table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEYS,
+        set_={name: rollup_table.c[name] + statement.excluded[name] for name in ROLLUP_MEASURES},
+    )
+
+
+def apply_rollup_deltas(connection, rollup_table, deltas):
+    """
+    Add aggregated deltas to the rollup table with a single upsert.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside the upload's transaction.
+        rollup_table (Table): The rollup table.
+        deltas (pd.DataFrame): Output of `compute_rollup_deltas`.
+
+    Returns:
+        int: Number of rollup rows touched.
+    """
+    if deltas.empty:
+        return 0
+    rows = deltas.astype(object).to_dict("records")
+    connection.execute(_upsert_statement(connection, rollup_table, rows))
+    return len(rows)
+
+
+def ensure_rollup_table(engine, strategy_table, rollup_table):
+    """
+    Create the rollup table, or replace one without the PNL_Unit key, and backfill it.
+
+    Parameters:
+        engine (Engine): Engine of the results database.
+        strategy_table (Table): The `strategy_1` table.
+        rollup_table (Table): The rollup table.
+
+    Returns:
+        bool: True if the rollup was (re)built from the raw trades.
+    """
+    inspector = inspect(engine)
+    if inspector.has_table(rollup_table.name):
+        if "PNL_Unit" in {column["name"] for column in inspector.get_columns(rollup_table.name)}:
+            return False
+        rollup_table.drop(engine)
+    rollup_table.create(engine)
+    with engine.begin() as connection:
+        rebuild_rollups(connection, strategy_table, rollup_table)
+    return True
+
+
+def rebuild_rollups(connection, strategy_table, rollup_table):
+    """
+    Recompute the whole rollup from the raw trades table.
+
+    Used to backfill trades that were stored before the rollup existed and
+    after upserts, which replace trades instead of adding new ones. Trades
+    without a stored exit type are counted under 'UNKNOWN', and trades
+    without a stored PNL by their points per unit.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection inside a transaction.
+        strategy_table (Table): The `strategy_1` table.
+        rollup_table (Table): The rollup table.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    pnl = case(
+        (strategy_table.c.Trade_Type == "BUY", strategy_table.c.Exit_Price - strategy_table.c.Entry_Price),
+        else_=strategy_table.c.Entry_Price - strategy_table.c.Exit_Price,
+    )
+    if "PNL" in strategy_table.c:
+        pnl_unit = case((strategy_table.c.PNL.is_not(None), "lot"), else_="points")
+        pnl = func.coalesce(strategy_table.c.PNL, pnl)
+    else:
+        pnl_unit = literal("points")
+    if "Exit_Type" in strategy_table.c:
+        exit_type = func.coalesce(strategy_table.c.Exit_Type, UNKNOWN_EXIT_TYPE)
+    else:
+        exit_type = literal(UNKNOWN_EXIT_TYPE)
+    query = (
+        select(
+            func.date(strategy_table.c.Entry_Date).label("Entry_Date"),
+            strategy_table.c.Strategy_Name,
+            strategy_table.c.CE_PE,
+            exit_type.label("Exit_Type"),
+            pnl_unit.label("PNL_Unit"),
+            func.count().label("trades"),
+            func.sum(case((pnl > 0, 1), else_=0)).label("wins"),
+            func.sum(case((pnl < 0, 1), else_=0)).label("losses"),
+            func.sum(pnl).label("pnl"),
+            func.sum(case((pnl > 0, pnl), else_=0)).label("gross_profit"),
+            func.sum(case((pnl < 0, pnl), else_=0)).label("gross_loss"),
+        )
+        .where(strategy_table.c.Entry_Date.is_not(None), pnl.is_not(None))
+        .group_by(
+            func.date(strategy_table.c.Entry_Date),
+            strategy_table.c.Strategy_Name,
+            strategy_table.c.CE_PE,
+            exit_type,
+            pnl_unit,
+        )
+    )
+    rollup = pd.DataFrame(connection.execute(query).mappings().all())
+    connection.execute(delete(rollup_table))
+    if rollup.empty:
+        return 0
+    rollup["Entry_Date"] = pd.to_datetime(rollup["Entry_Date"]).dt.date
+    rollup[["Strategy_Name", "CE_PE"]] = rollup[["Strategy_Name", "CE_PE"]].fillna("")
+    rollup["Exit_Type"] = rollup["Exit_Type"].fillna(UNKNOWN_EXIT_TYPE)
+    connection.execute(rollup_table.insert(), rollup.astype(object).to_dict("records"))
+    return len(rollup)
+
+
+def _filtered(query, rollup_table, strategy=None, start_date=None, end_date=None):
+    """Apply the optional strategy and Entry_Date filters of the analytics endpoints."""
+    if strategy:
+        query = query.where(rollup_table.c.Strategy_Name == strategy)
+    if start_date:
+        query = query.where(rollup_table.c.Entry_Date >= start_date)
+    if end_date:
+        query = query.where(rollup_table.c.Entry_Date <= end_date)
+    return query
+
+
+def _records(frame):
+    """Convert an aggregated frame into JSON-friendly dictionaries."""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def _with_rates(frame):
+    """Add win rate and average PNL per trade to aggregated rollup rows."""
+    frame["win_rate"] = (frame["wins"] / frame["trades"]).round(4)
+    frame["avg_pnl"] = (frame["pnl"] / frame["trades"]).round(4)
+    return frame
+
+
+def query_pnl(connection, rollup_table, period="daily", strategy=None, start_date=None, end_date=None):
+    """
+    PNL, trades and win rate per day or per month, for every PNL unit.
+
+    Parameters:
+        connection (Connection): SQLAlchemy connection.
+        rollup_table (Table): The rollup table.
+        period (str, optional): 'daily' or 'monthly'.
+        strategy (str, optional): Restrict to one Strategy_Name.
+        start_date (date, optional): First Entry_Date.
+        end_date (date, optional): Last Entry_Date.
+
+    Returns:
+        list: One dictionary per period and PNL unit, in date order.
+    """
+    query = _filtered(
+        select(
+            rollup_table.c.Entry_Date,
+            rollup_table.c.PNL_Unit.label("pnl_unit"),
+            *[func.sum(rollup_table.c[name]).label(name) for name in ROLLUP_MEASURES],
+        ).group_by(rollup_table.c.Entry_Date, rollup_table.c.PNL_Unit),
+        rollup_table,
+        strategy,
+        start_date,
+        end_date,
+    )
+    daily = pd.DataFrame(connection.execute(query).mappings().all())
+    if daily.empty:
+        return []
+    daily["period"] = pd.to_datetime(daily["Entry_Date"]).dt.strftime(
+        "%Y-%m" if period == "monthly" else "%Y-%m-%d"
+    )
+    grouped = daily.groupby(["period", "pnl_unit"], as_index=False)[ROLLUP_MEASURES].sum()
+    return _records(_with_rates(grouped))
+
+
+def query_win_rate(connection, rollup_table, strategy=None, start_date=None, end_date=None):
+    """
+    Overall trade, win and loss counts and win rate, with the PNL of every unit.
+
+    Returns:
+        dict: Counts and win rate over the selected trades, and under 'by_unit'
+        one dictionary of totals per PNL unit.
+    """
+    query = _filtered(
+        select(
+            rollup_table.c.PNL_Unit.label("pnl_unit"),
+            *[func.sum(rollup_table.c[name]).label(name) for name in ROLLUP_MEASURES],
+        ).group_by(rollup_table.c.PNL_Unit),
+        rollup_table,
+        strategy,
+        start_date,
+        end_date,
+    )
+    by_unit = pd.DataFrame(connection.execute(query).mappings().all(), columns=["pnl_unit"] + ROLLUP_MEASURES)
+    totals = {name: int(by_unit[name].sum()) for name in ("trades", "wins", "losses")}
+    totals["win_rate"] = round(totals["wins"] / totals["trades"], 4) if totals["trades"] else None
+    totals["by_unit"] = _records(_with_rates(by_unit)) if not by_unit.empty else []
+    return totals
+
+
+def query_strategy_totals(connection, rollup_table, start_date=None, end_date=None):
+    """
+    Totals, win rate and profit factor per Strategy_Name and PNL unit.
+
+    Returns:
+        list: One dictionary per strategy and PNL unit.
+    """
+    query = _filtered(
+        select(
+            rollup_table.c.Strategy_Name,
+            rollup_table.c.PNL_Unit.label("pnl_unit"),
+            *[func.sum(rollup_table.c[name]).label(name) for name in ROLLUP_MEASURES],
+        ).group_by(rollup_table.c.Strategy_Name, rollup_table.c.PNL_Unit),
+        rollup_table,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    totals = pd.DataFrame(connection.execute(query).mappings().all())
+    if totals.empty:
+        return []
+    totals = _with_rates(totals)
+    totals["profit_factor"] = (
+        totals["gross_profit"] / totals["gross_loss"].abs().where(totals["gross_loss"] != 0)
+    ).round(4)
+    return _records(totals)
+
+
+def query_exit_type_mix(connection, rollup_table, strategy=None, start_date=None, end_date=None):
+    """
+    Trade counts, share and PNL per exit type, option type and PNL unit.
+
+    Returns:
+        list: One dictionary per (Exit_Type, CE_PE, PNL unit); the shares are
+        of all the selected trades.
+    """
+    query = _filtered(
+        select(
+            rollup_table.c.Exit_Type,
+            rollup_table.c.CE_PE,
+            rollup_table.c.PNL_Unit.label("pnl_unit"),
+            func.sum(rollup_table.c.trades).label("trades"),
+            func.sum(rollup_table.c.pnl).label("pnl"),
+        ).group_by(rollup_table.c.Exit_Type, rollup_table.c.CE_PE, rollup_table.c.PNL_Unit),
+        rollup_table,
+        strategy,
+        start_date,
+        end_date,
+    )
+    mix = pd.DataFrame(connection.execute(query).mappings().all())
+    if mix.empty:
+        return []
+    mix["share"] = (mix["trades"] / mix["trades"].sum()).round(4)
+    return _records(mix)
@@ -15,59 +15,16 @@ Date: October 06, 2023
 import configparser
 import json
 import datetime
-import tempfile
-import psycopg2
+from contextlib import nullcontext
 import pandas as pd
-from rich.console import Console
-
-console = Console()
-
-
-def _query_db(dbname, query, verbose=True):
-    """
-    Query a PostgreSQL database and return the results as a Pandas DataFrame.
-
-    Parameters:
-        dbname (str): The name of the PostgreSQL database to connect to.
-        query (str): The SQL query to execute.
-        verbose (bool, optional): If True, print verbose connection and query information. Defaults to True.
-
-    Returns:
-        pd.DataFrame: A Pandas DataFrame containing the results of the SQL query.
-    """
-    if verbose:
-        console.log(f"Connecting to [red on black]{dbname}[/]", style="bold green")
-        console.log(f"Query: [magenta]{query}[/]")
-
-    # Database connection parameters
-    kwargs = {
-        "host": "localhost",
-        "database": dbname,
-        "user": "backtestuser",
-        "password": "BaCkTeSt@2019",
-        "port": 5432,
-    }
-
-    with psycopg2.connect(**kwargs) as conn:
-        with tempfile.TemporaryFile() as tmpfile:
-            head = True  # Indicate whether to include CSV header
-            # Construct the SQL command for copying data to a CSV file
-            copy_sql = (
-                f"COPY ({query}) TO STDOUT WITH CSV HEADER".format(query=query)
-                if head
-                else f"COPY ({query}) TO STDOUT WITH CSV".format(query=query)
-            )
-            cur = conn.cursor()
-            cur.copy_expert(copy_sql, tmpfile)
-            tmpfile.seek(0)
-            # Read the CSV data from the temporary file into a Pandas DataFrame
-            db_results = pd.read_csv(tmpfile)
-
-    # If the database name doesn't start with "fnodata" and verbose is True, print the results
-    if not dbname.startswith("fnodata") and verbose:
-        console.log(db_results)
-
-    return db_results
+from db_telemetry import TELEMETRY, configure_telemetry
+from market_data import query_db, query_shards
+from memory_budget import FNO_SCHEMA, plan_date_chunks
+from online_stats import OnlineStats
+from profiler import PROFILER, configure_profiler
+from results_sink import stream_results
+from shard_router import configure_shards
+from trigger_sweep import RunningLowIndex
 
 
 def generate_date_range(start_date, end_date):
@@ -103,7 +60,6 @@ def get_spot_close_price(row, entry_time, bnifty_df):
         spot_price = filtered_data.iloc[0]["tr_close"]
     else:
         spot_price = float("nan")  # Use NaN as a placeholder for missing data
-    print(spot_price)
     return spot_price
 
 def get_closest_strike_price(
@@ -184,13 +140,6 @@ def apply_entry_time_conditions(
 
         If a matching entry time is found, it is returned; otherwise, None is returned to indicate that no suitable entry time was found.
     """
-    print("NEW ENTRYYYYY TIMWe")
-    print(tr_date,
-    otype,
-    entry_time,
-    squareoff_time,
-    temp_entry_price,
-    strike_price)
     # finds the closest strike prices from the dataframe
     # print("STRIKE PRICE VALUES", closest_strike_price)
     find_entry_time = fnoieddf.loc[
@@ -201,8 +150,7 @@ def apply_entry_time_conditions(
         & (fnoieddf["strike_price"] == strike_price)
         & (fnoieddf["tr_low"]<=temp_entry_price)
     ]
-    print("--------------------------------------------ENTry-------FILTER------------------------")
-    print(find_entry_time)
+    PROFILER.debug_dump("ENTRY FILTER", find_entry_time)
     entry_time_new = None
     if not find_entry_time.empty:
         entry_time_new = find_entry_time.iloc[0]["tr_time"]
@@ -245,7 +193,7 @@ def apply_exit_conditions(
     exit_type = None
     exit_price = None
     exit_time = None
-    print(stoploss_target_sqoff_filter)
+    PROFILER.debug_dump("EXIT FILTER", stoploss_target_sqoff_filter)
     if not stoploss_target_sqoff_filter.empty:
         stoploss_target_sqoff = stoploss_target_sqoff_filter.iloc[
             0
@@ -319,57 +267,55 @@ def process_data_for_date(bnifty_df, fnoieddf,lotsize_df):
     stoploss_value = stoploss_target_combo[1][1]
     target_value = stoploss_target_combo[0][1]
 
-    find_close_price = (
-        fnoieddf.groupby(["tr_date", "otype"])
-        .apply(
-            lambda group: get_closest_strike_price(
-               group, ENTRY_TIME, CLOSEST_VAL,bnifty_df,TRIGGER_VAL
+    with PROFILER.stage("strike-select", rows_in=len(fnoieddf)) as stage:
+        find_close_price = (
+            fnoieddf.groupby(["tr_date", "otype"])
+            .apply(
+                lambda group: get_closest_strike_price(
+                   group, ENTRY_TIME, CLOSEST_VAL,bnifty_df,TRIGGER_VAL
+                )
             )
+            .reset_index(drop=True)
         )
-        .reset_index(drop=True)
-    )
-    print("FIND CLOSE PRICE")
-    print(find_close_price)
-    find_close_price["entry_time"] = find_close_price.apply(
-        lambda row: apply_entry_time_conditions(
-            row["tr_date"],
-            row["otype"],
-            ENTRY_TIME,
-            SQUAREOFF_TIME,
-            row["temp_entry_price"],
-            row["strike_price"],
-            fnoieddf,
-        ),
-        axis=1,
-        result_type="expand",
-    )
-    print()
-    print("FIND ENTRY TIME")
-    print(find_close_price)
+        stage["rows_out"] = len(find_close_price)
+    PROFILER.debug_dump("FIND CLOSE PRICE", find_close_price)
+    with PROFILER.stage("entry", rows_in=len(find_close_price)) as stage:
+        # One running-minimum index for the day instead of a frame scan per trade
+        entry_index = RunningLowIndex(fnoieddf, ENTRY_TIME, SQUAREOFF_TIME)
+        find_close_price["entry_time"] = [
+            entry_index.entry_times(tr_date, otype, strike_price, temp_entry_price)[0]
+            for tr_date, otype, strike_price, temp_entry_price in zip(
+                find_close_price["tr_date"],
+                find_close_price["otype"],
+                find_close_price["strike_price"],
+                find_close_price["temp_entry_price"],
+            )
+        ]
+        stage["rows_out"] = int(find_close_price["entry_time"].notna().sum())
+    PROFILER.debug_dump("FIND ENTRY TIME", find_close_price)
     find_close_price = find_close_price.assign(
         stoploss=find_close_price["temp_entry_price"] * stoploss_value,
         target=find_close_price["temp_entry_price"] * target_value
     )
-    print("stoploss")
-    print(find_close_price)
-    find_close_price[
-        ["exit_type", "exit_price", "exit_time"]
-    ] = find_close_price.apply(
-        lambda row: apply_exit_conditions(
-            row["tr_date"],
-            row["strike_price"],
-            row["otype"],
-            row["stoploss"],
-            row["target"],
-            row["entry_time"],
-            SQUAREOFF_TIME,
-            fnoieddf,
-        ),
-        axis=1,
-        result_type="expand",
-    )
-    print("--------------EXIT-------------CONDITIONS--------------")
-    print(find_close_price)
+    with PROFILER.stage("exit", rows_in=len(find_close_price)) as stage:
+        find_close_price[
+            ["exit_type", "exit_price", "exit_time"]
+        ] = find_close_price.apply(
+            lambda row: apply_exit_conditions(
+                row["tr_date"],
+                row["strike_price"],
+                row["otype"],
+                row["stoploss"],
+                row["target"],
+                row["entry_time"],
+                SQUAREOFF_TIME,
+                fnoieddf,
+            ),
+            axis=1,
+            result_type="expand",
+        )
+        stage["rows_out"] = int(find_close_price["exit_type"].notna().sum())
+    PROFILER.debug_dump("EXIT CONDITIONS", find_close_price)
     columns_to_drop = [
         "tr_open",
         "tr_high",
@@ -383,135 +329,266 @@ def process_data_for_date(bnifty_df, fnoieddf,lotsize_df):
     find_close_price = find_close_price.drop(
         columns=columns_to_drop, errors="ignore"
     )
-    print(find_close_price)
     del find_close_price["Index"]
     stoploss_accumulator = pd.DataFrame()
     # Filter 'find_close_price' DataFrame for 'STOPLOSS' rows
     stoploss_rows = find_close_price[(find_close_price["exit_type"] == "STOPLOSS")]
 
-    # Iterate through each unique date in the 'tr_date' column of 'stoploss_rows'
-    for date in stoploss_rows["tr_date"].unique():
-        # Filter 'stoploss_rows' for the current date and 'STOPLOSS' exit type
-        stoploss_rows_for_date = stoploss_rows[(stoploss_rows["tr_date"] == date)]
-
-        # Print information about the 'STOPLOSS' rows for the current date
-        print(f"----------------------------------------------------------------STOPLOSS ROWS for {date}----------------------------------------")
-        print(stoploss_rows_for_date)
-
-        # Check if there are any 'STOPLOSS' rows for the current date
-        if stoploss_rows_for_date.empty:
-            # Handle the case where there are no 'STOPLOSS' rows for the current date
-            print(f"No 'STOPLOSS' rows found for {date}.")
-            continue
-
-        # Process 'STOPLOSS' rows for the current date
-        for _, stoploss_row in stoploss_rows_for_date.iterrows():
-            new_entry_time_stop = stoploss_row["exit_time"]
-
-            stoploss_row["tr_time"] = apply_entry_time_conditions(
-                    stoploss_row["tr_date"],
-                    stoploss_row["otype"],
-                    new_entry_time_stop,
-                    SQUAREOFF_TIME,
-                    stoploss_row["temp_entry_price"],
-                    stoploss_row["strike_price"],
-                    fnoieddf,
+    with PROFILER.stage("re-entry", rows_in=len(stoploss_rows)) as stage:
+        # Iterate through each unique date in the 'tr_date' column of 'stoploss_rows'
+        for date in stoploss_rows["tr_date"].unique():
+            # Filter 'stoploss_rows' for the current date and 'STOPLOSS' exit type
+            stoploss_rows_for_date = stoploss_rows[(stoploss_rows["tr_date"] == date)]
+            PROFILER.debug_dump(f"STOPLOSS ROWS for {date}", stoploss_rows_for_date)
+
+            # Process 'STOPLOSS' rows for the current date
+            for _, stoploss_row in stoploss_rows_for_date.iterrows():
+                new_entry_time_stop = stoploss_row["exit_time"]
+
+                stoploss_row["tr_time"] = apply_entry_time_conditions(
+                        stoploss_row["tr_date"],
+                        stoploss_row["otype"],
+                        new_entry_time_stop,
+                        SQUAREOFF_TIME,
+                        stoploss_row["temp_entry_price"],
+                        stoploss_row["strike_price"],
+                        fnoieddf,
+                )
+                stoploss_row["stoploss"]=stoploss_row["temp_entry_price"] * stoploss_value
+                stoploss_row["target"]=stoploss_row["temp_entry_price"] * target_value
+                #Re-entry time is stored in trtime and u can differentiate which row is rentried
+                #based on the time 
+                if stoploss_row["tr_time"] is not None:
+                    stoploss_row[
+            ["exit_type", "exit_price", "exit_time"]
+        ] =  apply_exit_conditions(
+                stoploss_row["tr_date"],
+                stoploss_row["strike_price"],
+                stoploss_row["otype"],
+                stoploss_row["stoploss"],
+                stoploss_row["target"],
+                stoploss_row["tr_time"],
+                SQUAREOFF_TIME,
+                fnoieddf,
             )
-            stoploss_row["stoploss"]=stoploss_row["temp_entry_price"] * stoploss_value
-            stoploss_row["target"]=stoploss_row["temp_entry_price"] * target_value
-            #Re-entry time is stored in trtime and u can differentiate which row is rentried
-            #based on the time 
-            if stoploss_row["tr_time"] is not None:
-                stoploss_row[
-        ["exit_type", "exit_price", "exit_time"]
-    ] =  apply_exit_conditions(
-            stoploss_row["tr_date"],
-            stoploss_row["strike_price"],
-            stoploss_row["otype"],
-            stoploss_row["stoploss"],
-            stoploss_row["target"],
-            stoploss_row["tr_time"],
-            SQUAREOFF_TIME,
-            fnoieddf,
-        )
-            else:
-                continue
-            stoploss_row_df = pd.DataFrame([stoploss_row])
-            stoploss_accumulator = stoploss_accumulator.append(stoploss_row_df, ignore_index=True)
-            print(stoploss_row_df)
+                else:
+                    continue
+                stoploss_row_df = pd.DataFrame([stoploss_row])
+                stoploss_accumulator = stoploss_accumulator.append(stoploss_row_df, ignore_index=True)
+        stage["rows_out"] = len(stoploss_accumulator)
+    PROFILER.debug_dump("RE-ENTRY ROWS", stoploss_accumulator)
     # Finally, return the 'stoploss_row' DataFrame after processing
     combined_df = pd.concat([find_close_price, stoploss_accumulator], ignore_index=True)
     # Step 5: Add lot size column and prepare final DataFrame
-    find_exit_conditions = add_lotsize_column(lotsize_df, combined_df)
-    # Step 6: Adding Profit and Loss Column
-    find_exit_conditions["PNL"] = (
-        find_exit_conditions["temp_entry_price"] - find_exit_conditions["exit_price"]
-    ) * find_exit_conditions["lotsize"]
-    print("----------------------------------------------FINAL DATAFRAME------------------------------------------------------------------")
-    
+    with PROFILER.stage("lotsize", rows_in=len(combined_df)) as stage:
+        find_exit_conditions = add_lotsize_column(lotsize_df, combined_df)
+        # Step 6: Adding Profit and Loss Column
+        find_exit_conditions["PNL"] = (
+            find_exit_conditions["temp_entry_price"] - find_exit_conditions["exit_price"]
+        ) * find_exit_conditions["lotsize"]
+        stage["rows_out"] = len(find_exit_conditions)
+    PROFILER.debug_dump("FINAL DATAFRAME", find_exit_conditions)
+
     return  find_exit_conditions
 
 
 
-def main():
+def build_spot_query(start_date, end_date):
     """
-    Main function to execute the data processing and filtering.
-
-    Reads configuration, processes data, and saves the filtered data to a CSV file.
+    Build the spot query for the entry-time bar of every day in a date range.
     """
-    lotsize_df = pd.read_csv("LotSize_Data.csv")
-    lotsize_df.rename(columns={"Date": "tr_date"}, inplace=True)
-    lotsize_df["tr_date"] = pd.to_datetime(lotsize_df["tr_date"], format="%d-%m-%Y")
-    lotsize_df.rename(columns={"BankNifty": "Lot_Size"}, inplace=True)
-
-    start_date = datetime.datetime.strptime(START_DATE, "%Y-%m-%d")
-    end_date = datetime.datetime.strptime(END_DATE, "%Y-%m-%d")
-
-    # Generate a list of dates between start_date and end_date
-    date_range = generate_date_range(start_date, end_date)
-
-    # Create an empty list to accumulate DataFrames
-    data_2019 = []
-
-    # Loop through each date and process data
-    for date in date_range:
-        # Process data for the current date
-        query1 = f"""SELECT tr_date, tr_time, tr_close,stock_name
+    return f"""SELECT tr_date, tr_time, tr_close,stock_name
             FROM spot_indices_ieod_gdfl
             WHERE stock_name='{STOCK_NAME}' AND
-            tr_date='{date.strftime('%Y-%m-%d')}'
+            tr_date BETWEEN '{start_date}' AND '{end_date}'
             AND tr_time = '{ENTRY_TIME}'
             ORDER BY tr_date,tr_time ASC"""
-        db_results1 = _query_db("indices_spot_ieod", query1)
-        bnifty_df = pd.DataFrame(db_results1)
 
-        # Execute SQL query to select all columns
-        query2 = f"""SELECT  tr_date, tr_time, tr_open, tr_high, tr_low,
+
+def build_fno_query(start_date, end_date, otype=None):
+    """
+    Build the option bar query for a date range, optionally for one option type.
+    """
+    otype_filter = f"AND otype='{otype}'" if otype else ""
+    return f"""SELECT  tr_date, tr_time, tr_open, tr_high, tr_low,
         tr_close, stock_name,
         strike_price, otype FROM fnoieod_banknifty
         WHERE stock_name='{STOCK_NAME}' AND
-        tr_date='{date.strftime('%Y-%m-%d')}'
+        tr_date BETWEEN '{start_date}' AND '{end_date}'
         AND tr_time BETWEEN '{ENTRY_TIME}' AND '{SQUAREOFF_TIME}'
-        AND tr_segment=2 AND week_expiry=1 
+        AND tr_segment=2 AND week_expiry=1 {otype_filter}
         ORDER BY tr_date,tr_time ASC"""
 
-        # Create a DataFrame with all columns
-        db_results2 = _query_db("fnodata2019", query2)
-        fnoieddf = pd.DataFrame(db_results2)
-        print(fnoieddf)
-
-        if (bnifty_df.empty and fnoieddf.empty):
-            continue
-        data_for_date = process_data_for_date(bnifty_df, fnoieddf,lotsize_df)
-        # Append data_for_date to the list of DataFrames
-        data_2019.append(data_for_date)
-
-    # Concatenate all DataFrames into a single DataFrame
-    s0002_v2_2019 = pd.concat(data_2019, ignore_index=True)
-    print(s0002_v2_2019)
-  
+
+def count_rows_per_day(start_date, end_date):
+    """
+    Count the option bars of every trading day in a date range.
+
+    Returns:
+        dict: Trading date ('YYYY-MM-DD') to row count, in date order.
+    """
+    row_counts = query_shards(
+        lambda shard_start, shard_end: f"""SELECT tr_date, COUNT(*) AS row_count FROM fnoieod_banknifty
+        WHERE stock_name='{STOCK_NAME}' AND
+        tr_date BETWEEN '{shard_start}' AND '{shard_end}'
+        AND tr_time BETWEEN '{ENTRY_TIME}' AND '{SQUAREOFF_TIME}'
+        AND tr_segment=2 AND week_expiry=1
+        GROUP BY tr_date ORDER BY tr_date ASC""",
+        start_date,
+        end_date,
+        verbose=PROFILER.debug,
+    )
+    if row_counts.empty:
+        return {}
+    return dict(zip(row_counts["tr_date"].astype(str), row_counts["row_count"]))
+
+
+def load_lotsize_data(path="LotSize_Data.csv"):
+    """
+    Read the BankNifty lot sizes by date.
+
+    Returns:
+        pd.DataFrame: 'tr_date' and 'Lot_Size' columns.
+    """
+    lotsize_df = pd.read_csv(path)
+    lotsize_df.rename(columns={"Date": "tr_date"}, inplace=True)
+    lotsize_df["tr_date"] = pd.to_datetime(lotsize_df["tr_date"], format="%d-%m-%Y")
+    lotsize_df.rename(columns={"BankNifty": "Lot_Size"}, inplace=True)
+    return lotsize_df
+
+
+def iter_result_chunks(start_date, end_date, lotsize_df):
+    """
+    Run the backtest over a date range one memory-budgeted chunk at a time.
+
+    The date range is split into chunks sized to the configured memory budget
+    from the per-day row counts; a day that is over budget on its own is
+    fetched one option type at a time.
+
+    Parameters:
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        lotsize_df (pd.DataFrame): Lot sizes from `load_lotsize_data`.
+
+    Yields:
+        tuple: Number of chunks processed so far, number of chunks and the
+        results of the chunk (None when the chunk had no data).
+    """
+    rows_per_day = count_rows_per_day(start_date, end_date)
+    date_chunks = plan_date_chunks(
+        rows_per_day, FNO_SCHEMA, MEMORY_BUDGET_MB * 1024 * 1024, MAX_CHUNK_DAYS
+    )
+    for chunk_index, (chunk_start, chunk_end, split_by_otype) in enumerate(date_chunks):
+        # Stages of the whole chunk are recorded under its label, those of a day under the day
+        PROFILER.set_day(
+            chunk_start if chunk_start == chunk_end else f"{chunk_start}..{chunk_end}"
+        )
+        otypes = ["CE", "PE"] if split_by_otype else [None]
+        chunk_results = []
+        # The spot bars do not depend on the option type, so they are fetched once per chunk
+        with PROFILER.stage("fetch") as stage:
+            db_results1 = query_db(
+                "indices_spot_ieod",
+                build_spot_query(chunk_start, chunk_end),
+                verbose=PROFILER.debug,
+            )
+            bnifty_df = pd.DataFrame(db_results1)
+            stage["rows_out"] = len(bnifty_df)
+        for otype in otypes:
+            with PROFILER.stage("fetch") as stage:
+                # Create a DataFrame with all columns
+                # One query per yearly shard of the chunk, fetched in parallel
+                db_results2 = query_shards(
+                    lambda shard_start, shard_end: build_fno_query(shard_start, shard_end, otype),
+                    chunk_start,
+                    chunk_end,
+                    verbose=PROFILER.debug,
+                )
+                fnoieddf = pd.DataFrame(db_results2)
+                stage["rows_out"] = len(fnoieddf)
+            PROFILER.debug_dump("FNO DATA", fnoieddf)
+
+            if (bnifty_df.empty and fnoieddf.empty):
+                continue
+            # Process the chunk day by day, so every stage is profiled per trading day
+            for tr_date, day_fno in fnoieddf.groupby("tr_date", sort=True):
+                PROFILER.set_day(tr_date)
+                day_spot = bnifty_df[bnifty_df["tr_date"] == tr_date] if not bnifty_df.empty else bnifty_df
+                chunk_results.append(process_data_for_date(day_spot.copy(), day_fno.copy(), lotsize_df))
+            del fnoieddf
+        PROFILER.set_day("all")
+        yield (
+            chunk_index + 1,
+            len(date_chunks),
+            pd.concat(chunk_results, ignore_index=True) if chunk_results else None,
+        )
+
+
+def main():
+    """
+    Main function to execute the data processing and filtering.
+
+    Reads configuration, processes data, and saves the filtered data to a CSV file,
+    or with `sink = db` in the [output] section stores the trades directly in the
+    results database in one transaction.
+    The date range is fetched in chunks sized to the configured memory budget;
+    the database results, and the CSV results when more than one chunk is
+    needed, are written chunk by chunk instead of being accumulated in memory.
+    Performance statistics are accumulated chunk by chunk, printed as the run
+    progresses and written to the [online_stats] report at the end.
+    """
+    lotsize_df = load_lotsize_data()
+    stats = OnlineStats(STATS_ANNUALIZATION)
+
+    # Create an empty list to accumulate DataFrames
+    data_2019 = []
     output_csv_path = "S0002_v2_2019.csv"
-    s0002_v2_2019.to_csv(output_csv_path, index=False)
+    output_columns = None
+    rows_written = 0
+
+    # Loop through each chunk of dates and process data; the database sink
+    # stores every chunk as it comes, all of them in one transaction
+    with (
+        stream_results(STRATEGY_NAME, START_DATE, END_DATE) if RESULTS_SINK == "db" else nullcontext()
+    ) as write_db:
+        for chunk_number, chunk_count, data_for_date in iter_result_chunks(START_DATE, END_DATE, lotsize_df):
+            if data_for_date is None:
+                continue
+            stats.update(data_for_date)
+            print(f"[{chunk_number}/{chunk_count}] {stats.progress_line()}")
+            if write_db is not None:
+                PROFILER.debug_dump("S0002_v2 RESULTS", data_for_date)
+                with PROFILER.stage("write", rows_in=len(data_for_date)) as stage:
+                    stage["rows_out"] = write_db(data_for_date)
+                continue
+            if chunk_count == 1:
+                # Append data_for_date to the list of DataFrames
+                data_2019.append(data_for_date)
+                continue
+            # Stream the chunk's results to the CSV file
+            with PROFILER.stage("write", rows_in=len(data_for_date)) as stage:
+                if output_columns is None:
+                    output_columns = list(data_for_date.columns)
+                data_for_date.reindex(columns=output_columns).to_csv(
+                    output_csv_path,
+                    index=False,
+                    mode="a" if rows_written else "w",
+                    header=not rows_written,
+                )
+                rows_written += len(data_for_date)
+                stage["rows_out"] = len(data_for_date)
+
+    if data_2019:
+        # Concatenate all DataFrames into a single DataFrame
+        s0002_v2_2019 = pd.concat(data_2019, ignore_index=True)
+        PROFILER.debug_dump("S0002_v2 RESULTS", s0002_v2_2019)
+
+        with PROFILER.stage("write", rows_in=len(s0002_v2_2019)) as stage:
+            s0002_v2_2019.to_csv(output_csv_path, index=False)
+            stage["rows_out"] = len(s0002_v2_2019)
+    stats.write_report(STATS_OUTPUT)
+    PROFILER.write_summary(PROFILE_OUTPUT)
+    TELEMETRY.write_summary(TELEMETRY_OUTPUT)
 
 
 
@@ -529,5 +606,14 @@ if __name__ == "__main__":
     TR_SEGMENT = int(config.get("params", "tr_segment"))
     CLOSEST_VAL = int(config.get("params", "closest_val"))
     TRIGGER_VAL = float(config.get("params", "trigger_val"))
+    PROFILE_OUTPUT = configure_profiler(config)
+    TELEMETRY_OUTPUT = configure_telemetry(config)
+    configure_shards(config)
+    MEMORY_BUDGET_MB = config.getint("memory", "memory_budget_mb", fallback=2048)
+    MAX_CHUNK_DAYS = config.getint("memory", "max_chunk_days", fallback=20)
+    RESULTS_SINK = config.get("output", "sink", fallback="csv")
+    STRATEGY_NAME = config.get("output", "strategy_name", fallback="S0002_v2")
+    STATS_OUTPUT = config.get("online_stats", "report_output", fallback="S0002_v2_stats.json")
+    STATS_ANNUALIZATION = config.getint("online_stats", "annualization", fallback=252)
 
     main()
@@ -15,14 +15,16 @@ Date: September 15, 2023
 """
 import configparser
 import datetime
-import tempfile
 import decimal
 import json
-import psycopg2
 import pandas as pd
-from rich.console import Console
+from db_telemetry import TELEMETRY, configure_telemetry
+from market_data import query_db
+from profiler import PROFILER, configure_profiler
+from shard_router import SHARD_ROUTER, configure_shards
 
-console = Console()
+# Host of the PostgreSQL market data this script reads
+DB_HOST = "194.163.169.162"
 
 
 def get_spot_close_price(row, entry_time, bnifty_df):
@@ -47,7 +49,6 @@ def get_spot_close_price(row, entry_time, bnifty_df):
         spot_price = filtered_data_spot_price.iloc[0]["tr_close"]
     else:
         spot_price = None  # Use NaN as a placeholder for missing data
-    print(spot_price)
     return spot_price
 
 
@@ -243,35 +244,41 @@ def process_data_for_date(bnifty_df, fnoieddf, lotsize_df):
 
     # Step 1 grouping the date and otype  and applying to each row of
     # fnoieddf df and resetting indexes.
-    find_close_price = (
-        fnoieddf.groupby(["tr_date", "otype"])
-        .apply(
-            lambda group: get_closest_strike_price(
-                stoploss_value, target_value, group, ENTRY_TIME, CLOSEST_VAL
+    with PROFILER.stage("strike-select", rows_in=len(fnoieddf)) as stage:
+        find_close_price = (
+            fnoieddf.groupby(["tr_date", "otype"])
+            .apply(
+                lambda group: get_closest_strike_price(
+                    stoploss_value, target_value, group, ENTRY_TIME, CLOSEST_VAL
+                )
             )
+            .reset_index(drop=True)
         )
-        .reset_index(drop=True)
-    )
-    print(find_close_price)
+        stage["rows_out"] = len(find_close_price)
+    PROFILER.debug_dump("FIND CLOSE PRICE", find_close_price)
     # Step 2 EXIT CONDITION
-    find_close_price[
-        ["exit_type", "exit_price", "exit_time"]
-    ] = find_close_price.apply(
-        lambda row: apply_exit_conditions(
-            row["tr_date"],
-            row["otype"],
-            row["target"],
-            row["stoploss"],
-            ENTRY_TIME,
-            SQUAREOFF_TIME,
-            find_close_price,
-            fnoieddf,
-        ),
-        axis=1,
-        result_type="expand",
-    )
+    with PROFILER.stage("exit", rows_in=len(find_close_price)) as stage:
+        find_close_price[
+            ["exit_type", "exit_price", "exit_time"]
+        ] = find_close_price.apply(
+            lambda row: apply_exit_conditions(
+                row["tr_date"],
+                row["otype"],
+                row["target"],
+                row["stoploss"],
+                ENTRY_TIME,
+                SQUAREOFF_TIME,
+                find_close_price,
+                fnoieddf,
+            ),
+            axis=1,
+            result_type="expand",
+        )
+        stage["rows_out"] = int(find_close_price["exit_type"].notna().sum())
     # Step 3: Add lot size column and prepare final DataFrame
-    find_exit_conditions = add_lotsize_column(lotsize_df, find_close_price)
+    with PROFILER.stage("lotsize", rows_in=len(find_close_price)) as stage:
+        find_exit_conditions = add_lotsize_column(lotsize_df, find_close_price)
+        stage["rows_out"] = int(find_exit_conditions["lotsize"].notna().sum())
     # Step 4: Adding Profit and Loss Column
     # Convert the exit_price column to decimal.Decimal
     find_exit_conditions["exit_price"] = find_exit_conditions["exit_price"].apply(
@@ -315,57 +322,10 @@ def process_data_for_date(bnifty_df, fnoieddf, lotsize_df):
         columns=columns_to_drop, errors="ignore"
     )
     del find_exit_conditions["Index"]
-    print(find_exit_conditions)
+    PROFILER.debug_dump("FINAL DATAFRAME", find_exit_conditions)
     return find_exit_conditions
 
 
-def _query_db(dbname, query, verbose=True):
-    """
-    Query a PostgreSQL database and return the results as a Pandas DataFrame.
-
-    Parameters:
-        dbname (str): The name of the PostgreSQL database to connect to.
-        query (str): The SQL query to execute.
-        verbose (bool, optional): If True, print verbose connection and query information. Defaults to True.
-
-    Returns:
-        pd.DataFrame: A Pandas DataFrame containing the results of the SQL query.
-    """
-    if verbose:
-        console.log(f"Connecting to [red on black]{dbname}[/]", style="bold green")
-        console.log(f"Query: [magenta]{query}[/]")
-
-    # Database connection parameters
-    kwargs = {
-        "host": "194.163.169.162",
-        "database": dbname,
-        "user": "backtestuser",
-        "password": "BaCkTeSt@2019",
-        "port": 5432,
-    }
-
-    with psycopg2.connect(**kwargs) as conn:
-        with tempfile.TemporaryFile() as tmpfile:
-            head = True  # Indicate whether to include CSV header
-            # Construct the SQL command for copying data to a CSV file
-            copy_sql = (
-                f"COPY ({query}) TO STDOUT WITH CSV HEADER".format(query=query)
-                if head
-                else f"COPY ({query}) TO STDOUT WITH CSV".format(query=query)
-            )
-            cur = conn.cursor()
-            cur.copy_expert(copy_sql, tmpfile)
-            tmpfile.seek(0)
-            # Read the CSV data from the temporary file into a Pandas DataFrame
-            db_results = pd.read_csv(tmpfile)
-
-    # If the database name doesn't start with "fnodata" and verbose is True, print the results
-    if not dbname.startswith("fnodata") and verbose:
-        console.log(db_results)
-
-    return db_results
-
-
 def main():
     """
     Main function to execute the data processing and filtering.
@@ -389,6 +349,7 @@ def main():
 
     # Loop through each date and process data
     for date in date_range:
+        PROFILER.set_day(date)
         # Process data for the current date
         query1 = f"""SELECT tr_date, tr_time, tr_close,stock_name
             FROM spot_indices_ieod_gdfl
@@ -396,8 +357,6 @@ def main():
             tr_date='{date.strftime('%Y-%m-%d')}'
             AND tr_time = '{ENTRY_TIME}'
             ORDER BY tr_date,tr_time ASC"""
-        db_results1 = _query_db("indices_spot_ieod", query1)
-        bnifty_df = pd.DataFrame(db_results1)
 
         # Execute SQL query to select all columns
         query2 = f"""SELECT  tr_date, tr_time, tr_open, tr_high, tr_low,
@@ -409,10 +368,16 @@ def main():
         AND tr_segment=2 AND week_expiry=1 
         ORDER BY tr_date,tr_time ASC"""
 
-        # Create a DataFrame with all columns
-        db_results2 = _query_db("fnodata2019", query2)
-        fnoieddf = pd.DataFrame(db_results2)
-        print(fnoieddf)
+        with PROFILER.stage("fetch") as stage:
+            db_results1 = query_db("indices_spot_ieod", query1, verbose=PROFILER.debug, host=DB_HOST)
+            bnifty_df = pd.DataFrame(db_results1)
+            # Create a DataFrame with all columns
+            db_results2 = query_db(
+                SHARD_ROUTER.database_for(date), query2, verbose=PROFILER.debug, host=DB_HOST
+            )
+            fnoieddf = pd.DataFrame(db_results2)
+            stage["rows_out"] = len(bnifty_df) + len(fnoieddf)
+        PROFILER.debug_dump("FNO DATA", fnoieddf)
 
         if (bnifty_df.empty and fnoieddf.empty):
             continue
@@ -422,11 +387,16 @@ def main():
 
     # Concatenate all DataFrames into a single DataFrame
     s0002_v1_2019 = pd.concat(data_2019, ignore_index=True)
-    print(s0002_v1_2019)
+    PROFILER.set_day("all")
+    PROFILER.debug_dump("S0002_v1 RESULTS", s0002_v1_2019)
 
     # Output data to a single CSV file for all dates
     output_csv_path = "S0002_v1_2019.csv"
-    s0002_v1_2019.to_csv(output_csv_path, index=False)
+    with PROFILER.stage("write", rows_in=len(s0002_v1_2019)) as stage:
+        s0002_v1_2019.to_csv(output_csv_path, index=False)
+        stage["rows_out"] = len(s0002_v1_2019)
+    PROFILER.write_summary(PROFILE_OUTPUT)
+    TELEMETRY.write_summary(TELEMETRY_OUTPUT)
 
 
 if __name__ == "__main__":
@@ -442,5 +412,8 @@ if __name__ == "__main__":
     END_DATE = str(config.get("params", "end_date"))
     TR_SEGMENT = int(config.get("params", "tr_segment"))
     CLOSEST_VAL = int(config.get("params", "closest_val"))
+    PROFILE_OUTPUT = configure_profiler(config)
+    TELEMETRY_OUTPUT = configure_telemetry(config)
+    configure_shards(config)
 
     main()
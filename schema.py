@@ -0,0 +1,244 @@
+"""
+Results Table Schema
+
+Typed definition of the `strategy_1` results table:
+
+- DATE columns for pure dates and TIME columns for the entry/exit times,
+- small ENUMs for CE_PE, Trade_Type and Exit_Type,
+- composite indexes on (Entry_Date, Strategy_Name) and (Strategy_Name, Entry_Date)
+  so date and strategy filters no longer scan the whole table,
+- a unique natural key (Strategy_Name, Cycle_Id, Entry_Date, CE_PE) so
+  re-ingesting a workbook updates its trades instead of duplicating them;
+  Cycle_Id is NOT NULL because MySQL never treats NULLs in a unique key as
+  equal, and `fill_cycle_ids` derives it for trades that have none,
+- on MySQL, RANGE partitions by YEAR(Entry_Date).
+
+MySQL requires the partitioning column in every unique key, which is why
+Entry_Date is part of the primary key next to the auto-increment id (and of
+the natural key).
+Exit_Type, Lot_Size and PNL are new; rows migrated from the untyped table
+leave them NULL.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import pandas as pd
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    Float,
+    Index,
+    Integer,
+    String,
+    Table,
+    Time,
+    UniqueConstraint,
+    event,
+    inspect,
+)
+
+TABLE_NAME = "strategy_1"
+OPTION_TYPES = ("CE", "PE")
+TRADE_TYPES = ("BUY", "SELL")
+EXIT_TYPES = ("TARGET", "STOPLOSS", "SQOFF", "TRAILING", "TIMESTOP", "MTMSTOP")
+FIRST_PARTITION_YEAR = 2017
+LAST_PARTITION_YEAR = 2026
+NATURAL_KEY = ("Strategy_Name", "Cycle_Id", "Entry_Date", "CE_PE")
+INGESTED_FILES_TABLE_NAME = "ingested_files"
+
+
+def partition_ddl(table_name, first_year=FIRST_PARTITION_YEAR, last_year=LAST_PARTITION_YEAR):
+    """
+    Build the MySQL statement that range-partitions a table by Entry_Date year.
+
+    Parameters:
+        table_name (str): The table to partition.
+        first_year (int, optional): First year with its own partition.
+        last_year (int, optional): Last year with its own partition; later
+            years go into the catch-all `pmax` partition.
+
+    Returns:
+        str: The ALTER TABLE statement.
+    """
+    partitions = ",\n    ".join(
+        f"PARTITION p{year} VALUES LESS THAN ({year + 1})"
+        for year in range(first_year, last_year + 1)
+    )
+    return (
+        f"ALTER TABLE {table_name} PARTITION BY RANGE (YEAR(Entry_Date)) (\n"
+        f"    PARTITION p_old VALUES LESS THAN ({first_year}),\n"
+        f"    {partitions},\n"
+        f"    PARTITION pmax VALUES LESS THAN MAXVALUE\n)"
+    )
+
+
+def add_year_partition_ddl(table_name, year):
+    """
+    Build the MySQL statement that splits a new year out of the `pmax` partition.
+
+    Parameters:
+        table_name (str): The partitioned table.
+        year (int): The year that gets its own partition.
+
+    Returns:
+        str: The ALTER TABLE statement.
+    """
+    return (
+        f"ALTER TABLE {table_name} REORGANIZE PARTITION pmax INTO (\n"
+        f"    PARTITION p{year} VALUES LESS THAN ({year + 1}),\n"
+        f"    PARTITION pmax VALUES LESS THAN MAXVALUE\n)"
+    )
+
+
+def define_strategy_table(metadata, table_name=TABLE_NAME):
+    """
+    Define the typed results table on the given metadata.
+
+    Parameters:
+        metadata (MetaData): Metadata the table is attached to.
+        table_name (str, optional): Name of the table, e.g. a staging name
+            used while migrating.
+
+    Returns:
+        Table: The results table.
+    """
+    table = Table(
+        table_name,
+        metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("Strategy_Name", String(length=64)),
+        Column("Expiry_Date", Date),
+        Column("Stock", String(length=32)),
+        Column("Stock_Name", String(length=64)),
+        Column("Strike_Price", Float),
+        Column("CE_PE", Enum(*OPTION_TYPES, name="ce_pe")),
+        Column("Trade_Type", Enum(*TRADE_TYPES, name="trade_type")),
+        Column("Entry_Date", Date, primary_key=True),
+        Column("Entry_Time", Time),
+        Column("Entry_Price", Float),
+        Column("Exit_Date", Date),
+        Column("Exit_Time", Time),
+        Column("Exit_Price", Float),
+        Column("Exit_Type", Enum(*EXIT_TYPES, name="exit_type")),
+        Column("Lot_Size", Integer),
+        Column("PNL", Float),
+        Column("Cycle_Id", String(length=64), nullable=False),
+        Index(f"ix_{table_name}_entry_date_strategy", "Entry_Date", "Strategy_Name"),
+        Index(f"ix_{table_name}_strategy_entry_date", "Strategy_Name", "Entry_Date"),
+        UniqueConstraint(*NATURAL_KEY, name=f"uq_{table_name}_natural_key"),
+        mysql_engine="InnoDB",
+    )
+    event.listen(
+        table,
+        "after_create",
+        DDL(partition_ddl(table_name)).execute_if(dialect="mysql"),
+    )
+    return table
+
+
+def has_natural_key(engine, table_name=TABLE_NAME):
+    """
+    Check that a stored results table has the unique natural key the upserts rely on.
+
+    `create_all` leaves an existing table as it is, so a legacy table created
+    before this schema has no such key, and upserting into it inserts every
+    trade again.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine.
+        table_name (str, optional): The results table.
+
+    Returns:
+        bool: True if a unique constraint or index covers exactly `NATURAL_KEY`.
+    """
+    inspector = inspect(engine)
+    unique_keys = [constraint["column_names"] for constraint in inspector.get_unique_constraints(table_name)]
+    unique_keys += [index["column_names"] for index in inspector.get_indexes(table_name) if index.get("unique")]
+    return any(set(columns) == set(NATURAL_KEY) for columns in unique_keys)
+
+
+def fill_cycle_ids(frame):
+    """
+    Derive the Cycle_Id of the rows that have none.
+
+    As in `results_sink.map_results`, the trades of one strategy, day and
+    option type are numbered 1, 2, ... in row order, so loading the same rows
+    again derives the same ids and updates them instead of inserting them again.
+
+    Parameters:
+        frame (pd.DataFrame): Rows with the other natural key columns.
+
+    Returns:
+        pd.DataFrame: A copy whose missing Cycle_Ids are filled.
+    """
+    frame = frame.copy()
+    if "Cycle_Id" not in frame.columns:
+        frame["Cycle_Id"] = None
+    missing = frame["Cycle_Id"].isna()
+    if missing.any():
+        groups = [name for name in NATURAL_KEY if name != "Cycle_Id"]
+        numbers = (frame.groupby(groups, dropna=False).cumcount() + 1).astype(str)
+        frame["Cycle_Id"] = frame["Cycle_Id"].astype(object).where(~missing, numbers)
+    return frame
+
+
+def define_ingested_files_table(metadata):
+    """
+    Define the table that records which workbooks were already ingested.
+
+    Workbooks are identified by the SHA-256 of their content, so a renamed
+    copy of an ingested workbook is still recognised.
+
+    Parameters:
+        metadata (MetaData): Metadata the table is attached to.
+
+    Returns:
+        Table: The ingested files table.
+    """
+    return Table(
+        INGESTED_FILES_TABLE_NAME,
+        metadata,
+        Column("file_hash", String(length=64), primary_key=True),
+        Column("file_name", String(length=255)),
+        Column("rows_upserted", Integer),
+        Column("ingested_at", DateTime),
+        mysql_engine="InnoDB",
+    )
+
+
+def coerce_to_schema(frame):
+    """
+    Convert the columns of a results frame to the types of the typed table.
+
+    Dates become `datetime.date`, times become `datetime.time` (from
+    'HH:MM:SS' values), enum columns are upper-cased and values outside the
+    enum become NULL, and every missing value is turned into None.
+
+    Parameters:
+        frame (pd.DataFrame): Rows with some or all of the table's columns.
+
+    Returns:
+        pd.DataFrame: A converted copy with object columns.
+    """
+    frame = frame.copy()
+    for column in ("Expiry_Date", "Entry_Date", "Exit_Date"):
+        if column in frame.columns:
+            frame[column] = pd.to_datetime(frame[column], errors="coerce").dt.date
+    for column in ("Entry_Time", "Exit_Time"):
+        if column in frame.columns:
+            frame[column] = pd.to_datetime(
+                frame[column].astype(str), format="%H:%M:%S", errors="coerce"
+            ).dt.time
+    for column, allowed in (
+        ("CE_PE", OPTION_TYPES),
+        ("Trade_Type", TRADE_TYPES),
+        ("Exit_Type", EXIT_TYPES),
+    ):
+        if column in frame.columns:
+            values = frame[column].astype(str).str.strip().str.upper()
+            frame[column] = values.where(values.isin(allowed))
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None)
@@ -0,0 +1,105 @@
+"""
+Shard Router
+
+The option bars are stored in one PostgreSQL database per year ('fnodata2019',
+'fnodata2020', ...). This module maps trading dates onto those yearly shards:
+
+- `ShardRouter.database_for` names the shard of a single trading date,
+- `ShardRouter.split` cuts a date range at the year boundaries into one
+  sub-range per shard, in date order,
+- the database name pattern, per-year exceptions and the number of shards
+  fetched at the same time come from the [shards] section of 'config.ini'.
+
+The fetch itself is done by `market_data.query_shards`, which queries the
+shards of a range in parallel and merges them in time order.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+
+FNO_DATABASE_PATTERN = "fnodata{year}"
+SHARD_WORKERS = 4
+
+
+def _as_date(value):
+    """Parse 'YYYY-MM-DD' strings; dates and datetimes are returned as dates."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+class ShardRouter:
+    """
+    Maps trading dates onto the yearly option bar databases.
+
+    Attributes:
+        database_pattern (str): Database name with a '{year}' placeholder.
+        overrides (dict): Year -> database name, for years that do not follow
+            the pattern.
+        max_workers (int): Number of shards fetched at the same time.
+    """
+
+    def __init__(self, database_pattern=FNO_DATABASE_PATTERN, overrides=None, max_workers=SHARD_WORKERS):
+        self.database_pattern = database_pattern
+        self.overrides = dict(overrides or {})
+        self.max_workers = max_workers
+
+    def database_for(self, tr_date):
+        """
+        Name the database holding the option bars of a trading date.
+
+        Parameters:
+            tr_date (str or date): The trading date ('YYYY-MM-DD').
+
+        Returns:
+            str: The database name.
+        """
+        year = _as_date(tr_date).year
+        return self.overrides.get(year, self.database_pattern.format(year=year))
+
+    def split(self, start_date, end_date):
+        """
+        Split a date range into one sub-range per shard.
+
+        Parameters:
+            start_date (str or date): First trading date ('YYYY-MM-DD').
+            end_date (str or date): Last trading date ('YYYY-MM-DD').
+
+        Returns:
+            list: (database, first date, last date) per shard in date order,
+            with the dates as 'YYYY-MM-DD' strings. Empty when the range is.
+        """
+        first_date = _as_date(start_date)
+        last_date = _as_date(end_date)
+        shards = []
+        while first_date <= last_date:
+            shard_end = min(datetime.date(first_date.year, 12, 31), last_date)
+            shards.append((self.database_for(first_date), first_date.isoformat(), shard_end.isoformat()))
+            first_date = shard_end + datetime.timedelta(days=1)
+        return shards
+
+
+SHARD_ROUTER = ShardRouter()
+
+
+def configure_shards(config):
+    """
+    Configure the shared router from the [shards] section of a config.
+
+    Besides `fno_database` and `max_workers`, every option named after a year
+    (e.g. `2024 = fnodata2024_v2`) overrides the database of that year.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+    """
+    SHARD_ROUTER.database_pattern = config.get("shards", "fno_database", fallback=FNO_DATABASE_PATTERN)
+    SHARD_ROUTER.max_workers = config.getint("shards", "max_workers", fallback=SHARD_WORKERS)
+    if config.has_section("shards"):
+        SHARD_ROUTER.overrides = {
+            int(option): value.strip()
+            for option, value in config.items("shards")
+            if option.isdigit()
+        }
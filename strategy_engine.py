@@ -0,0 +1,960 @@
+"""
+Strategy Engine
+
+A common engine for the intraday option-selling backtests. The s0001/s0002
+scripts each load the same bars and re-implement the same strike selection,
+entry, exit and lot size steps with DataFrame filters; the engine loads the
+bars of a date range once, indexes every day once, and hands the indexed day
+to every registered strategy in a single pass.
+
+- `DayBars` holds one day's option bars sorted by (otype, strike_price,
+  tr_time) as NumPy arrays, with the offsets of every (otype, strike) series,
+  plus the spot closes by time. Looking up a series or a time inside it is a
+  dictionary lookup and a binary search instead of a scan of the day.
+- `Strategy` is the pluggable interface. A strategy is made of four rules,
+  each a method a subclass can override: `select_strike`, `find_entry`,
+  `find_exit` and `reentry_time`.
+- `multi_leg.MultiLegStrategy` positions (straddles, strangles, condors) are
+  run a chunk of days at a time, with their exits found on aligned arrays of
+  all their legs and days.
+- A bar reaching both the target and the stoploss is flagged in the
+  'exit_resolution' column and, with an `exit_resolver.AmbiguityResolver`,
+  settled with finer-grained bars of that minute.
+- `run_day` runs every strategy over one day; `run_strategies` fetches a date
+  range chunk by chunk and runs every strategy over every day;
+  `run_underlyings` does so for several underlyings concurrently. Both can
+  also stream the per-minute MTM of every leg to disk with `mtm.MTMWriter`,
+  and read the bars from memory-mapped `bar_store.BarStore` files instead of
+  the database.
+
+The result frames have the columns of the s0002_v2 pipeline, so they can be
+written with `results_sink.write_results`.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import configparser
+import datetime
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from bar_store import BarStore
+from exit_resolver import configure_resolver
+from exit_rules import apply_mtm_stop, time_stop_position, trailing_stop_levels
+from market_data import fetch_bars, parse_underlyings
+from mtm import MTMWriter, day_mtm
+from multi_leg import multi_leg_strategies_from_config
+from profiler import PROFILER, StageProfiler, configure_profiler
+
+RESULT_COLUMNS = [
+    "tr_date",
+    "tr_time",
+    "stock_name",
+    "strike_price",
+    "otype",
+    "side",
+    "spot_price",
+    "temp_entry_price",
+    "entry_time",
+    "stoploss",
+    "target",
+    "exit_type",
+    "exit_price",
+    "exit_time",
+    "exit_resolution",
+    "lotsize",
+    "PNL",
+]
+
+
+class BarSeries:
+    """
+    The bars of one option contract on one day, in time order.
+
+    Attributes:
+        times (np.ndarray): Bar times as 'HH:MM:SS' strings.
+        open, high, low, close (np.ndarray): Bar prices.
+        otype (str): Option type of the contract.
+        strike_price (float): Strike of the contract.
+    """
+
+    def __init__(self, times, open_, high, low, close, otype=None, strike_price=None):
+        self.otype = otype
+        self.strike_price = strike_price
+        self.times = times
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+
+    def index_at(self, bar_time):
+        """Position of the bar at exactly `bar_time`, or None."""
+        position = int(np.searchsorted(self.times, bar_time, side="left"))
+        if position < len(self.times) and self.times[position] == bar_time:
+            return position
+        return None
+
+    def window(self, after_time, until_time, include_until=True):
+        """Slice of the bars after `after_time` and up to `until_time`."""
+        start = int(np.searchsorted(self.times, after_time, side="right"))
+        stop = int(np.searchsorted(self.times, until_time, side="right" if include_until else "left"))
+        return slice(start, max(start, stop))
+
+
+class DayBars:
+    """
+    One trading day of option and spot bars, indexed for the strategies.
+
+    Attributes:
+        tr_date (str): The trading date ('YYYY-MM-DD').
+        stock_name (str): The underlying.
+        offsets (dict): (otype, strike_price) -> (start, stop) into the arrays.
+        spot_close (dict): Bar time -> spot close.
+    """
+
+    def __init__(self, tr_date, spot_df, fno_df):
+        self.tr_date = tr_date
+        self.stock_name = fno_df["stock_name"].iloc[0] if not fno_df.empty else None
+        bars = fno_df.sort_values(["otype", "strike_price", "tr_time"], kind="stable")
+        self.otype = bars["otype"].to_numpy()
+        self.strike_price = bars["strike_price"].to_numpy()
+        self.times = bars["tr_time"].astype(str).to_numpy()
+        self.open = bars["tr_open"].to_numpy(dtype=float)
+        self.high = bars["tr_high"].to_numpy(dtype=float)
+        self.low = bars["tr_low"].to_numpy(dtype=float)
+        self.close = bars["tr_close"].to_numpy(dtype=float)
+        self.spot_close = dict(zip(spot_df["tr_time"].astype(str), spot_df["tr_close"]))
+        self._index_series()
+
+    @classmethod
+    def from_store(cls, store, tr_date, start_time="00:00:00", end_time="23:59:59"):
+        """
+        Index one day of a `bar_store.BarStore` straight from its memory-mapped
+        columns, which are already in (otype, strike_price, tr_time) order, so
+        no DataFrame is built and nothing is sorted.
+
+        Parameters:
+            store (BarStore): The open store.
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            start_time (str, optional): First bar time ('HH:MM:SS').
+            end_time (str, optional): Last bar time ('HH:MM:SS').
+
+        Returns:
+            DayBars or None: The day, or None if it is not stored.
+        """
+        arrays = store.day_arrays(tr_date, start_time, end_time)
+        if arrays is None:
+            return None
+        day = cls.__new__(cls)
+        day.tr_date = tr_date
+        day.stock_name = store.stock_name if len(arrays["tr_time"]) else None
+        day.otype = arrays["otype"].astype(str)
+        day.strike_price = arrays["strike_price"]
+        day.times = arrays["tr_time"].astype(str)
+        day.open = arrays["tr_open"]
+        day.high = arrays["tr_high"]
+        day.low = arrays["tr_low"]
+        day.close = arrays["tr_close"]
+        day.spot_close = dict(zip(arrays["spot_tr_time"].astype(str), arrays["spot_tr_close"].tolist()))
+        day._index_series()
+        return day
+
+    def _index_series(self):
+        """Find the (start, stop) offsets of every (otype, strike_price) series."""
+        # A new series starts wherever the (otype, strike_price) key changes
+        if len(self.times):
+            changes = np.flatnonzero(
+                (self.otype[1:] != self.otype[:-1]) | (self.strike_price[1:] != self.strike_price[:-1])
+            ) + 1
+            starts = np.concatenate(([0], changes))
+            stops = np.concatenate((changes, [len(self.times)]))
+        else:
+            starts = stops = np.array([], dtype=int)
+        self.offsets = {
+            (self.otype[start], self.strike_price[start]): (int(start), int(stop))
+            for start, stop in zip(starts, stops)
+        }
+
+    def series(self, otype, strike_price):
+        """
+        Get the bars of one contract.
+
+        Returns:
+            BarSeries or None: The contract's bars, or None if it did not trade.
+        """
+        if (otype, strike_price) not in self.offsets:
+            return None
+        start, stop = self.offsets[(otype, strike_price)]
+        return BarSeries(
+            self.times[start:stop],
+            self.open[start:stop],
+            self.high[start:stop],
+            self.low[start:stop],
+            self.close[start:stop],
+            otype,
+            strike_price,
+        )
+
+    def chain_at(self, otype, bar_time):
+        """
+        The option chain of one option type at one bar time.
+
+        Returns:
+            tuple: Strike prices and closes of the contracts with a bar at
+            `bar_time`, in strike order.
+        """
+        mask = (self.otype == otype) & (self.times == bar_time)
+        return self.strike_price[mask], self.close[mask]
+
+
+class Strategy:
+    """
+    A pluggable intraday option-selling strategy.
+
+    The default rules sell the selected strike at the close of the entry bar,
+    exit at a target or stoploss (multiples of the entry price) or at the
+    square-off bar, and never re-enter. Subclasses override the rules that
+    differ.
+
+    Attributes:
+        name (str): Strategy_Name of the strategy's trades.
+        entry_time (str): Time of the strike selection bar ('HH:MM:SS').
+        squareoff_time (str): Time of the square-off bar.
+        target_value (float): Target as a multiple of the entry price.
+        stoploss_value (float): Stoploss as a multiple of the entry price.
+        otypes (tuple): Option types traded every day.
+        stoploss_first (bool): Whether a bar touching both levels is a stoploss
+            when the resolver cannot tell.
+        resolver (AmbiguityResolver): Settles bars touching both levels, or None.
+        trail_value (float): Trailing stop as a multiple of the running low, or None.
+        time_stop_minutes (int): Minutes after which an open trade is closed, or None.
+        mtm_stop (float): Combined loss of the day that closes all legs, or None.
+        mtm_target (float): Combined profit of the day that closes all legs, or None.
+    """
+
+    stoploss_first = False
+
+    def __init__(self, name, entry_time, squareoff_time, target_value, stoploss_value, otypes=("CE", "PE"),
+                 resolver=None, trail_value=None, time_stop_minutes=None, mtm_stop=None, mtm_target=None):
+        self.name = name
+        self.resolver = resolver
+        self.trail_value = trail_value
+        self.time_stop_minutes = time_stop_minutes
+        self.mtm_stop = mtm_stop
+        self.mtm_target = mtm_target
+        self.entry_time = entry_time
+        self.squareoff_time = squareoff_time
+        self.target_value = target_value
+        self.stoploss_value = stoploss_value
+        self.otypes = otypes
+
+    def select_strike(self, day, otype):
+        """
+        Strike selection rule.
+
+        Returns:
+            tuple or None: The strike price and its close at the entry bar.
+        """
+        raise NotImplementedError
+
+    def find_entry(self, day, series, reference_price, after_time):
+        """
+        Entry rule: by default the trade is entered at the close of the entry bar.
+
+        Parameters:
+            day (DayBars): The day.
+            series (BarSeries): Bars of the selected contract.
+            reference_price (float): Close of the contract at the entry bar.
+            after_time (str or None): None for the first entry, otherwise the
+                time after which a re-entry may happen.
+
+        Returns:
+            tuple or None: Entry time and entry price.
+        """
+        if after_time is not None:
+            return None
+        return self.entry_time, reference_price
+
+    def find_exit(self, day, series, entry_time, entry_price):
+        """
+        Exit rule: the first bar after the entry that reaches the target or the
+        stoploss (trailing the running low with `trail_value`), otherwise the
+        close of the bar `time_stop_minutes` after the entry, otherwise the
+        close of the square-off bar.
+
+        Returns:
+            tuple: Exit type, exit price, exit time (all None when the contract
+            has no bar left to exit on) and how a bar touching both levels was
+            settled ('FINE' by the resolver, 'RULE' by `stoploss_first`, None
+            when the exit bar was not ambiguous).
+        """
+        target = entry_price * self.target_value
+        stoploss = entry_price * self.stoploss_value
+        window = series.window(entry_time, self.squareoff_time)
+        times = series.times[window]
+        stop_levels = np.full(len(times), stoploss)
+        if self.trail_value is not None:
+            stop_levels = trailing_stop_levels(series.low[window], entry_price, stoploss, self.trail_value)
+        hit_target = series.low[window] <= target
+        hit_stoploss = series.high[window] >= stop_levels
+        hits = np.flatnonzero(hit_target | hit_stoploss)
+        time_stop = None
+        if self.time_stop_minutes is not None:
+            time_stop = time_stop_position(times, entry_time, self.time_stop_minutes)
+            if time_stop is not None and times[time_stop] >= self.squareoff_time:
+                time_stop = None
+        if len(hits) and (time_stop is None or hits[0] <= time_stop):
+            position = hits[0]
+            exit_time = times[position]
+            stop_level = stop_levels[position]
+            resolution = None
+            exit_type = "STOPLOSS" if hit_stoploss[position] else "TARGET"
+            if hit_stoploss[position] and hit_target[position]:
+                resolution = "RULE"
+                if self.resolver is not None:
+                    resolved = self.resolver.resolve(
+                        day.stock_name, day.tr_date, series.strike_price, series.otype, exit_time, target, stop_level
+                    )
+                    if resolved is not None:
+                        exit_type = resolved
+                        resolution = "FINE"
+                if resolution == "RULE":
+                    exit_type = "STOPLOSS" if self.stoploss_first else "TARGET"
+            if exit_type == "STOPLOSS":
+                return "STOPLOSS" if stop_level >= stoploss else "TRAILING", stop_level, exit_time, resolution
+            return "TARGET", target, exit_time, resolution
+        if time_stop is not None:
+            return "TIMESTOP", series.close[window][time_stop], times[time_stop], None
+        sqoff_index = series.index_at(self.squareoff_time)
+        if sqoff_index is not None:
+            return "SQOFF", series.close[sqoff_index], self.squareoff_time, None
+        return None, None, None, None
+
+    def reentry_time(self, trade, reentries):
+        """
+        Re-entry rule: by default there is no re-entry.
+
+        Parameters:
+            trade (dict): The trade that just closed.
+            reentries (int): Re-entries already made for this leg.
+
+        Returns:
+            str or None: Time after which to look for a re-entry.
+        """
+        return None
+
+    def reentry_strike(self, day, otype, after_time, current):
+        """
+        Strike rule of a re-entry: by default the leg re-enters the same strike.
+
+        Parameters:
+            day (DayBars): The day.
+            otype (str): 'CE' or 'PE'.
+            after_time (str): Time returned by `reentry_time`.
+            current (tuple): Strike price and reference price of the closed trade.
+
+        Returns:
+            tuple or None: Strike price and reference price of the re-entry,
+            or None when there is nothing to re-enter.
+        """
+        return current
+
+
+class ClosestPremiumStrategy(Strategy):
+    """
+    Sells the strike whose premium at the entry bar is closest to
+    `closest_val` (s2_v1_db).
+    """
+
+    def __init__(self, name, entry_time, squareoff_time, target_value, stoploss_value, closest_val, **kwargs):
+        super().__init__(name, entry_time, squareoff_time, target_value, stoploss_value, **kwargs)
+        self.closest_val = closest_val
+
+    def select_strike(self, day, otype):
+        strikes, closes = day.chain_at(otype, self.entry_time)
+        if not len(strikes):
+            return None
+        position = int(np.argmin(np.abs(closes - self.closest_val)))
+        return strikes[position], closes[position]
+
+
+class MinPremiumStrategy(Strategy):
+    """
+    Sells the cheapest strike whose premium at the entry bar is at least
+    `min_premium`, and after a stoploss re-enters once at the close of the
+    stoploss bar, selecting the strike again at that bar (s0001_v3).
+    """
+
+    def __init__(self, name, entry_time, squareoff_time, target_value, stoploss_value, min_premium=200,
+                 max_reentries=1, **kwargs):
+        super().__init__(name, entry_time, squareoff_time, target_value, stoploss_value, **kwargs)
+        self.min_premium = min_premium
+        self.max_reentries = max_reentries
+
+    def select_strike(self, day, otype, bar_time=None):
+        strikes, closes = day.chain_at(otype, bar_time or self.entry_time)
+        eligible = np.flatnonzero(closes >= self.min_premium)
+        if not len(eligible):
+            return None
+        position = eligible[np.argmin(closes[eligible])]
+        return strikes[position], closes[position]
+
+    def find_entry(self, day, series, reference_price, after_time):
+        if after_time is None:
+            return self.entry_time, reference_price
+        return after_time, reference_price
+
+    def reentry_time(self, trade, reentries):
+        if trade["exit_type"] == "STOPLOSS" and reentries < self.max_reentries:
+            return trade["exit_time"]
+        return None
+
+    def reentry_strike(self, day, otype, after_time, current):
+        return self.select_strike(day, otype, after_time)
+
+
+class SpotStrikeStrategy(Strategy):
+    """
+    Sells the strike at the spot close rounded down to `strike_step` (s0001_v1).
+    """
+
+    def __init__(self, name, entry_time, squareoff_time, target_value, stoploss_value, strike_step=100, **kwargs):
+        super().__init__(name, entry_time, squareoff_time, target_value, stoploss_value, **kwargs)
+        self.strike_step = strike_step
+
+    def select_strike(self, day, otype):
+        spot = day.spot_close.get(self.entry_time)
+        if spot is None:
+            return None
+        strike_price = (spot // self.strike_step) * self.strike_step
+        series = day.series(otype, strike_price)
+        if series is None or series.index_at(self.entry_time) is None:
+            return None
+        return strike_price, series.close[series.index_at(self.entry_time)]
+
+
+class PremiumReentryStrategy(ClosestPremiumStrategy):
+    """
+    Sells the strike closest to `closest_val` once it trades down to
+    `trigger_val` times its entry-bar premium, exits with the stoploss checked
+    first, and re-enters at the same price after a stoploss (s0002_v2).
+    """
+
+    stoploss_first = True
+
+    def __init__(self, name, entry_time, squareoff_time, target_value, stoploss_value, closest_val,
+                 trigger_val, max_reentries=1, **kwargs):
+        super().__init__(name, entry_time, squareoff_time, target_value, stoploss_value, closest_val, **kwargs)
+        self.trigger_val = trigger_val
+        self.max_reentries = max_reentries
+
+    def find_entry(self, day, series, reference_price, after_time):
+        entry_price = reference_price * self.trigger_val
+        window = series.window(after_time or self.entry_time, self.squareoff_time, include_until=False)
+        fills = np.flatnonzero(series.low[window] <= entry_price)
+        if not len(fills):
+            return None
+        return series.times[window][fills[0]], entry_price
+
+    def reentry_time(self, trade, reentries):
+        if trade["exit_type"] == "STOPLOSS" and reentries < self.max_reentries:
+            return trade["exit_time"]
+        return None
+
+
+def read_lot_sizes(lot_size_column, path="LotSize_Data.csv"):
+    """
+    Read the lot sizes of one underlying by trading date.
+
+    Parameters:
+        lot_size_column (str): Column of the underlying in the lot size file,
+            e.g. 'BankNifty'.
+        path (str, optional): The lot size file, with DD-MM-YYYY dates in 'Date'.
+
+    Returns:
+        dict: Trading date ('YYYY-MM-DD') -> lot size.
+    """
+    lotsize_df = pd.read_csv(path)
+    dates = pd.to_datetime(lotsize_df["Date"], format="%d-%m-%Y").dt.strftime("%Y-%m-%d")
+    return dict(zip(dates, lotsize_df[lot_size_column]))
+
+
+def run_day(day, strategies, lot_size=None):
+    """
+    Run every strategy over one indexed day.
+
+    Parameters:
+        day (DayBars): The day.
+        strategies (list): `Strategy` instances.
+        lot_size (float, optional): Lot size of the day.
+
+    Returns:
+        dict: Strategy name -> list of trades (one dict per trade with the
+        `RESULT_COLUMNS`).
+    """
+    trades = {strategy.name: [] for strategy in strategies}
+    for strategy in strategies:
+        for otype in strategy.otypes:
+            selected = strategy.select_strike(day, otype)
+            if selected is None:
+                continue
+            strike_price, reference_price = selected
+            series = day.series(otype, strike_price)
+            after_time = None
+            reentries = 0
+            while True:
+                entry = strategy.find_entry(day, series, reference_price, after_time)
+                if entry is None:
+                    break
+                entry_time, entry_price = entry
+                exit_type, exit_price, exit_time, exit_resolution = strategy.find_exit(
+                    day, series, entry_time, entry_price
+                )
+                trade = {
+                    "tr_date": day.tr_date,
+                    "tr_time": entry_time,
+                    "stock_name": day.stock_name,
+                    "strike_price": strike_price,
+                    "otype": otype,
+                    "side": "SELL",
+                    "spot_price": day.spot_close.get(strategy.entry_time),
+                    "temp_entry_price": entry_price,
+                    "entry_time": entry_time,
+                    "stoploss": entry_price * strategy.stoploss_value,
+                    "target": entry_price * strategy.target_value,
+                    "exit_type": exit_type,
+                    "exit_price": exit_price,
+                    "exit_time": exit_time,
+                    "exit_resolution": exit_resolution,
+                    "lotsize": lot_size,
+                    "PNL": (
+                        (entry_price - exit_price) * lot_size
+                        if exit_price is not None and lot_size is not None else None
+                    ),
+                }
+                trades[strategy.name].append(trade)
+                after_time = strategy.reentry_time(trade, reentries) if exit_type else None
+                if after_time is None:
+                    break
+                reselected = strategy.reentry_strike(day, otype, after_time, (strike_price, reference_price))
+                if reselected is None:
+                    break
+                if reselected[0] != strike_price:
+                    strike_price = reselected[0]
+                    series = day.series(otype, strike_price)
+                reference_price = reselected[1]
+                reentries += 1
+        if strategy.mtm_stop is not None or strategy.mtm_target is not None:
+            trades[strategy.name] = apply_mtm_stop(
+                day, trades[strategy.name], strategy.mtm_stop, strategy.mtm_target
+            )
+    return trades
+
+
+# Strategies of a worker process of `run_underlyings`, set once by `init_worker`
+_WORKER_STRATEGIES = None
+# Bar stores opened by this process, by path, so a worker maps every store once
+_OPEN_STORES = {}
+
+
+def init_worker(strategies):
+    """
+    Keep the strategies in a worker process for every chunk it runs.
+
+    The strategies are unpickled once per process, so they share one copy of
+    their resolver, and its cache of fine bars, for the whole run.
+
+    Parameters:
+        strategies (list): `Strategy` and `MultiLegStrategy` instances.
+    """
+    global _WORKER_STRATEGIES
+    _WORKER_STRATEGIES = strategies
+
+
+def open_store(path):
+    """
+    Open a bar store once per process.
+
+    Parameters:
+        path (str): Directory of the store.
+
+    Returns:
+        BarStore: The store mapped by this process.
+    """
+    if path not in _OPEN_STORES:
+        _OPEN_STORES[path] = BarStore(path)
+    return _OPEN_STORES[path]
+
+
+def chunk_ranges(start_date, end_date, chunk_days):
+    """
+    Split a date range into chunks of calendar days.
+
+    Parameters:
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        chunk_days (int): Calendar days per chunk.
+
+    Returns:
+        list: (first date, last date) of every chunk, as dates.
+    """
+    ranges = []
+    chunk_start = datetime.date.fromisoformat(start_date)
+    last_date = datetime.date.fromisoformat(end_date)
+    while chunk_start <= last_date:
+        chunk_end = min(chunk_start + datetime.timedelta(days=chunk_days - 1), last_date)
+        ranges.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + datetime.timedelta(days=1)
+    return ranges
+
+
+def index_days(spot_df, fno_df):
+    """
+    Index every day of fetched spot and option bars.
+
+    Returns:
+        list: One `DayBars` per trading date with option bars, in date order.
+    """
+    spot_by_date = dict(tuple(spot_df.groupby(spot_df["tr_date"].astype(str))))
+    return [
+        DayBars(tr_date, spot_by_date.get(tr_date, spot_df.iloc[:0]), day_bars)
+        for tr_date, day_bars in fno_df.groupby(fno_df["tr_date"].astype(str))
+    ]
+
+
+def store_days(store, start_date, end_date, start_time, end_time):
+    """
+    Index every stored day of a date range straight from a bar store.
+
+    Returns:
+        list: One `DayBars` per trading date with option bars, in date order.
+    """
+    first = np.searchsorted(store.dates, str(start_date).encode(), side="left")
+    last = np.searchsorted(store.dates, str(end_date).encode(), side="right")
+    days = [DayBars.from_store(store, tr_date.decode(), start_time, end_time) for tr_date in store.dates[first:last]]
+    return [day for day in days if day is not None and len(day.times)]
+
+
+def load_days(stock_name, chunk_start, chunk_end, first_time, last_time, fno_table="fnoieod_banknifty",
+              bar_store=None):
+    """
+    Fetch and index the days of one chunk, from the database or a bar store.
+
+    Parameters:
+        stock_name (str): The underlying.
+        chunk_start (date): First trading date of the chunk.
+        chunk_end (date): Last trading date of the chunk.
+        first_time (str): First bar time ('HH:MM:SS').
+        last_time (str): Last bar time ('HH:MM:SS').
+        fno_table (str, optional): Option bar table of the underlying.
+        bar_store (BarStore, optional): Reads the bars from this store instead
+            of the database.
+
+    Returns:
+        list: One `DayBars` per trading date, in date order.
+    """
+    with PROFILER.stage("fetch") as stage:
+        if bar_store is not None:
+            days = store_days(bar_store, chunk_start.isoformat(), chunk_end.isoformat(), first_time, last_time)
+        else:
+            days = index_days(*fetch_bars(
+                stock_name, chunk_start, chunk_end, first_time, last_time, fno_table, verbose=PROFILER.debug
+            ))
+        stage["rows_out"] = sum(len(day.times) for day in days)
+    return days
+
+
+def run_chunk(strategies, spot_df, fno_df, lot_sizes, with_mtm=False, store_range=None):
+    """
+    Index every day of a fetched chunk and run every strategy over it.
+
+    Runs in the calling process or in a worker process of `run_underlyings`.
+    With a `store_range`, the chunk is read from a bar store by this process:
+    only the path and the range are sent to a worker, which maps the store
+    and indexes its days from the memory-mapped columns.
+
+    Parameters:
+        strategies (list): `Strategy` and `MultiLegStrategy` instances, or
+            None for the strategies of the worker process (`init_worker`).
+        spot_df (pd.DataFrame): Spot bars of the chunk, or None with a
+            `store_range`.
+        fno_df (pd.DataFrame): Option bars of the chunk, or None with a
+            `store_range`.
+        lot_sizes (dict): Trading date -> lot size.
+        with_mtm (bool, optional): Also compute the MTM curves of every day.
+        store_range (tuple, optional): Store path, first and last trading
+            date and first and last bar time of the chunk.
+
+    Returns:
+        tuple: Strategy name -> list of trades, the days' MTM from
+        `mtm.day_mtm` (empty without `with_mtm`), and the stage records of
+        the chunk (day -> stage -> counters), for `PROFILER.merge` in the
+        process that collects the results.
+    """
+    if strategies is None:
+        strategies = _WORKER_STRATEGIES
+    results = {strategy.name: [] for strategy in strategies}
+    day_curves = []
+    # Recorded apart from PROFILER, since a worker process has its own copy of it
+    profiler = StageProfiler()
+    if store_range is not None:
+        store_path, start_date, end_date, start_time, end_time = store_range
+        profiler.set_day(start_date if start_date == end_date else f"{start_date}..{end_date}")
+        with profiler.stage("fetch") as stage:
+            days = store_days(open_store(store_path), start_date, end_date, start_time, end_time)
+            stage["rows_out"] = sum(len(day.times) for day in days)
+    else:
+        days = index_days(spot_df, fno_df)
+    per_day = [strategy for strategy in strategies if not getattr(strategy, "batched", False)]
+    # Batched strategies see the whole chunk at once; their trades are regrouped by day
+    batched_trades = {}
+    batched = [strategy for strategy in strategies if getattr(strategy, "batched", False)]
+    if batched and days:
+        profiler.set_day(days[0].tr_date if len(days) == 1 else f"{days[0].tr_date}..{days[-1].tr_date}")
+        with profiler.stage("strategies", rows_in=sum(len(day.times) for day in days)) as stage:
+            for strategy in batched:
+                for trade in strategy.run_days(days, lot_sizes):
+                    batched_trades.setdefault(trade["tr_date"], {}).setdefault(strategy.name, []).append(trade)
+            stage["rows_out"] = sum(
+                len(trades) for day_trades in batched_trades.values() for trades in day_trades.values()
+            )
+    for day in days:
+        profiler.set_day(day.tr_date)
+        with profiler.stage("strategies", rows_in=len(day.times)) as stage:
+            day_trades = run_day(day, per_day, lot_sizes.get(day.tr_date))
+            stage["rows_out"] = sum(len(trades) for trades in day_trades.values())
+        day_trades.update(batched_trades.get(day.tr_date, {}))
+        for name, trades in day_trades.items():
+            results[name].extend(trades)
+        if with_mtm:
+            curves = day_mtm(day, day_trades)
+            if curves is not None:
+                day_curves.append(curves)
+    return results, day_curves, profiler.records
+
+
+def run_strategies(
+    strategies, stock_name, start_date, end_date, lot_sizes, chunk_days=20,
+    fno_table="fnoieod_banknifty", executor=None, mtm_dir=None, bar_store=None, worker_strategies=False,
+):
+    """
+    Fetch a date range once and run every strategy over every day of it.
+
+    With an executor, every fetched chunk is handed to it and the next chunk
+    is fetched while the previous one is being processed. With a bar store,
+    nothing is fetched here: every chunk is handed over as the store path and
+    its date range, and read from the store by the process that runs it.
+
+    Parameters:
+        strategies (list): `Strategy` instances with distinct names.
+        stock_name (str): The underlying.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        lot_sizes (dict): Trading date -> lot size, from `read_lot_sizes`.
+        chunk_days (int, optional): Calendar days fetched per query.
+        fno_table (str, optional): Option bar table of the underlying.
+        executor (Executor, optional): Runs `run_chunk` for every chunk.
+        mtm_dir (str, optional): Directory the MTM curves are written to.
+        bar_store (BarStore, optional): Reads the bars from this store instead
+            of the database.
+        worker_strategies (bool, optional): The executor's workers were
+            started with `init_worker(strategies)`, so the strategies are not
+            sent with every chunk.
+
+    Returns:
+        dict: Strategy name -> DataFrame of trades with the `RESULT_COLUMNS`.
+    """
+    first_time = min(strategy.entry_time for strategy in strategies)
+    last_time = max(strategy.squareoff_time for strategy in strategies)
+    mtm_writer = MTMWriter(mtm_dir) if mtm_dir else None
+    chunk_results = []
+    if bar_store is not None:
+        if stock_name != bar_store.stock_name:
+            raise ValueError(f"Bar store {bar_store.path} holds {bar_store.stock_name}, not {stock_name}")
+        _OPEN_STORES.setdefault(bar_store.path, bar_store)
+
+    for chunk_start, chunk_end in chunk_ranges(start_date, end_date, chunk_days):
+        PROFILER.set_day(chunk_start if chunk_start == chunk_end else f"{chunk_start}..{chunk_end}")
+        if bar_store is not None:
+            # The chunk is read from the store by whichever process runs it
+            spot_df = fno_df = None
+            store_range = (bar_store.path, chunk_start.isoformat(), chunk_end.isoformat(), first_time, last_time)
+        else:
+            store_range = None
+            with PROFILER.stage("fetch") as stage:
+                spot_df, fno_df = fetch_bars(
+                    stock_name, chunk_start, chunk_end, first_time, last_time, fno_table, verbose=PROFILER.debug
+                )
+                stage["rows_out"] = len(spot_df) + len(fno_df)
+        if executor is not None:
+            chunk_results.append(
+                executor.submit(
+                    run_chunk, None if worker_strategies else strategies, spot_df, fno_df, lot_sizes,
+                    mtm_writer is not None, store_range,
+                )
+            )
+        else:
+            chunk_results.append(_collect_chunk(
+                mtm_writer,
+                *run_chunk(strategies, spot_df, fno_df, lot_sizes, mtm_writer is not None, store_range),
+            ))
+
+    results = {strategy.name: [] for strategy in strategies}
+    for chunk_result in chunk_results:
+        if executor is not None:
+            chunk_result = _collect_chunk(mtm_writer, *chunk_result.result())
+        for name, trades in chunk_result.items():
+            results[name].extend(trades)
+    PROFILER.set_day("all")
+    return {name: pd.DataFrame(trades, columns=RESULT_COLUMNS) for name, trades in results.items()}
+
+
+def _collect_chunk(mtm_writer, trades, day_curves, stages):
+    """Merge the stage records of a chunk, stream its MTM curves to disk and keep only its trades."""
+    PROFILER.merge(stages)
+    if mtm_writer is not None:
+        with PROFILER.stage("mtm", rows_in=len(day_curves)) as stage:
+            stage["rows_out"] = sum(mtm_writer.write(curves) for curves in day_curves)
+    return trades
+
+
+def run_underlyings(strategies, underlyings, start_date, end_date, chunk_days=20, cpu_workers=None,
+                    lot_size_path="LotSize_Data.csv", mtm_dir=None, bar_store_dir=None):
+    """
+    Run every strategy over several underlyings at the same time.
+
+    Every underlying is fetched by its own thread through the shared
+    connection pools of `market_data`, while the strategies run in one shared
+    pool of worker processes, so the run takes about as long as the slowest
+    underlying instead of the sum of all of them. Every worker process
+    receives the strategies once, when it starts, and keeps them, with one
+    resolver per process, for all the chunks it runs. With bar stores, the
+    workers map the stores themselves; only the store path and the date range
+    of every chunk are sent to them. The workers are spawned rather than
+    forked: the fetch threads already hold pooled database connections, and
+    a forked worker would share their sockets.
+
+    Parameters:
+        strategies (list): `Strategy` instances with distinct names.
+        underlyings (dict): Underlying -> {'fno_table': ..., 'lot_size_column': ...},
+            e.g. from `market_data.parse_underlyings`.
+        start_date (str): First trading date ('YYYY-MM-DD').
+        end_date (str): Last trading date ('YYYY-MM-DD').
+        chunk_days (int, optional): Calendar days fetched per query.
+        cpu_workers (int, optional): Worker processes; defaults to the CPU count.
+        lot_size_path (str, optional): The lot size file.
+        mtm_dir (str, optional): Directory the MTM curves are written to, in
+            one sub-directory per underlying.
+        bar_store_dir (str, optional): Directory pattern of the bar stores to
+            read instead of the database, '{stock}' is the underlying.
+
+    Returns:
+        dict: Underlying -> (strategy name -> DataFrame of trades).
+    """
+    with ProcessPoolExecutor(
+        max_workers=cpu_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(strategies,),
+    ) as process_pool, ThreadPoolExecutor(max_workers=max(len(underlyings), 1)) as thread_pool:
+        futures = {
+            name: thread_pool.submit(
+                run_strategies,
+                strategies,
+                name,
+                start_date,
+                end_date,
+                read_lot_sizes(mapping["lot_size_column"], lot_size_path),
+                chunk_days,
+                mapping["fno_table"],
+                process_pool,
+                os.path.join(mtm_dir, name) if mtm_dir else None,
+                open_store(bar_store_dir.format(stock=name)) if bar_store_dir else None,
+                True,
+            )
+            for name, mapping in underlyings.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def strategies_from_config(config):
+    """
+    Build the registered strategies from the [params] section of a config.
+
+    The s0002_v2 rules take the stoploss from the second and the target from
+    the first `stoploss_target_combo` pair, as the script does; the other
+    rules use the first pair.
+
+    Parameters:
+        config (ConfigParser): The parsed 'config.ini'.
+
+    Returns:
+        list: One `Strategy` per registered rule set, followed by the
+        `MultiLegStrategy` positions of the [multi_leg_strategies] section.
+    """
+    entry_time = config.get("params", "entry_time")
+    squareoff_time = config.get("params", "squareoff_time")
+    combo = json.loads(config.get("params", "stoploss_target_combo"))
+    closest_val = config.getfloat("params", "closest_val", fallback=200)
+    trigger_val = config.getfloat("params", "trigger_val", fallback=1.0)
+    # One resolver for all strategies, so in every process they share its cache of fine bars
+    rules = {"resolver": configure_resolver(config)}
+    # Optional exit families of the [exits] section; an empty value turns one off
+    for option, convert in (
+        ("trail_value", float),
+        ("time_stop_minutes", int),
+        ("mtm_stop", float),
+        ("mtm_target", float),
+    ):
+        value = config.get("exits", option, fallback="").strip()
+        rules[option] = convert(value) if value else None
+    return [
+        PremiumReentryStrategy(
+            "S0002_v2", entry_time, squareoff_time, combo[0][1], combo[1][1], closest_val, trigger_val, **rules
+        ),
+        ClosestPremiumStrategy("S2_v1", entry_time, squareoff_time, combo[0][1], combo[0][0], closest_val, **rules),
+        MinPremiumStrategy("S0001_v3", entry_time, squareoff_time, combo[0][1], combo[0][0], **rules),
+        SpotStrikeStrategy("S0001_v1", entry_time, squareoff_time, combo[0][1], combo[0][0], **rules),
+    ] + multi_leg_strategies_from_config(config, combo[0][1], combo[0][0])
+
+
+if __name__ == "__main__":
+    from results_sink import write_results
+    from shard_router import configure_shards
+
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    configure_shards(config)
+    PROFILE_OUTPUT = configure_profiler(config)
+    START_DATE = config.get("params", "start_date")
+    END_DATE = config.get("params", "end_date")
+    RESULTS_SINK = config.get("output", "sink", fallback="csv")
+    UNDERLYING_MAP = parse_underlyings(config)
+    # Underlyings to run, defaulting to the single stock_name of the scripts
+    SELECTED = [
+        name.strip().strip('"').upper()
+        for name in config.get("params", "underlyings", fallback=config.get("params", "stock_name")).split(",")
+    ]
+
+    results = run_underlyings(
+        strategies_from_config(config),
+        {name: UNDERLYING_MAP[name] for name in SELECTED},
+        START_DATE,
+        END_DATE,
+        config.getint("memory", "max_chunk_days", fallback=20),
+        mtm_dir=config.get("mtm", "output_dir") if config.getboolean("mtm", "enabled", fallback=False) else None,
+        bar_store_dir=(
+            config.get("bar_store", "directory") if config.getboolean("bar_store", "enabled", fallback=False) else None
+        ),
+    )
+    for underlying, frames in results.items():
+        for name, frame in frames.items():
+            strategy_name = f"{name}_{underlying}"
+            if RESULTS_SINK == "db":
+                write_results(frame, strategy_name, START_DATE, END_DATE)
+            else:
+                frame.to_csv(f"{strategy_name}_{START_DATE}_{END_DATE}.csv", index=False)
+    PROFILER.write_summary(PROFILE_OUTPUT)
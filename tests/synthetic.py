@@ -0,0 +1,41 @@
+"""
+Synthetic spot and option bars shared by the tests.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import numpy as np
+import pandas as pd
+
+DATES = ["2019-01-01", "2019-01-02", "2019-01-03"]
+TIMES = [f"{hour:02d}:{minute:02d}:00" for hour in range(9, 16) for minute in range(60)]
+TIMES = [bar_time for bar_time in TIMES if "09:15:00" <= bar_time <= "15:30:00"]
+LOT_SIZE = 20
+
+
+def synthetic_bars(seed=5):
+    """Random-walk option bars of eight strikes per option type and day."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for tr_date in DATES:
+        for otype in ("CE", "PE"):
+            for strike_price, base in zip(range(26800, 27600, 100), [420, 360, 300, 250, 215, 180, 150, 120]):
+                closes = base * np.exp(np.cumsum(rng.normal(0, 0.012, len(TIMES))))
+                for bar_time, close in zip(TIMES, closes):
+                    rows.append({
+                        "tr_date": tr_date,
+                        "tr_time": bar_time,
+                        "tr_open": close,
+                        "tr_high": close * 1.004,
+                        "tr_low": close * 0.996,
+                        "tr_close": close,
+                        "stock_name": "BANKNIFTY",
+                        "strike_price": strike_price,
+                        "otype": otype,
+                        "week_expiry": 1,
+                        "tr_segment": 2,
+                    })
+    spot = pd.DataFrame(
+        [{"tr_date": tr_date, "tr_time": bar_time, "tr_close": 27000.0} for tr_date in DATES for bar_time in TIMES]
+    )
+    return spot, pd.DataFrame(rows)
@@ -0,0 +1,72 @@
+"""
+Round-trip tests of the memory-mapped bar store, on synthetic bars.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import pandas as pd
+import pytest
+import bar_store
+import strategy_engine
+from synthetic import DATES, LOT_SIZE, synthetic_bars
+
+FIRST_TIME = "09:25:00"
+LAST_TIME = "15:25:00"
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A store of the synthetic days, written one day at a time, and its bars."""
+    spot, fno = synthetic_bars()
+    writer = bar_store.BarStoreWriter(str(tmp_path / "BANKNIFTY"), "BANKNIFTY")
+    for tr_date in DATES:
+        writer.add(spot[spot["tr_date"] == tr_date], fno[fno["tr_date"] == tr_date])
+    writer.close()
+    return bar_store.BarStore(str(tmp_path / "BANKNIFTY")), spot, fno
+
+
+def test_store_returns_the_written_bars(store):
+    """The bars read back in a date range and time window equal the bars written."""
+    opened, spot, fno = store
+    spot_read, fno_read = opened.fetch_bars("BANKNIFTY", DATES[0], DATES[1], FIRST_TIME, LAST_TIME)
+
+    key = ["tr_date", "otype", "strike_price", "tr_time"]
+    in_range = (fno["tr_date"] <= DATES[1]) & (fno["tr_time"] >= FIRST_TIME) & (fno["tr_time"] <= LAST_TIME)
+    expected = fno[in_range].sort_values(key).reset_index(drop=True)[bar_store.FNO_COLUMNS]
+    pd.testing.assert_frame_equal(
+        fno_read.sort_values(key).reset_index(drop=True), expected, check_dtype=False
+    )
+    spot_in_range = (spot["tr_date"] <= DATES[1]) & (spot["tr_time"] >= FIRST_TIME) & (spot["tr_time"] <= LAST_TIME)
+    assert len(spot_read) == int(spot_in_range.sum())
+
+
+def test_store_rejects_days_out_of_order(tmp_path):
+    """A chunk starting on or before a day already written is refused."""
+    spot, fno = synthetic_bars()
+    writer = bar_store.BarStoreWriter(str(tmp_path / "BANKNIFTY"), "BANKNIFTY")
+    writer.add(spot[spot["tr_date"] == DATES[1]], fno[fno["tr_date"] == DATES[1]])
+    with pytest.raises(ValueError):
+        writer.add(spot[spot["tr_date"] == DATES[0]], fno[fno["tr_date"] == DATES[0]])
+
+
+def test_engine_trades_equal_from_store_and_frames(store):
+    """Days indexed from the store give the engine the same trades as days built from frames."""
+    opened, spot, fno = store
+    strategies = [
+        strategy_engine.PremiumReentryStrategy("S0002_v2", "09:30:00", "15:20:00", 0.8, 1.1, 200, 0.98),
+        strategy_engine.MinPremiumStrategy("S0001_v3", "09:30:00", "15:20:00", 0.8, 1.1),
+    ]
+    for tr_date in DATES:
+        from_store = strategy_engine.DayBars.from_store(opened, tr_date, FIRST_TIME, LAST_TIME)
+        in_window = (fno["tr_time"] >= FIRST_TIME) & (fno["tr_time"] <= LAST_TIME)
+        from_frames = strategy_engine.DayBars(
+            tr_date, spot[spot["tr_date"] == tr_date], fno[(fno["tr_date"] == tr_date) & in_window]
+        )
+        store_trades = strategy_engine.run_day(from_store, strategies, LOT_SIZE)
+        frame_trades = strategy_engine.run_day(from_frames, strategies, LOT_SIZE)
+        for strategy in strategies:
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(store_trades[strategy.name]),
+                pd.DataFrame(frame_trades[strategy.name]),
+                check_dtype=False,
+            )
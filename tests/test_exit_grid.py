@@ -0,0 +1,76 @@
+"""
+Tests of the exit grid against the strategy engine, on synthetic bars.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import itertools
+import numpy as np
+import pytest
+import exit_grid
+import strategy_engine
+from synthetic import DATES, LOT_SIZE, synthetic_bars
+
+ENTRY_TIME = "09:30:00"
+SQUAREOFF_TIME = "15:20:00"
+PAIRS = list(itertools.product([1.05, 1.1, 1.3, 2.0], [0.5, 0.8, 0.95]))
+
+
+def indexed_days(spot, fno):
+    """One `DayBars` per synthetic day."""
+    return [
+        strategy_engine.DayBars(tr_date, spot[spot["tr_date"] == tr_date], fno[fno["tr_date"] == tr_date])
+        for tr_date in DATES
+    ]
+
+
+@pytest.mark.parametrize(
+    "make_strategy",
+    [
+        lambda target, stoploss: strategy_engine.ClosestPremiumStrategy(
+            "S2_v1", ENTRY_TIME, SQUAREOFF_TIME, target, stoploss, 200
+        ),
+        lambda target, stoploss: strategy_engine.MinPremiumStrategy(
+            "S0001_v3", ENTRY_TIME, SQUAREOFF_TIME, target, stoploss
+        ),
+        lambda target, stoploss: strategy_engine.PremiumReentryStrategy(
+            "S0002_v2", ENTRY_TIME, SQUAREOFF_TIME, target, stoploss, 200, 0.98
+        ),
+    ],
+    ids=["closest_premium", "min_premium", "premium_reentry"],
+)
+def test_grid_matches_engine_for_every_pair(make_strategy):
+    """
+    Every first entry gets, for every (stoploss, target) pair, the exit the
+    engine finds when it runs with that pair.
+    """
+    spot, fno = synthetic_bars()
+    days = indexed_days(spot, fno)
+    grid_strategy = make_strategy(*PAIRS[0][::-1])
+    grid = exit_grid.ExitGrid(grid_strategy.squareoff_time, grid_strategy.stoploss_first)
+    for day in days:
+        exit_grid.add_day(grid, grid_strategy, day, LOT_SIZE)
+    cube = grid.evaluate(PAIRS)
+    assert len(grid.trades)
+
+    for position, (stoploss, target) in enumerate(PAIRS):
+        strategy = make_strategy(target, stoploss)
+        first_entries = []
+        for day in days:
+            for otype in strategy.otypes:
+                # The first trade of every leg, before any re-entry
+                leg = [
+                    trade for trade in strategy_engine.run_day(day, [strategy], LOT_SIZE)[strategy.name]
+                    if trade["otype"] == otype
+                ]
+                first_entries.extend(leg[:1])
+        assert [(trade["tr_date"], trade["otype"], trade["entry_time"]) for trade in first_entries] == [
+            (trade["tr_date"], trade["otype"], trade["entry_time"]) for trade in grid.trades
+        ]
+        assert [trade["exit_type"] for trade in first_entries] == [
+            exit_grid.EXIT_CODES[code] for code in cube["exit_code"][:, position]
+        ]
+        assert [trade["exit_time"] for trade in first_entries] == list(cube["exit_time"][:, position])
+        np.testing.assert_allclose(
+            [trade["PNL"] for trade in first_entries], cube["PNL"][:, position]
+        )
@@ -0,0 +1,121 @@
+"""
+Tests of the incremental analytics rollup against a full rebuild, on an
+in-memory SQLite database.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import datetime
+import itertools
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData, create_engine, select
+import rollups
+import schema
+from results_ingest import upsert_summary
+
+
+@pytest.fixture
+def tables():
+    """An engine with an empty `strategy_1` table and rollup table."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    strategy_table = schema.define_strategy_table(metadata)
+    # SQLite cannot autoincrement a composite primary key; the trades carry their ids
+    strategy_table.c.id.autoincrement = False
+    rollup_table = rollups.define_rollup_table(metadata)
+    metadata.create_all(engine)
+    return engine, strategy_table, rollup_table
+
+
+def trade(trade_id, cycle_id, entry_date, entry_price, exit_price, exit_type, pnl=None, otype="CE"):
+    """One uploaded trade, sold, with or without a stored PNL."""
+    return {
+        "id": trade_id,
+        "Strategy_Name": "S0002_v2",
+        "Cycle_Id": str(cycle_id),
+        "Entry_Date": entry_date,
+        "CE_PE": otype,
+        "Trade_Type": "SELL",
+        "Entry_Price": entry_price,
+        "Exit_Price": exit_price,
+        "Exit_Type": exit_type,
+        "PNL": pnl,
+    }
+
+
+def upload(engine, strategy_table, rollup_table, records):
+    """Upsert records and apply their rollup deltas, as the upload endpoint does."""
+    with engine.begin() as connection:
+        deltas = rollups.combine_rollup_deltas(
+            rollups.compute_replaced_deltas(connection, strategy_table, records),
+            rollups.compute_rollup_deltas(records),
+        )
+        upsert_summary(connection, strategy_table, records)
+        rollups.apply_rollup_deltas(connection, rollup_table, deltas)
+
+
+def rollup_rows(engine, rollup_table):
+    """The rollup rows with trades, in key order."""
+    with engine.connect() as connection:
+        rows = pd.DataFrame(connection.execute(select(rollup_table)).mappings().all())
+    rows = rows[rows["trades"] != 0]
+    return rows.sort_values(rollups.ROLLUP_KEYS).reset_index(drop=True)[rollups.ROLLUP_KEYS + rollups.ROLLUP_MEASURES]
+
+
+def test_deltas_match_rebuild(tables):
+    """Uploads that add and replace trades leave the rollup a rebuild would write."""
+    engine, strategy_table, rollup_table = tables
+    ids = itertools.count(1)
+    first_day, second_day = datetime.date(2019, 1, 1), datetime.date(2019, 1, 2)
+    upload(engine, strategy_table, rollup_table, [
+        trade(next(ids), 1, first_day, 100.0, 50.0, "TARGET", pnl=1000.0),
+        trade(next(ids), 2, first_day, 100.0, 120.0, "STOPLOSS"),
+        trade(next(ids), 1, second_day, 90.0, 95.0, "SQOFF", otype="PE"),
+    ])
+    # Replaces two stored trades, moving one to another exit type and unit, and adds one
+    upload(engine, strategy_table, rollup_table, [
+        trade(next(ids), 1, first_day, 100.0, 80.0, "SQOFF"),
+        trade(next(ids), 1, second_day, 90.0, 135.0, "STOPLOSS", pnl=-900.0, otype="PE"),
+        trade(next(ids), 3, second_day, 80.0, 40.0, "TARGET", pnl=800.0),
+    ])
+    incremental = rollup_rows(engine, rollup_table)
+
+    with engine.begin() as connection:
+        rollups.rebuild_rollups(connection, strategy_table, rollup_table)
+    rebuilt = rollup_rows(engine, rollup_table)
+    pd.testing.assert_frame_equal(incremental, rebuilt, check_dtype=False)
+    assert len(rebuilt) == 4
+
+
+def test_pnl_units_are_reported_apart(tables):
+    """Stored lot-sized PNL and per-unit points are never summed together."""
+    engine, strategy_table, rollup_table = tables
+    entry_date = datetime.date(2019, 1, 1)
+    upload(engine, strategy_table, rollup_table, [
+        trade(1, 1, entry_date, 100.0, 50.0, "TARGET", pnl=1000.0),
+        trade(2, 2, entry_date, 100.0, 120.0, "STOPLOSS"),
+    ])
+    with engine.connect() as connection:
+        daily = rollups.query_pnl(connection, rollup_table)
+        totals = rollups.query_win_rate(connection, rollup_table)
+    assert {(row["pnl_unit"], row["pnl"]) for row in daily} == {("lot", 1000.0), ("points", -20.0)}
+    assert (totals["trades"], totals["wins"], totals["losses"]) == (2, 1, 1)
+    assert {row["pnl_unit"]: row["pnl"] for row in totals["by_unit"]} == {"lot": 1000.0, "points": -20.0}
+
+
+def test_trades_without_cycle_id_are_updated_on_reupload(tables):
+    """Derived Cycle_Ids let a re-upload replace the trades instead of adding them again."""
+    engine, strategy_table, rollup_table = tables
+    entry_date = datetime.date(2019, 1, 1)
+    for first_id in (1, 3):
+        uploaded = pd.DataFrame([
+            trade(first_id, None, entry_date, 100.0, 50.0, "TARGET"),
+            trade(first_id + 1, None, entry_date, 100.0, 120.0, "STOPLOSS"),
+        ]).assign(Cycle_Id=None)
+        records = schema.coerce_to_schema(schema.fill_cycle_ids(uploaded)).to_dict("records")
+        upload(engine, strategy_table, rollup_table, records)
+    with engine.connect() as connection:
+        stored = connection.execute(select(strategy_table.c.Cycle_Id).order_by(strategy_table.c.id)).scalars().all()
+    assert stored == ["1", "2"]
+    assert rollup_rows(engine, rollup_table)["trades"].sum() == 2
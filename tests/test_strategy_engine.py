@@ -0,0 +1,178 @@
+"""
+Equivalence tests of the strategy engine against the legacy scripts, on
+synthetic bars.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import s0001_v3
+import s0002_v2
+import strategy_engine
+from synthetic import DATES, LOT_SIZE, synthetic_bars
+
+ENTRY_TIME = "09:30:00"
+SQUAREOFF_TIME = "15:20:00"
+STOPLOSS_TARGET = [[1.1, 0.8]]
+
+
+def engine_trades(spot, fno):
+    """Trades of the engine's s0001_v3 port over the synthetic days."""
+    strategy = strategy_engine.MinPremiumStrategy(
+        "S0001_v3", ENTRY_TIME, SQUAREOFF_TIME, STOPLOSS_TARGET[0][1], STOPLOSS_TARGET[0][0]
+    )
+    trades = []
+    for tr_date in DATES:
+        day = strategy_engine.DayBars(tr_date, spot[spot["tr_date"] == tr_date], fno[fno["tr_date"] == tr_date])
+        trades.extend(strategy_engine.run_day(day, [strategy], LOT_SIZE)[strategy.name])
+    return pd.DataFrame(trades)
+
+
+def cheapest_strike(fno, tr_date, otype, bar_time):
+    """The s0001_v3 strike rule: the cheapest close of at least 200 at a bar."""
+    chain = fno[(fno["tr_date"] == tr_date) & (fno["otype"] == otype) & (fno["tr_time"] == bar_time)]
+    chain = chain[chain["tr_close"] >= 200]
+    return chain.nsmallest(1, "tr_close").iloc[0]
+
+
+def test_min_premium_follows_s0001_v3_rules(monkeypatch):
+    """
+    Every engine trade, re-entries included, uses the s0001_v3 strike rule at
+    its entry bar and the exit of the script's own `apply_exit_conditions`.
+    """
+    spot, fno = synthetic_bars()
+    trades = engine_trades(spot, fno)
+    monkeypatch.setattr(s0001_v3, "fnoieddf", fno, raising=False)
+
+    reentries = trades[trades["entry_time"] != ENTRY_TIME]
+    assert len(reentries), "the synthetic bars should trigger at least one re-entry"
+    for _, trade in trades.iterrows():
+        selected = cheapest_strike(fno, trade["tr_date"], trade["otype"], trade["entry_time"])
+        assert trade["strike_price"] == selected["strike_price"]
+        assert trade["temp_entry_price"] == pytest.approx(selected["tr_close"])
+        exit_type, exit_price, exit_time = s0001_v3.apply_exit_conditions(
+            trade["tr_date"],
+            trade["strike_price"],
+            trade["otype"],
+            trade["temp_entry_price"] * STOPLOSS_TARGET[0][1],
+            trade["temp_entry_price"] * STOPLOSS_TARGET[0][0],
+            trade["entry_time"],
+            SQUAREOFF_TIME,
+        )
+        if exit_type is None:
+            # The script leaves a trade that reaches neither level open; the
+            # engine squares it off
+            assert trade["exit_type"] == "SQOFF"
+            continue
+        assert (trade["exit_type"], trade["exit_time"]) == (exit_type, exit_time)
+        assert trade["exit_price"] == pytest.approx(exit_price)
+
+    # One re-entry after every first-entry stoploss, none after a re-entry
+    first_stops = trades[(trades["entry_time"] == ENTRY_TIME) & (trades["exit_type"] == "STOPLOSS")]
+    assert sorted(zip(first_stops["tr_date"], first_stops["otype"], first_stops["exit_time"])) == sorted(
+        zip(reentries["tr_date"], reentries["otype"], reentries["entry_time"])
+    )
+
+
+@pytest.mark.skipif(
+    int(pd.__version__.split(".")[0]) >= 3,
+    reason="s0001_v3 relies on groupby.apply passing the grouping columns, which pandas 3 drops",
+)
+def test_min_premium_matches_s0001_v3_script(tmp_path, monkeypatch):
+    """The engine's trades equal the trades of the s0001_v3 script."""
+    spot, fno = synthetic_bars()
+    monkeypatch.chdir(tmp_path)
+    script_spot = spot.assign(tr_date=pd.to_datetime(spot["tr_date"]).dt.strftime("%d-%m-%Y"))
+    script_spot.to_csv("spot_data.csv", index=False)
+    pd.DataFrame({"Date": DATES, "BankNifty": LOT_SIZE}).to_csv("LotSize_Data.csv", index=False)
+    monkeypatch.setattr(s0001_v3, "fnoieddf", fno.copy(), raising=False)
+    monkeypatch.setattr(s0001_v3, "ENTRY_TIME", ENTRY_TIME, raising=False)
+    monkeypatch.setattr(s0001_v3, "SQUAREOFF_TIME", SQUAREOFF_TIME, raising=False)
+    monkeypatch.setattr(s0001_v3, "TARGET_STOPLOSS_VALUES", json.dumps(STOPLOSS_TARGET), raising=False)
+    s0001_v3.main()
+
+    script = pd.read_csv("S0001_v3.csv").dropna(subset=["exit_type"])
+    script["tr_date"] = pd.to_datetime(script["tr_date"], format="%d-%m-%Y").dt.strftime("%Y-%m-%d")
+    engine = engine_trades(spot, fno)
+    engine = engine[engine["exit_type"] != "SQOFF"]
+    key = ["tr_date", "otype", "tr_time"]
+    script = script.sort_values(key).reset_index(drop=True)
+    engine = engine.sort_values(key).reset_index(drop=True)
+    assert list(script["strike_price"]) == list(engine["strike_price"])
+    assert list(script["exit_type"]) == list(engine["exit_type"])
+    np.testing.assert_allclose(script["PNL"], engine["PNL"])
+
+
+def s0002_v2_script_trades(spot, fno, closest_val, trigger_val):
+    """
+    The trades of the s0002_v2 script, built leg by leg with its own strike,
+    entry, exit and re-entry functions.
+    """
+    stoploss_value, target_value = STOPLOSS_TARGET[0]
+    trades = []
+    for (tr_date, otype), group in fno.groupby(["tr_date", "otype"]):
+        selected = s0002_v2.get_closest_strike_price(group, ENTRY_TIME, closest_val, spot, trigger_val).iloc[0]
+        strike_price, entry_price = selected["strike_price"], selected["temp_entry_price"]
+        after_time = ENTRY_TIME
+        # The first entry, and one re-entry at the same price after a stoploss
+        for _ in range(2):
+            entry_time = s0002_v2.apply_entry_time_conditions(
+                tr_date, otype, after_time, SQUAREOFF_TIME, entry_price, strike_price, fno
+            )
+            if entry_time is None:
+                break
+            exit_type, exit_price, exit_time = s0002_v2.apply_exit_conditions(
+                tr_date,
+                strike_price,
+                otype,
+                entry_price * stoploss_value,
+                entry_price * target_value,
+                entry_time,
+                SQUAREOFF_TIME,
+                fno,
+            )
+            trades.append({
+                "tr_date": tr_date,
+                "otype": otype,
+                "strike_price": strike_price,
+                "entry_time": entry_time,
+                "exit_type": exit_type,
+                "exit_time": exit_time,
+                "PNL": (entry_price - exit_price) * LOT_SIZE,
+            })
+            if exit_type != "STOPLOSS":
+                break
+            after_time = exit_time
+    return pd.DataFrame(trades)
+
+
+def test_premium_reentry_matches_s0002_v2_trade_functions():
+    """
+    The engine's s0002_v2 port makes the same trades, re-entries included, as
+    the script's per-trade functions; the script's `process_data_for_date`
+    itself needs `DataFrame.append`, which pandas 2 removed.
+    """
+    closest_val, trigger_val = 200, 0.98
+    spot, fno = synthetic_bars()
+    strategy = strategy_engine.PremiumReentryStrategy(
+        "S0002_v2", ENTRY_TIME, SQUAREOFF_TIME, STOPLOSS_TARGET[0][1], STOPLOSS_TARGET[0][0], closest_val, trigger_val
+    )
+    engine = []
+    for tr_date in DATES:
+        day = strategy_engine.DayBars(tr_date, spot[spot["tr_date"] == tr_date], fno[fno["tr_date"] == tr_date])
+        engine.extend(strategy_engine.run_day(day, [strategy], LOT_SIZE)[strategy.name])
+    engine = pd.DataFrame(engine)
+    script = s0002_v2_script_trades(spot, fno, closest_val, trigger_val)
+
+    assert (script["entry_time"] != script.groupby(["tr_date", "otype"])["entry_time"].transform("first")).any(), (
+        "the synthetic bars should trigger at least one re-entry"
+    )
+    key = ["tr_date", "otype", "entry_time"]
+    engine = engine.sort_values(key).reset_index(drop=True)
+    script = script.sort_values(key).reset_index(drop=True)
+    for column in ("tr_date", "otype", "strike_price", "entry_time", "exit_type", "exit_time"):
+        assert list(engine[column]) == list(script[column]), column
+    np.testing.assert_allclose(engine["PNL"].astype(float), script["PNL"].astype(float))
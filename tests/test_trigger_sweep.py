@@ -0,0 +1,52 @@
+"""
+Tests of the running-low entry index against the s0002_v2 entry scan, on
+synthetic bars.
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import numpy as np
+import s0002_v2
+import strategy_engine
+import trigger_sweep
+from synthetic import DATES, synthetic_bars
+
+ENTRY_TIME = "09:30:00"
+SQUAREOFF_TIME = "15:20:00"
+
+
+def test_running_low_index_matches_entry_scan():
+    """Every entry time equals the one `apply_entry_time_conditions` scans for."""
+    spot, fno = synthetic_bars()
+    index = trigger_sweep.RunningLowIndex(fno, ENTRY_TIME, SQUAREOFF_TIME)
+    rng = np.random.default_rng(3)
+    reached = 0
+    for _ in range(200):
+        tr_date = str(rng.choice(DATES))
+        otype = str(rng.choice(["CE", "PE"]))
+        strike_price = int(rng.choice(range(26800, 27600, 100)))
+        entry_price = float(rng.uniform(80, 450))
+        expected = s0002_v2.apply_entry_time_conditions(
+            tr_date, otype, ENTRY_TIME, SQUAREOFF_TIME, entry_price, strike_price, fno
+        )
+        assert index.entry_times(tr_date, otype, strike_price, entry_price)[0] == expected
+        reached += expected is not None
+    assert 0 < reached < 200, "the sampled prices should be reached only sometimes"
+
+
+def test_index_of_loaded_days_matches_index_of_frame():
+    """`RunningLowIndex.from_days` indexes `DayBars` exactly as the frame constructor does."""
+    spot, fno = synthetic_bars()
+    days = [
+        strategy_engine.DayBars(tr_date, spot[spot["tr_date"] == tr_date], fno[fno["tr_date"] == tr_date])
+        for tr_date in DATES
+    ]
+    from_frame = trigger_sweep.RunningLowIndex(fno, ENTRY_TIME, SQUAREOFF_TIME)
+    from_days = trigger_sweep.RunningLowIndex.from_days(days, ENTRY_TIME, SQUAREOFF_TIME)
+    assert from_days.offsets.keys() == from_frame.offsets.keys()
+    for key, (start, stop) in from_frame.offsets.items():
+        days_start, days_stop = from_days.offsets[key]
+        assert list(from_days.times[days_start:days_stop]) == list(from_frame.times[start:stop])
+        np.testing.assert_array_equal(
+            from_days.running_low[days_start:days_stop], from_frame.running_low[start:stop]
+        )
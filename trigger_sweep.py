@@ -0,0 +1,237 @@
+"""
+Trigger Sweep
+
+The s0002_v2 entry waits for the first bar after the entry time whose low
+reaches `temp_entry_price = tr_close * TRIGGER_VAL`. That first bar is the
+first position where the running minimum of the lows reaches the price, and
+the running minimum never increases, so:
+
+- `RunningLowIndex` computes the running minimum of the lows of every
+  (tr_date, otype, strike_price) once for a fetched frame or for the days
+  loaded by `strategy_engine.load_days`,
+- the entry times of any number of trigger values (or entry prices) of a
+  contract are then one `searchsorted` call instead of a scan of the frame
+  per trade and per trigger value,
+- `sweep_triggers` combines it with `exit_grid.ExitGrid` to backtest every
+  trigger value against every (stoploss, target) pair in one pass.
+
+As in the scripts, only the first entry of a leg is swept; re-entries start
+after an exit and are left to the strategy engine.
+
+Usage:
+    python trigger_sweep.py --triggers 0.9 0.95 0.98 1.0
+
+Author: B Shashank
+Date: October 19, 2026
+"""
+import argparse
+import configparser
+import json
+import numpy as np
+import pandas as pd
+from exit_grid import ExitGrid
+from market_data import parse_underlyings
+from shard_router import configure_shards
+from strategy_engine import (
+    PremiumReentryStrategy,
+    chunk_ranges,
+    load_days,
+    open_store,
+    read_lot_sizes,
+    strategies_from_config,
+)
+
+KEY_COLUMNS = ["tr_date", "otype", "strike_price"]
+
+
+class RunningLowIndex:
+    """
+    Running minimum of the lows of every contract between the entry and the
+    square-off time (both excluded, as in `apply_entry_time_conditions`).
+
+    Attributes:
+        times (np.ndarray): Bar times, grouped by contract and in time order.
+        running_low (np.ndarray): Running minimum of the lows within each contract.
+        offsets (dict): (tr_date, otype, strike_price) -> (start, stop) into the arrays.
+    """
+
+    def __init__(self, fno_df, entry_time, squareoff_time):
+        times = fno_df["tr_time"].astype(str)
+        bars = fno_df[(times > entry_time) & (times < squareoff_time)].assign(
+            tr_date=lambda frame: frame["tr_date"].astype(str),
+            tr_time=lambda frame: frame["tr_time"].astype(str),
+        )
+        bars = bars.sort_values(KEY_COLUMNS + ["tr_time"], kind="stable")
+        self.times = bars["tr_time"].to_numpy()
+        self.running_low = bars.groupby(KEY_COLUMNS, sort=False)["tr_low"].cummin().to_numpy(dtype=float)
+
+        # Contract boundaries, as in `strategy_engine.DayBars`
+        keys = bars[KEY_COLUMNS].to_numpy()
+        if len(bars):
+            changes = np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1
+            starts = np.concatenate(([0], changes))
+            stops = np.concatenate((changes, [len(bars)]))
+        else:
+            starts = stops = np.array([], dtype=int)
+        self.offsets = {tuple(keys[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+    @classmethod
+    def from_days(cls, days, entry_time, squareoff_time):
+        """
+        Build the index from indexed days, whose bars are already grouped by
+        contract and in time order, so nothing is sorted again.
+
+        Parameters:
+            days (list): `strategy_engine.DayBars`, e.g. from `load_days`.
+            entry_time (str): Entry time ('HH:MM:SS'), excluded.
+            squareoff_time (str): Square-off time ('HH:MM:SS'), excluded.
+
+        Returns:
+            RunningLowIndex: The index of every contract of the days.
+        """
+        index = cls.__new__(cls)
+        index.offsets = {}
+        times, running_lows = [], []
+        position = 0
+        for day in days:
+            for (otype, strike_price), (start, stop) in day.offsets.items():
+                day_times = day.times[start:stop]
+                inside = (day_times > entry_time) & (day_times < squareoff_time)
+                count = int(inside.sum())
+                if not count:
+                    continue
+                times.append(day_times[inside])
+                running_lows.append(np.minimum.accumulate(np.asarray(day.low[start:stop][inside], dtype=float)))
+                index.offsets[(str(day.tr_date), otype, strike_price)] = (position, position + count)
+                position += count
+        index.times = np.concatenate(times) if times else np.array([], dtype=str)
+        index.running_low = np.concatenate(running_lows) if running_lows else np.array([], dtype=float)
+        return index
+
+    def entry_times(self, tr_date, otype, strike_price, entry_prices):
+        """
+        First bar time at which the low reaches each entry price.
+
+        Parameters:
+            tr_date (str): The trading date ('YYYY-MM-DD').
+            otype (str): 'CE' or 'PE'.
+            strike_price (float): Strike of the contract.
+            entry_prices (array-like): Entry prices, e.g. the entry-bar close
+                times every trigger value.
+
+        Returns:
+            np.ndarray: One time per price, None where the price is never reached.
+        """
+        entry_prices = np.atleast_1d(np.asarray(entry_prices, dtype=float))
+        result = np.full(len(entry_prices), None, dtype=object)
+        if (str(tr_date), otype, strike_price) not in self.offsets:
+            return result
+        start, stop = self.offsets[(str(tr_date), otype, strike_price)]
+        # The running minimum is non-increasing, so its negation is sorted
+        positions = np.searchsorted(-self.running_low[start:stop], -entry_prices, side="left")
+        reached = positions < stop - start
+        result[reached] = self.times[start:stop][positions[reached]]
+        return result
+
+
+def sweep_triggers(strategy, days, lot_sizes, trigger_values, grids=None):
+    """
+    Add the first entries of every leg for every trigger value to exit grids.
+
+    Parameters:
+        strategy (PremiumReentryStrategy): Chooses the strikes and holds the
+            entry and square-off times.
+        days (list): `DayBars` of the fetched range, e.g. from `load_days`.
+        lot_sizes (dict): Trading date -> lot size.
+        trigger_values (list): Trigger values to sweep.
+        grids (dict, optional): Trigger value -> `ExitGrid` to add to, e.g.
+            from a previous chunk.
+
+    Returns:
+        dict: Trigger value -> `ExitGrid` with the entries of that value.
+    """
+    grids = grids if grids is not None else {
+        trigger: ExitGrid(strategy.squareoff_time, strategy.stoploss_first, strategy.resolver)
+        for trigger in trigger_values
+    }
+    index = RunningLowIndex.from_days(days, strategy.entry_time, strategy.squareoff_time)
+    triggers = np.asarray(trigger_values, dtype=float)
+    for day in days:
+        for otype in strategy.otypes:
+            selected = strategy.select_strike(day, otype)
+            if selected is None:
+                continue
+            strike_price, reference_price = selected
+            entry_prices = reference_price * triggers
+            entry_times = index.entry_times(day.tr_date, otype, strike_price, entry_prices)
+            series = day.series(otype, strike_price)
+            for trigger, entry_time, entry_price in zip(trigger_values, entry_times, entry_prices):
+                if entry_time is None:
+                    continue
+                grids[trigger].add(
+                    {
+                        "tr_date": day.tr_date,
+                        "stock_name": day.stock_name,
+                        "strike_price": strike_price,
+                        "otype": otype,
+                        "entry_time": entry_time,
+                        "temp_entry_price": entry_price,
+                        "lotsize": lot_sizes.get(day.tr_date),
+                    },
+                    series,
+                    entry_time,
+                )
+    return grids
+
+
+def main():
+    """
+    Sweep trigger values of the s0002_v2 rules against the configured
+    (stoploss, target) pairs and write one summary row per combination.
+    """
+    parser = argparse.ArgumentParser(description="Sweep s0002_v2 trigger values")
+    parser.add_argument("--triggers", type=float, nargs="+", help="Trigger values (default: trigger_val)")
+    parser.add_argument("--output", default="trigger_sweep.csv", help="Summary CSV")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read("config.ini")
+    configure_shards(config)
+    start_date = config.get("params", "start_date")
+    end_date = config.get("params", "end_date")
+    stock_name = config.get("params", "stock_name").strip('"').upper()
+    underlying = parse_underlyings(config)[stock_name]
+    chunk_days = config.getint("memory", "max_chunk_days", fallback=20)
+    pairs = json.loads(config.get("params", "stoploss_target_combo"))
+    triggers = args.triggers or [config.getfloat("params", "trigger_val")]
+    strategy = next(
+        strategy for strategy in strategies_from_config(config) if isinstance(strategy, PremiumReentryStrategy)
+    )
+    lot_sizes = read_lot_sizes(underlying["lot_size_column"])
+    bar_store = None
+    if config.getboolean("bar_store", "enabled", fallback=False):
+        bar_store = open_store(config.get("bar_store", "directory").format(stock=stock_name))
+
+    grids = None
+    for chunk_start, chunk_end in chunk_ranges(start_date, end_date, chunk_days):
+        days = load_days(
+            stock_name,
+            chunk_start,
+            chunk_end,
+            strategy.entry_time,
+            strategy.squareoff_time,
+            underlying["fno_table"],
+            bar_store,
+        )
+        grids = sweep_triggers(strategy, days, lot_sizes, triggers, grids)
+
+    summary = pd.concat(
+        [grid.summary(grid.evaluate(pairs)).assign(trigger_val=trigger) for trigger, grid in grids.items()],
+        ignore_index=True,
+    )
+    summary.to_csv(args.output, index=False)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()